@@ -155,6 +155,136 @@ REVIZTO_LICENCE_UUID = os.environ.get("REVIZTO_LICENCE_UUID", "")
 REVIZTO_ACCESS_TOKEN = os.environ.get("REVIZTO_ACCESS_TOKEN", "")
 REVIZTO_REFRESH_TOKEN = os.environ.get("REVIZTO_REFRESH_TOKEN", "")
 REVIZTO_ENABLE_TOKEN_REFRESH = True
+# Seconds between cheap updated_at checks of the process-local token snapshot
+# (detects tokens rotated by another worker without re-reading the row per call)
+REVIZTO_TOKEN_SNAPSHOT_CHECK_INTERVAL = 60
+# Token refresher: refresh this many seconds before token_expiry (keep above the
+# 5-minute expiry threshold used by requests), with jittered backoff on failure
+REVIZTO_TOKEN_REFRESH_MARGIN = 600
+REVIZTO_TOKEN_REFRESH_RETRY_BASE = 30
+REVIZTO_TOKEN_REFRESH_RETRY_MAX = 900
+
+# Shared HTTP connection pool for outbound Revizto calls (per worker process).
+# pool_maxsize should cover the peak number of concurrent calls in one worker
+# (gunicorn threads x per-request fan-out); see /api/debug/api-client/.
+REVIZTO_HTTP_POOL_CONNECTIONS = int(os.environ.get("REVIZTO_HTTP_POOL_CONNECTIONS", "4"))
+REVIZTO_HTTP_POOL_MAXSIZE = int(os.environ.get("REVIZTO_HTTP_POOL_MAXSIZE", "10"))
+REVIZTO_HTTP_POOL_BLOCK = False
+# Process-wide limit of concurrent Revizto calls made by the async client
+# (keep REVIZTO_HTTP_POOL_MAXSIZE >= this value so calls don't queue for sockets)
+REVIZTO_ASYNC_MAX_CONCURRENCY = int(os.environ.get("REVIZTO_ASYNC_MAX_CONCURRENCY", "8"))
+# Adaptive rate limiter shared by all Revizto API calls of a worker: token bucket
+# (rate/burst) plus AIMD concurrency; honors Retry-After and X-RateLimit-* headers
+REVIZTO_RATE_LIMIT = {
+    'rate': 10.0,
+    'burst': 20,
+    'initial_concurrency': 8,
+    'min_concurrency': 1,
+    'max_concurrency': 16,
+    'max_wait': 60,
+}
+# Per-endpoint-family circuit breakers (fail fast while Revizto is degraded) and a
+# global retry budget so retries stay a fraction of first attempts
+REVIZTO_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,
+    'reset_timeout': 30,
+    'half_open_max_calls': 1,
+}
+REVIZTO_RETRY_BUDGET = {
+    'ratio': 0.2,
+    'min_retries': 3,
+    'window': 10,
+}
+# (connect, read) timeouts in seconds, keyed by endpoint family
+REVIZTO_HTTP_TIMEOUTS = {
+    'default': (5, 60),
+    'oauth2': (5, 30),
+    'licences': (5, 30),
+    'license/projects': (5, 30),
+    'project/issue-workflow': (5, 30),
+    'project/issue-filter': (5, 60),
+    'issue/comments': (5, 30),
+    'image': (5, 20),
+}
+
+# Caches: 'revizto' holds Revizto API responses; the file backend is shared by
+# all workers on the host (use locmem or a database cache if preferred)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'revizto': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get("REVIZTO_CACHE_DIR", "/tmp/revizto-cache"),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'revizto-comments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get("REVIZTO_COMMENT_STORE_DIR", "/tmp/revizto-comments"),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+REVIZTO_CACHE_ALIAS = 'revizto'
+# Issue comment histories are stored locally and only comments newer than the
+# newest stored one are fetched; each history is fetched in full again after
+# REVIZTO_COMMENT_FULL_RESYNC_SECONDS to pick up edits and deletions
+REVIZTO_COMMENT_SYNC_ENABLED = os.environ.get("REVIZTO_COMMENT_SYNC_ENABLED", "true").lower() == "true"
+REVIZTO_COMMENT_STORE_ALIAS = 'revizto-comments'
+REVIZTO_COMMENT_FULL_RESYNC_SECONDS = int(os.environ.get("REVIZTO_COMMENT_FULL_RESYNC_SECONDS", str(24 * 3600)))
+# Local mirror of projects, report issues and comments in the postgres database,
+# filled by `manage.py sync_revizto`. Reads use it while the project's last sync
+# is younger than REVIZTO_MIRROR_MAX_AGE seconds and go to Revizto otherwise;
+# comments are fetched in full again after REVIZTO_MIRROR_FULL_RESYNC_SECONDS
+REVIZTO_MIRROR_READS = os.environ.get("REVIZTO_MIRROR_READS", "true").lower() == "true"
+REVIZTO_MIRROR_MAX_AGE = int(os.environ.get("REVIZTO_MIRROR_MAX_AGE", "900"))
+REVIZTO_MIRROR_FULL_RESYNC_SECONDS = int(os.environ.get("REVIZTO_MIRROR_FULL_RESYNC_SECONDS", str(24 * 3600)))
+REVIZTO_MIRROR_SYNC_WORKERS = int(os.environ.get("REVIZTO_MIRROR_SYNC_WORKERS", "4"))
+# Project search: the licence project list is indexed in memory per process and
+# rebuilt in the background once older than PROJECT_CATALOG_REFRESH_SECONDS
+PROJECT_CATALOG_REFRESH_SECONDS = int(os.environ.get("PROJECT_CATALOG_REFRESH_SECONDS", "300"))
+PROJECT_SEARCH_LIMIT = 20
+PROJECT_SEARCH_MAX_LIMIT = 100
+# Fresh lifetime in seconds per endpoint family (0 = not cached)
+REVIZTO_CACHE_TTLS = {
+    'default': 0,
+    'license/projects': 600,
+    'project/issue-workflow': 3600,
+    'project/issue-filter': 120,
+    'issue/comments': 300,
+}
+# Serve stale entries this long past their TTL while refreshing in the background
+REVIZTO_CACHE_STALE_WHILE_REVALIDATE = 300
+# Keep entries this long past their TTL to serve when Revizto errors or a breaker is open
+REVIZTO_CACHE_STALE_IF_ERROR = 86400
+
+# Background PDF report jobs: worker threads per process, how long finished PDFs
+# (stored on the job row) are kept, and after how long without progress a job counts as lost
+REPORT_JOB_WORKERS = int(os.environ.get("REPORT_JOB_WORKERS", "2"))
+REPORT_RETENTION_SECONDS = 7 * 24 * 3600
+REPORT_JOB_STALE_AFTER = 1800
+# Finished PDFs keyed by a fingerprint of their inputs, reused while nothing changes
+REPORT_CACHE_ALIAS = 'revizto'
+REPORT_CACHE_TTL = 24 * 3600
+# Report comments of older issues are fetched for this many recent days first, and
+# in full only for issues whose window lacks what their card shows; they are
+# trimmed to what the card renders (REPORT_COMMENTS_BOUNDED=false fetches everything)
+REPORT_COMMENTS_BOUNDED = os.environ.get("REPORT_COMMENTS_BOUNDED", "true").lower() == "true"
+REPORT_COMMENTS_WINDOW_DAYS = int(os.environ.get("REPORT_COMMENTS_WINDOW_DAYS", "90"))
+# Report image prefetch: concurrent downloads and per-image (connect, read) timeout
+REPORT_IMAGE_PREFETCH_WORKERS = int(os.environ.get("REPORT_IMAGE_PREFETCH_WORKERS", "8"))
+REPORT_IMAGE_TIMEOUT = (5, 15)
+# Report images are downscaled to this print resolution for their slot and
+# re-encoded as JPEG at this quality (PNG when they have an alpha channel)
+REPORT_IMAGE_DPI = int(os.environ.get("REPORT_IMAGE_DPI", "150"))
+REPORT_IMAGE_JPEG_QUALITY = int(os.environ.get("REPORT_IMAGE_JPEG_QUALITY", "80"))
+# Disk cache for downloaded report images, shared by the workers of a dyno
+# (LRU-evicted above the byte cap; an empty or wiped directory only causes misses)
+REVIZTO_IMAGE_CACHE_DIR = os.environ.get("REVIZTO_IMAGE_CACHE_DIR", "/tmp/revizto-image-cache")
+REVIZTO_IMAGE_CACHE_MAX_BYTES = int(os.environ.get("REVIZTO_IMAGE_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# Per-phase timings and counters of report requests, returned as a Server-Timing
+# header and logged as one [TIMING] line per request or job
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "true").lower() == "true"
 
 # Session configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
@@ -0,0 +1,149 @@
+# core/api/async_client.py - asyncio front-end for the Revizto API
+
+"""
+Asynchronous Revizto client with bounded concurrency.
+
+Each call runs ReviztoAPI.get (and therefore the same token snapshot, refresh
+and retry behavior) on a shared, bounded thread pool backed by the pooled
+keep-alive transport, while asyncio coordinates the fan-out. Sync callers use
+run_sync() or ReviztoService.get_many() as a thin bridge.
+"""
+
+import asyncio
+import logging
+import threading
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from .client import ReviztoAPI
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_max_concurrency():
+    """Get the configured process-wide limit of concurrent Revizto calls."""
+    return getattr(settings, 'REVIZTO_ASYNC_MAX_CONCURRENCY', 8)
+
+
+def _get_executor():
+    """Get the shared thread pool that runs blocking API calls."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_max_concurrency(),
+                    thread_name_prefix='revizto-async'
+                )
+    return _executor
+
+
+def _call_in_worker(func, *args, **kwargs):
+    """Run a blocking call in a pool thread and release its DB connection afterwards."""
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+class AsyncReviztoAPI:
+    """
+    asyncio client for the Revizto API with a configurable concurrency limit.
+    """
+
+    def __init__(self, max_concurrency=None):
+        """
+        Args:
+            max_concurrency (int, optional): Maximum number of in-flight calls for
+                this client (default: settings.REVIZTO_ASYNC_MAX_CONCURRENCY)
+        """
+        self.max_concurrency = max_concurrency or get_max_concurrency()
+        self._semaphore = None
+
+    def _get_semaphore(self):
+        # Created lazily so it binds to the loop that actually runs the calls
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking Revizto call under the concurrency limit."""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            # Run in a copy of this task's context so request timings see the call
+            return await loop.run_in_executor(
+                _get_executor(),
+                functools.partial(contextvars.copy_context().run, _call_in_worker, func, *args, **kwargs)
+            )
+
+    async def get(self, endpoint, params=None, max_retries=3, use_cache=True):
+        """
+        Make a GET request to the API (same auth, refresh and retries as ReviztoAPI.get).
+
+        Args:
+            endpoint (str): API endpoint
+            params (dict, optional): Query parameters
+            max_retries (int): Maximum number of attempts
+            use_cache (bool): False always calls Revizto, bypassing the response cache
+
+        Returns:
+            dict: Response data
+        """
+        return await self.run(ReviztoAPI.get, endpoint, params, max_retries, use_cache)
+
+    async def get_many(self, requests, return_exceptions=True, use_cache=True):
+        """
+        Fetch several endpoints concurrently.
+
+        Args:
+            requests (list): Endpoints as strings or (endpoint, params) tuples
+            return_exceptions (bool): Return failures in place instead of raising
+            use_cache (bool): False always calls Revizto, bypassing the response cache
+
+        Returns:
+            list: Responses (or exceptions) in the same order as `requests`
+        """
+        calls = []
+        for item in requests:
+            if isinstance(item, (tuple, list)):
+                endpoint, params = item[0], (item[1] if len(item) > 1 else None)
+            else:
+                endpoint, params = item, None
+            calls.append(self.get(endpoint, params, use_cache=use_cache))
+
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+
+def run_sync(coro):
+    """
+    Drive a coroutine to completion from synchronous code.
+
+    Uses asyncio.run when no loop is running in this thread, otherwise runs the
+    coroutine on a fresh loop in a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def runner():
+        try:
+            result['value'] = asyncio.run(coro)
+        except BaseException as e:
+            result['error'] = e
+
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(runner,), name='revizto-async-bridge')
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
@@ -0,0 +1,240 @@
+# core/api/circuit_breaker.py - Fail fast when Revizto is degraded
+
+"""
+Per-endpoint-family circuit breakers and a global retry budget.
+
+A breaker opens after consecutive failures (timeouts, connection errors, 5xx)
+of one endpoint family, rejects calls to that family with CircuitOpenError for
+reset_timeout seconds, then lets a single probe through (half-open); the probe
+closes or re-opens it. The retry budget caps retries to a fraction of recent
+first attempts so that retries cannot multiply load on a struggling Revizto.
+Both are per worker process.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_CIRCUIT_BREAKER = {
+    'failure_threshold': 5,     # consecutive failures that open the breaker
+    'reset_timeout': 30,        # seconds the breaker stays open before a probe
+    'half_open_max_calls': 1,   # concurrent probe calls while half-open
+}
+
+DEFAULT_RETRY_BUDGET = {
+    'ratio': 0.2,               # retries allowed per first attempt
+    'min_retries': 3,           # retries always allowed per window
+    'window': 10,               # seconds
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its endpoint family's breaker is open."""
+
+    def __init__(self, family, retry_in):
+        self.family = family
+        self.retry_in = retry_in
+        super().__init__(f"Circuit breaker open for '{family}' (retry in {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one endpoint family.
+    """
+
+    def __init__(self, family, failure_threshold, reset_timeout, half_open_max_calls):
+        self.family = family
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+
+        # Monitoring
+        self.total_successes = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+        self.last_failure = None
+        self.last_state_change = None
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Circuit breaker '{self.family}': {self.state} -> {state}")
+            self.state = state
+            self.last_state_change = datetime.now()
+
+    def before_request(self):
+        """
+        Admit or reject a call.
+
+        Raises:
+            CircuitOpenError: If the breaker is open or its half-open probe slots are taken
+        """
+        with self._lock:
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+                if retry_in > 0:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.family, retry_in)
+                self._set_state(HALF_OPEN)
+                self.half_open_calls = 0
+
+            if self.state == HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.total_rejected += 1
+                    raise CircuitOpenError(self.family, 0)
+                self.half_open_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.half_open_calls = max(0, self.half_open_calls - 1)
+                self._set_state(CLOSED)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_failure = str(error) if error else None
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.half_open_calls = 0
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def record_ignored(self):
+        """Release a half-open probe slot for a call whose outcome says nothing about health."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.half_open_calls = max(0, self.half_open_calls - 1)
+
+    def get_status(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.opened_at + self.reset_timeout - time.monotonic()), 1)
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_in_seconds': retry_in,
+                'times_opened': self.times_opened,
+                'total_successes': self.total_successes,
+                'total_failures': self.total_failures,
+                'total_rejected': self.total_rejected,
+                'last_failure': self.last_failure,
+                'last_state_change': self.last_state_change,
+            }
+
+
+class RetryBudget:
+    """
+    Sliding-window budget: retries may not exceed ratio x first attempts (plus a floor).
+    """
+
+    def __init__(self, ratio, min_retries, window):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+        self.total_denied = 0
+
+    def _prune(self, now):
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        """Record a first attempt."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._requests.append(now)
+
+    def try_retry(self):
+        """
+        Withdraw one retry from the budget.
+
+        Returns:
+            bool: True if the retry is allowed
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            allowed = max(self.min_retries, self.ratio * len(self._requests))
+            if len(self._retries) >= allowed:
+                self.total_denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def get_status(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                'window_seconds': self.window,
+                'ratio': self.ratio,
+                'requests_in_window': len(self._requests),
+                'retries_in_window': len(self._retries),
+                'retries_allowed': max(self.min_retries, int(self.ratio * len(self._requests))),
+                'total_denied': self.total_denied,
+            }
+
+
+# Global instances
+_breakers = {}
+_breakers_lock = threading.Lock()
+retry_budget = None
+
+
+def get_breaker(family):
+    """Get the breaker for an endpoint family, creating it on first use."""
+    breaker = _breakers.get(family)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(family)
+            if breaker is None:
+                config = dict(DEFAULT_CIRCUIT_BREAKER)
+                config.update(getattr(settings, 'REVIZTO_CIRCUIT_BREAKER', {}) or {})
+                breaker = CircuitBreaker(family, **config)
+                _breakers[family] = breaker
+    return breaker
+
+
+def get_retry_budget():
+    """Get the process-wide retry budget."""
+    global retry_budget
+    if retry_budget is None:
+        with _breakers_lock:
+            if retry_budget is None:
+                config = dict(DEFAULT_RETRY_BUDGET)
+                config.update(getattr(settings, 'REVIZTO_RETRY_BUDGET', {}) or {})
+                retry_budget = RetryBudget(**config)
+    return retry_budget
+
+
+def get_status():
+    """Get the state of every breaker and of the retry budget."""
+    return {
+        'breakers': {family: breaker.get_status() for family, breaker in sorted(_breakers.items())},
+        'retry_budget': get_retry_budget().get_status(),
+    }
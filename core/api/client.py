@@ -8,6 +8,11 @@ import time
 from django.conf import settings
 from django.utils import timezone
 from . import token_store
+from . import transport
+from . import rate_limiter
+from . import circuit_breaker
+from . import response_cache
+from .. import timing
 
 logger = logging.getLogger(__name__)
 
@@ -55,8 +60,37 @@ class ReviztoAPI:
             return False
 
     @classmethod
-    def refresh_token(cls):
-        """Refresh the access token using the refresh token from PostgreSQL."""
+    def refresh_token(cls, stale_token=None):
+        """
+        Refresh the access token, single-flight across threads and workers.
+
+        Callers wait on a PostgreSQL advisory lock; once they get it, they re-read
+        the token row and reuse a token another worker rotated while they waited
+        instead of refreshing again (which would also burn its refresh token).
+
+        Args:
+            stale_token (str, optional): Access token the caller found expired or
+                rejected. Defaults to the token currently in the snapshot.
+        """
+        if stale_token is None:
+            stale_token = token_store.get_access_token()
+
+        with token_store.refresh_lock() as acquired:
+            token_store.invalidate_snapshot()
+            current_token = token_store.get_access_token()
+            if current_token and current_token != stale_token and not token_store.is_token_expired():
+                print(f"[REVIZTO-API] ✅ Token already refreshed by another worker, reusing it")
+                return True
+
+            if not acquired:
+                print(f"[REVIZTO-API] ❌ Timed out waiting for token refresh lock")
+                return False
+
+            return cls._refresh_token_locked()
+
+    @classmethod
+    def _refresh_token_locked(cls):
+        """Refresh the access token using the refresh token from PostgreSQL (caller holds the refresh lock)."""
         print(f"[REVIZTO-API] Starting token refresh process...")
 
         refresh_token = token_store.get_refresh_token()
@@ -82,7 +116,7 @@ class ReviztoAPI:
                 data['client_secret'] = client_secret
 
             print(f"[REVIZTO-API] Sending refresh request to: {url}")
-            response = requests.post(url, headers=headers, data=data, timeout=30)
+            response = transport.post(url, endpoint="oauth2", headers=headers, data=data)
 
             if response.status_code != 200:
                 print(f"[REVIZTO-API] ❌ Token refresh failed with status {response.status_code}")
@@ -207,11 +241,36 @@ class ReviztoAPI:
         return fallback_uuid
 
     @classmethod
-    def get(cls, endpoint, params=None, max_retries=3):
+    def get(cls, endpoint, params=None, max_retries=3, use_cache=True):
+        """
+        Make a GET request to the API, served from the response cache when possible.
+
+        Args:
+            endpoint (str): API endpoint
+            params (dict, optional): Query parameters
+            max_retries (int): Maximum number of attempts
+            use_cache (bool): False always calls Revizto (and does not store the result)
+        """
+        timing.count('revizto_requests')
+        return response_cache.get_or_fetch(
+            endpoint,
+            params,
+            lambda: cls._fetch(endpoint, params, max_retries),
+            use_cache=use_cache
+        )
+
+    @classmethod
+    def _fetch(cls, endpoint, params=None, max_retries=3):
         """Make a GET request to the API with improved error handling."""
         last_exception = None
+        circuit_breaker.get_retry_budget().record_request()
 
         for attempt in range(max_retries):
+            # Every attempt after the first withdraws from the shared retry budget
+            if attempt > 0 and not circuit_breaker.get_retry_budget().try_retry():
+                print(f"[REVIZTO-API] ❌ Retry budget exhausted, not retrying {endpoint}")
+                break
+
             try:
                 print(f"[REVIZTO-API] Making API request (attempt {attempt + 1}/{max_retries})")
 
@@ -222,32 +281,59 @@ class ReviztoAPI:
                 url = f"{cls.BASE_URL}{endpoint}"
                 print(f"[REVIZTO-API] Request URL: {url}")
 
-                response = requests.get(
-                    url,
-                    headers=cls.get_headers(),
-                    params=params,
-                    timeout=60  # 60 second timeout
-                )
+                headers = cls.get_headers()
+                request_token = headers["Authorization"][len("Bearer "):]
+                with timing.phase('revizto'):
+                    response = transport.get(
+                        url,
+                        endpoint=endpoint,
+                        headers=headers,
+                        params=params
+                    )
+                timing.count('revizto_calls')
+                timing.count('revizto_bytes', len(response.content))
 
                 # Handle token expiry responses
                 if response.status_code in (401, 403):
                     print(f"[REVIZTO-API] ⚠️ Received {response.status_code}, token may be expired")
-                    if cls.refresh_token():
+                    # Pass the rejected token so a token rotated meanwhile by another worker is reused
+                    if cls.refresh_token(stale_token=request_token):
                         print(f"[REVIZTO-API] 🔄 Token refreshed, retrying request")
                         # Retry with new token
-                        response = requests.get(
-                            url,
-                            headers=cls.get_headers(),
-                            params=params,
-                            timeout=60
-                        )
+                        with timing.phase('revizto'):
+                            response = transport.get(
+                                url,
+                                endpoint=endpoint,
+                                headers=cls.get_headers(),
+                                params=params
+                            )
+                        timing.count('revizto_calls')
+                        timing.count('revizto_bytes', len(response.content))
                     else:
                         raise Exception("Token refresh failed after 401/403")
 
+                # Rate limited: the shared limiter has already lowered its rate and holds
+                # the next attempt until Retry-After has elapsed, so no extra sleep here
+                if response.status_code == 429:
+                    last_exception = Exception(f"Rate limited by Revizto (429) on {endpoint}")
+                    print(f"[REVIZTO-API] ⚠️ Rate limited (429) on attempt {attempt + 1}, "
+                          f"retry after {rate_limiter.get_limiter().retry_after_seconds():.1f}s")
+                    continue
+
                 response.raise_for_status()
                 print(f"[REVIZTO-API] ✅ API request successful (status: {response.status_code})")
                 return response.json()
 
+            except circuit_breaker.CircuitOpenError as e:
+                # Fail fast: retrying against an open breaker only adds load
+                print(f"[REVIZTO-API] ⛔ {e}")
+                raise
+
+            except rate_limiter.RateLimitTimeout as e:
+                # Already waited max_wait for a slot: retrying would stack more waits on top
+                print(f"[REVIZTO-API] ⛔ {e}")
+                raise
+
             except requests.exceptions.Timeout as e:
                 last_exception = e
                 print(f"[REVIZTO-API] ⚠️ Request timeout on attempt {attempt + 1}: {e}")
@@ -303,10 +389,10 @@ class ReviztoAPI:
             licence_uuid = cls.get_licence_uuid()
             if licence_uuid:
                 print(f"[REVIZTO-API] Testing with license UUID: {licence_uuid}")
-                response = requests.get(
+                response = transport.get(
                     f"{cls.BASE_URL}licences",
-                    headers=cls.get_headers(),
-                    timeout=30
+                    endpoint="licences",
+                    headers=cls.get_headers()
                 )
 
                 success = response.status_code in (200, 404)  # 404 is also OK for testing
@@ -0,0 +1,189 @@
+# core/api/comment_store.py - Local comment history with incremental sync
+
+"""
+Locally stored comment history of issues, kept up to date incrementally.
+
+Each issue (by UUID) has an entry in a Django cache backend
+(settings.REVIZTO_COMMENT_STORE_ALIAS): its comments, the date the history
+starts from and a high-water mark, the newest 'created' seen. Instead of the
+whole history since 2018, plan() asks issue/{uuid}/comments/date only for
+comments since the day of the high-water mark; merge() adds them to the
+stored history (the boundary day is fetched again and deduplicated).
+
+Only new comments are seen that way, so an entry older than
+REVIZTO_COMMENT_FULL_RESYNC_SECONDS is fetched in full again and replaced,
+which picks up edited and deleted comments. An entry lost to cache eviction
+only costs a full fetch.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from ..image_cache import stable_url_key
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'revizto-comments:v1'
+
+_lock = threading.Lock()
+_stats = {
+    'incremental': 0,
+    'full': 0,
+    'resyncs': 0,
+    'new_comments': 0,
+    'errors': 0,
+}
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def _get_cache():
+    return caches[getattr(settings, 'REVIZTO_COMMENT_STORE_ALIAS', getattr(settings, 'REVIZTO_CACHE_ALIAS', 'default'))]
+
+
+def _key(issue_uuid):
+    return f"{KEY_PREFIX}:{issue_uuid}"
+
+
+def enabled():
+    return getattr(settings, 'REVIZTO_COMMENT_SYNC_ENABLED', True)
+
+
+def comment_key(comment):
+    """
+    Identify a comment: its uuid/id when it has one, else a digest of its stable fields.
+
+    Preview URLs are signed and re-signed on every fetch, so they only count
+    through image_cache.stable_url_key and the rest of the payload is left out.
+    """
+    if isinstance(comment, dict):
+        for field in ('uuid', 'id'):
+            if comment.get(field):
+                return f"{field}:{comment[field]}"
+
+        author = comment.get('author')
+        if isinstance(author, dict):
+            author = author.get('email') or [author.get('firstname'), author.get('lastname')]
+        preview = comment.get('preview')
+        if isinstance(preview, dict):
+            preview = {size: stable_url_key(url) for size, url in preview.items() if isinstance(url, str)}
+        elif isinstance(preview, str):
+            preview = stable_url_key(preview)
+        content = {field: comment.get(field) for field in ('type', 'created', 'text', 'filename', 'mimetype', 'diff')}
+        content.update(author=author, preview=preview)
+    else:
+        content = comment
+    normalized = json.dumps(content, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def _high_water(comments):
+    created = [comment.get('created') for comment in comments if isinstance(comment, dict) and comment.get('created')]
+    return max(created) if created else None
+
+
+def load(issue_uuid):
+    try:
+        return _get_cache().get(_key(issue_uuid))
+    except Exception as e:
+        logger.warning(f"Could not read stored comments of {issue_uuid}: {e}")
+        _count('errors')
+        return None
+
+
+def _save(issue_uuid, entry):
+    try:
+        _get_cache().set(_key(issue_uuid), entry, timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not store comments of {issue_uuid}: {e}")
+        _count('errors')
+
+
+def plan(issue_uuid, date):
+    """
+    Decide what to request for an issue's comments since a date.
+
+    Args:
+        issue_uuid (str): Issue UUID
+        date (str): Start of the history the caller wants (YYYY-MM-DD)
+
+    Returns:
+        tuple: (date to request, stored entry to merge into or None for a full fetch)
+    """
+    if not enabled():
+        return date, None
+
+    entry = load(issue_uuid)
+    if entry is None or entry['since'] > date:
+        return date, None
+
+    resync_after = getattr(settings, 'REVIZTO_COMMENT_FULL_RESYNC_SECONDS', 24 * 3600)
+    if time.time() - entry['full_synced_at'] > resync_after:
+        _count('resyncs')
+        return entry['since'], None
+
+    # The date filter has day granularity: the boundary day is fetched again
+    if entry['high_water']:
+        return max(entry['high_water'][:10], entry['since']), entry
+    return entry['since'], entry
+
+
+def merge(issue_uuid, requested_date, entry, comments):
+    """
+    Merge fetched comments into the stored history and store it.
+
+    Args:
+        issue_uuid (str): Issue UUID
+        requested_date (str): Date the comments were requested from (see plan)
+        entry (dict): Stored entry returned by plan, or None after a full fetch
+        comments (list): Comments returned by Revizto
+
+    Returns:
+        list: The issue's comments since the start of the stored history
+    """
+    if not enabled():
+        return comments
+
+    now = time.time()
+    if entry is None:
+        _count('full')
+        entry = {'since': requested_date, 'comments': list(comments), 'full_synced_at': now}
+    else:
+        _count('incremental')
+        # Keyed again on every merge, which also drops duplicates stored under an older key
+        merged = {}
+        for comment in entry['comments']:
+            merged.setdefault(comment_key(comment), comment)
+        new = [comment for comment in comments if comment_key(comment) not in merged]
+        if new:
+            _count('new_comments', len(new))
+        entry = dict(entry, comments=list(merged.values()) + new)
+
+    entry['high_water'] = _high_water(entry['comments'])
+    entry['synced_at'] = now
+    _save(issue_uuid, entry)
+    return entry['comments']
+
+
+def since(comments, date):
+    """Keep the comments created on or after a date (YYYY-MM-DD), like the date endpoint does."""
+    return [comment for comment in comments
+            if not isinstance(comment, dict) or not comment.get('created') or comment['created'][:10] >= date]
+
+
+def get_status():
+    """Get sync counters and settings."""
+    with _lock:
+        stats = dict(_stats)
+    stats['enabled'] = enabled()
+    stats['full_resync_seconds'] = getattr(settings, 'REVIZTO_COMMENT_FULL_RESYNC_SECONDS', 24 * 3600)
+    stats['store_alias'] = getattr(settings, 'REVIZTO_COMMENT_STORE_ALIAS',
+                                   getattr(settings, 'REVIZTO_CACHE_ALIAS', 'default'))
+    return stats
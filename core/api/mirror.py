@@ -0,0 +1,491 @@
+# core/api/mirror.py - Local PostgreSQL mirror of Revizto data
+
+"""
+Mirror of Revizto projects, report issues and their comments in the
+'postgres' database (MirrorProject, MirrorIssue, MirrorComment).
+
+sync_projects() and sync_project() fill it; they run from
+`manage.py sync_revizto`, on a schedule, and are incremental:
+
+- Issue rows are only rewritten when their 'updated' time changed, and rows
+  of issues that left the report stamps are removed.
+- Comments are requested from the day of the newest mirrored comment of
+  each issue, and the fetched ones replace that day's rows. The comments of
+  a project are fetched in full again after
+  REVIZTO_MIRROR_FULL_RESYNC_SECONDS, or with --full, which also drops edited
+  and deleted ones.
+
+The sync calls Revizto with use_cache=False: a response cache entry (or a
+stale one served while Revizto fails) would otherwise be written to the
+mirror and stamped as synced now.
+
+ReviztoService reads from the mirror (projects(), report_issues(),
+comments()) while the matching part of the project was synced less than
+REVIZTO_MIRROR_MAX_AGE seconds ago. Otherwise, or on any database error, these
+return None and the caller goes to Revizto as before.
+"""
+
+import logging
+import threading
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import comment_store
+
+logger = logging.getLogger(__name__)
+
+# Start of the comment history kept in the mirror
+COMMENTS_SINCE_DATE = '2018-05-30'
+
+DB_ALIAS = 'postgres'
+
+_lock = threading.Lock()
+_tables_ready = False
+_stats = {
+    'reads_served': 0,
+    'reads_stale': 0,
+    'read_errors': 0,
+    'projects_synced': 0,
+    'sync_failures': 0,
+}
+
+
+class MirrorSyncError(Exception):
+    """Raised when Revizto did not return the data a sync needs (nothing is changed)."""
+    pass
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def ensure_tables():
+    """Create the mirror tables if they do not exist yet."""
+    global _tables_ready
+    if not _tables_ready:
+        with _lock:
+            if not _tables_ready:
+                from core.models import MirrorProject, MirrorIssue, MirrorComment
+                for model in (MirrorProject, MirrorIssue, MirrorComment):
+                    model.ensure_table()
+                _tables_ready = True
+                print(f"[MIRROR] Mirror tables ready in PostgreSQL")
+
+
+def reads_enabled():
+    return getattr(settings, 'REVIZTO_MIRROR_READS', True)
+
+
+def _parse_time(value):
+    """Parse a Revizto timestamp, plain or wrapped as {'value': ...}, to an aware datetime (or None)."""
+    if isinstance(value, dict):
+        value = value.get('value')
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = parse_datetime(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _issue_status(issue):
+    """Status UUID or name of an issue (customStatus first, like is_closed_issue)."""
+    for field in ('customStatus', 'status'):
+        value = issue.get(field)
+        if isinstance(value, dict):
+            value = value.get('value')
+        if isinstance(value, str) and value:
+            return value[:64]
+    return None
+
+
+def _issue_sheet(issue):
+    value = issue.get('sheet')
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('title') or value.get('value')
+    return str(value)[:255] if value not in (None, '') else None
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.combine(datetime.strptime(date, '%Y-%m-%d').date(), dt_time.min),
+                               dt_timezone.utc)
+
+
+def _fresh_since():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'REVIZTO_MIRROR_MAX_AGE', 900))
+
+
+# ===== Sync =====
+
+def sync_projects():
+    """
+    Mirror the licence's project list (projects no longer listed are removed).
+
+    Returns:
+        list: Mirrored project IDs
+
+    Raises:
+        MirrorSyncError: If Revizto returned no projects
+    """
+    from core.models import MirrorProject
+    from .service import ReviztoService
+
+    ensure_tables()
+    entities = [project.raw_data for project in ReviztoService.get_projects(use_mirror=False, use_cache=False)]
+    entities = [entity for entity in entities if entity.get('id')]
+    if not entities:
+        raise MirrorSyncError("Revizto returned no projects")
+
+    now = timezone.now()
+    rows = [
+        MirrorProject(
+            id=entity['id'],
+            uuid=entity.get('uuid'),
+            title=(entity.get('title') or entity.get('name') or '')[:500],
+            updated=_parse_time(entity.get('updated')),
+            payload=entity,
+            synced_at=now,
+        )
+        for entity in entities
+    ]
+    with transaction.atomic(using=DB_ALIAS):
+        MirrorProject.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['id'],
+            update_fields=['uuid', 'title', 'updated', 'payload', 'synced_at']
+        )
+        removed, _ = MirrorProject.objects.exclude(id__in=[row.id for row in rows]).delete()
+    print(f"[MIRROR] Mirrored {len(rows)} projects ({removed} removed)")
+    return [row.id for row in rows]
+
+
+def _merge_orders(orders):
+    """Merge the issue orders of the sections into one that keeps each section's order."""
+    merged = []
+    for order in orders:
+        after = 0
+        for issue_uuid in order:
+            if issue_uuid in merged:
+                after = merged.index(issue_uuid) + 1
+            else:
+                merged.insert(after, issue_uuid)
+                after += 1
+    return merged
+
+
+def _sync_issues(project_id, full, now):
+    """Mirror the report issues of a project, returning {issue ID (str): UUID} and counts."""
+    from core.models import MirrorIssue, MirrorComment
+    from .service import ReviztoService
+
+    sections = ReviztoService.get_report_issues(project_id, use_mirror=False, use_cache=False)
+    failed = [section for section, response in sections.items()
+              if not response or response.get('result') != 0]
+    if failed:
+        raise MirrorSyncError(f"Could not fetch {', '.join(failed)} of project {project_id}")
+
+    # One row per issue; the stamps come from the sections it is listed in
+    found = {}
+    section_orders = []
+    for section, response in sections.items():
+        stamp = ReviztoService.REPORT_STAMPS[section]
+        section_order = []
+        for issue in (response.get('data') or {}).get('data') or []:
+            if not issue.get('uuid') or not issue.get('id'):
+                continue
+            found.setdefault(issue['uuid'], (issue, set()))[1].add(stamp)
+            section_order.append(issue['uuid'])
+        section_orders.append(section_order)
+    issues = {issue_uuid: found[issue_uuid] for issue_uuid in _merge_orders(section_orders)}
+
+    existing = {issue_uuid: (updated, position, stamps) for issue_uuid, updated, position, stamps in
+                MirrorIssue.objects.filter(project_id=project_id).values_list('uuid', 'updated', 'position', 'stamps')}
+    rows = []
+    for position, (issue_uuid, (issue, stamps)) in enumerate(issues.items()):
+        updated = _parse_time(issue.get('updated'))
+        stamps = sorted(stamps)
+        # Unchanged issues keep their row
+        if not full and updated is not None and existing.get(issue_uuid) == (updated, position, stamps):
+            continue
+        rows.append(MirrorIssue(
+            uuid=issue_uuid,
+            project_id=project_id,
+            issue_id=issue['id'],
+            position=position,
+            status=_issue_status(issue),
+            stamps=stamps,
+            sheet=_issue_sheet(issue),
+            created=_parse_time(issue.get('created')),
+            updated=updated,
+            payload=issue,
+            synced_at=now,
+        ))
+
+    removed = [issue_uuid for issue_uuid in existing if issue_uuid not in issues]
+    with transaction.atomic(using=DB_ALIAS):
+        MirrorIssue.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['uuid'],
+            update_fields=['project_id', 'issue_id', 'position', 'status', 'stamps', 'sheet',
+                           'created', 'updated', 'payload', 'synced_at']
+        )
+        if removed:
+            # Issues that left the report stamps, with their comments
+            MirrorIssue.objects.filter(uuid__in=removed).delete()
+            MirrorComment.objects.filter(issue_uuid__in=removed).delete()
+
+    issue_uuids = {str(issue['id']): issue_uuid for issue_uuid, (issue, stamps) in issues.items()}
+    return issue_uuids, len(rows), len(removed)
+
+
+def _comment_row(issue_uuid, comment):
+    from core.models import MirrorComment
+    return MirrorComment(
+        issue_uuid=issue_uuid,
+        comment_key=comment_store.comment_key(comment)[:128],
+        type=(comment.get('type') or '')[:32] or None,
+        created=_parse_time(comment.get('created')),
+        payload=comment,
+    )
+
+
+def _sync_comments(project_id, issue_uuids, full):
+    """Mirror the comments of a project's issues, returning (new comments, issues that failed)."""
+    from core.models import MirrorComment
+    from .service import ReviztoService
+
+    uuids = list(issue_uuids.values())
+    high_water = {} if full else dict(
+        MirrorComment.objects.filter(issue_uuid__in=uuids, created__isnull=False)
+        .values('issue_uuid').annotate(newest=Max('created')).values_list('issue_uuid', 'newest')
+    )
+    dates = {issue_uuid: high_water[issue_uuid].date().isoformat() if issue_uuid in high_water
+             else COMMENTS_SINCE_DATE for issue_uuid in uuids}
+
+    requests = [(f"issue/{issue_uuid}/comments/date", {"date": dates[issue_uuid], "projectId": project_id})
+                for issue_uuid in uuids]
+    responses = ReviztoService.get_many(requests, use_cache=False) if requests else []
+
+    fetched = {}
+    failed = []
+    for issue_uuid, response in zip(uuids, responses):
+        if isinstance(response, Exception):
+            failed.append(issue_uuid)
+            continue
+        response = ReviztoService._normalize_comments_response(response)
+        if response.get('result') != 0:
+            failed.append(issue_uuid)
+            continue
+        fetched[issue_uuid] = [comment for comment in response['data'] if isinstance(comment, dict)]
+
+    # Keys already mirrored on the boundary days, to count what is new
+    known = set()
+    incremental = [issue_uuid for issue_uuid in fetched if issue_uuid in high_water]
+    if incremental:
+        earliest = min(_day_start(dates[issue_uuid]) for issue_uuid in incremental)
+        known = set(MirrorComment.objects.filter(issue_uuid__in=incremental, created__gte=earliest)
+                    .values_list('issue_uuid', 'comment_key'))
+
+    rows = [_comment_row(issue_uuid, comment) for issue_uuid, comments in fetched.items() for comment in comments]
+    new = sum(1 for row in rows if (row.issue_uuid, row.comment_key) not in known)
+
+    # The refetched boundary days replace their rows, dropping any stored under an older comment_key
+    refetched = Q()
+    for day in {dates[issue_uuid] for issue_uuid in incremental}:
+        refetched |= Q(issue_uuid__in=[issue_uuid for issue_uuid in incremental if dates[issue_uuid] == day],
+                       created__gte=_day_start(day))
+
+    with transaction.atomic(using=DB_ALIAS):
+        if full:
+            MirrorComment.objects.filter(issue_uuid__in=list(fetched)).delete()
+        elif incremental:
+            MirrorComment.objects.filter(refetched).delete()
+        MirrorComment.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+
+    return new, failed
+
+
+def sync_project(project_id, full=False, comments=True):
+    """
+    Mirror a project's report issues and their comments.
+
+    Args:
+        project_id (int): Project ID
+        full (bool): Rewrite every issue and refetch every comment
+        comments (bool): False only mirrors the issues
+
+    Returns:
+        dict: What changed (issues, issues_changed, issues_removed, comments_new, comment_failures, full)
+
+    Raises:
+        MirrorSyncError: If Revizto did not return the project's issues
+    """
+    from core.models import MirrorProject
+
+    ensure_tables()
+    started = timezone.now()
+    project, _ = MirrorProject.objects.get_or_create(id=project_id)
+
+    try:
+        issue_uuids, changed, removed = _sync_issues(project_id, full, started)
+    except MirrorSyncError:
+        _count('sync_failures')
+        raise
+    project.issues_synced_at = started
+    update_fields = ['issues_synced_at']
+
+    result = {
+        'issues': len(issue_uuids),
+        'issues_changed': changed,
+        'issues_removed': removed,
+        'comments_new': 0,
+        'comment_failures': 0,
+        'full': False,
+    }
+
+    if comments:
+        resync_after = getattr(settings, 'REVIZTO_MIRROR_FULL_RESYNC_SECONDS', 24 * 3600)
+        full_comments = full or not project.comments_full_synced_at or \
+            project.comments_full_synced_at < started - timedelta(seconds=resync_after)
+        new, failed = _sync_comments(project_id, issue_uuids, full_comments)
+
+        result.update(comments_new=new, comment_failures=len(failed), full=full_comments)
+        # A project only counts as synced when every issue's comments were
+        if not failed:
+            project.comments_synced_at = started
+            update_fields.append('comments_synced_at')
+            if full_comments:
+                project.comments_full_synced_at = started
+                update_fields.append('comments_full_synced_at')
+
+    project.save(update_fields=update_fields)
+    _count('projects_synced')
+    print(f"[MIRROR] Project {project_id}: {result}")
+    return result
+
+
+# ===== Reads =====
+
+def _fresh_project(project_id, synced_field):
+    """Get the mirrored project if the given part of it is fresh enough to read, else None."""
+    from core.models import MirrorProject
+
+    project = MirrorProject.objects.filter(id=project_id).first()
+    synced_at = getattr(project, synced_field, None) if project else None
+    if synced_at is None or synced_at < _fresh_since():
+        _count('reads_stale')
+        return None
+    return project
+
+
+def projects():
+    """
+    Get the mirrored project list if it was synced recently enough.
+
+    Returns:
+        list: Project payloads by title, or None to fetch from Revizto
+    """
+    if not reads_enabled():
+        return None
+    from core.models import MirrorProject
+
+    try:
+        newest = MirrorProject.objects.aggregate(newest=Max('synced_at'))['newest']
+        if newest is None or newest < _fresh_since():
+            _count('reads_stale')
+            return None
+        payloads = list(MirrorProject.objects.filter(synced_at=newest).order_by('title', 'id')
+                        .values_list('payload', flat=True))
+    except Exception as e:
+        _count('read_errors')
+        logger.warning(f"Could not read mirrored projects: {e}")
+        return None
+
+    _count('reads_served')
+    return payloads
+
+
+def report_issues(project_id):
+    """
+    Get a project's report sections from the mirror, in the shape of ReviztoService.get_report_issues.
+
+    Returns:
+        dict: Section name -> {"result": 0, "data": {"data": [...]}}, or None to fetch from Revizto
+    """
+    if not reads_enabled():
+        return None
+    from core.models import MirrorIssue
+    from .service import ReviztoService
+
+    try:
+        if _fresh_project(project_id, 'issues_synced_at') is None:
+            return None
+        rows = list(MirrorIssue.objects.filter(project_id=project_id).order_by('position')
+                    .values_list('payload', 'stamps'))
+    except Exception as e:
+        _count('read_errors')
+        logger.warning(f"Could not read mirrored issues of project {project_id}: {e}")
+        return None
+
+    _count('reads_served')
+    return {
+        section: {"result": 0, "data": {"data": [payload for payload, stamps in rows if stamp in stamps]}}
+        for section, stamp in ReviztoService.REPORT_STAMPS.items()
+    }
+
+
+def comments(project_id, issue_ids, date):
+    """
+    Get issues' comments since a date from the mirror.
+
+    Args:
+        project_id (int): Project ID
+        issue_ids (list): Issue IDs (str)
+        date (str): Comments created on or after this day (YYYY-MM-DD)
+
+    Returns:
+        dict: Issue ID (str) -> comments oldest first, or None to fetch from Revizto
+            (also when one of the issues is not mirrored)
+    """
+    if not reads_enabled() or date < COMMENTS_SINCE_DATE:
+        return None
+    from core.models import MirrorIssue, MirrorComment
+
+    try:
+        if _fresh_project(project_id, 'comments_synced_at') is None:
+            return None
+        uuids = {str(issue_id): issue_uuid for issue_id, issue_uuid in
+                 MirrorIssue.objects.filter(project_id=project_id, issue_id__in=[int(i) for i in issue_ids])
+                 .values_list('issue_id', 'uuid')}
+        if len(uuids) < len(set(issue_ids)):
+            _count('reads_stale')
+            return None
+
+        by_uuid = {issue_uuid: [] for issue_uuid in uuids.values()}
+        rows = MirrorComment.objects.filter(Q(created__gte=_day_start(date)) | Q(created__isnull=True),
+                                            issue_uuid__in=list(by_uuid)) \
+            .order_by('created', 'id').values_list('issue_uuid', 'payload')
+        for issue_uuid, payload in rows:
+            by_uuid[issue_uuid].append(payload)
+    except Exception as e:
+        _count('read_errors')
+        logger.warning(f"Could not read mirrored comments of project {project_id}: {e}")
+        return None
+
+    _count('reads_served')
+    return {issue_id: by_uuid[issue_uuid] for issue_id, issue_uuid in uuids.items()}
+
+
+def get_status():
+    """Get read/sync counters and the freshness policy."""
+    with _lock:
+        stats = dict(_stats)
+    stats['reads_enabled'] = reads_enabled()
+    stats['max_age_seconds'] = getattr(settings, 'REVIZTO_MIRROR_MAX_AGE', 900)
+    stats['full_resync_seconds'] = getattr(settings, 'REVIZTO_MIRROR_FULL_RESYNC_SECONDS', 24 * 3600)
+    return stats
@@ -0,0 +1,286 @@
+# core/api/project_catalog.py - Cached licence project list with a search index
+
+"""
+In-memory catalog of the licence's projects for the search box and home page.
+
+The project list (ReviztoService.get_projects: mirror, response cache or
+Revizto) is loaded once per process and indexed:
+
+- names are normalized: accents folded, case folded, punctuation dropped
+  ("École Saint-Jérôme" -> "ecole saint jerome");
+- a sorted token list answers prefix lookups (bisect);
+- a trigram index narrows substring lookups and finds near misses.
+
+search() ranks exact names first, then names starting with the query, all
+query words as word prefixes, then substrings. Only when nothing matches
+that way, it falls back to near misses by trigram similarity (typos). It
+pages the results with limit/offset.
+
+Past PROJECT_CATALOG_REFRESH_SECONDS, the current catalog keeps being
+served while a background thread rebuilds it. A failed or empty refresh keeps
+the previous catalog.
+"""
+
+import re
+import time
+import bisect
+import logging
+import threading
+import unicodedata
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Trigram similarity (shared / query word trigrams) each query word needs in a near miss
+MIN_TRIGRAM_SIMILARITY = 0.5
+
+_lock = threading.Lock()
+_catalog = None
+_refreshing = False
+_stats = {
+    'builds': 0,
+    'background_refreshes': 0,
+    'refresh_failures': 0,
+    'searches': 0,
+}
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def fold(text):
+    """Normalize text for matching: accents and case folded, punctuation as spaces."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', stripped.casefold()).strip()
+
+
+def trigrams(text):
+    """Trigrams of a string (spaces included)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def word_similarity(query_word, word):
+    """Share of the query word's trigrams (padded, so word starts count) found in a word."""
+    query_grams = trigrams(f"  {query_word} ")
+    return len(query_grams & trigrams(f"  {word} ")) / len(query_grams)
+
+
+class ProjectCatalog:
+    """Projects and their search index, immutable once built."""
+
+    def __init__(self, projects):
+        self.projects = list(projects)
+        self.built_at = time.monotonic()
+        self.names = [fold(project.name) for project in self.projects]
+        self.words = [name.split() for name in self.names]
+
+        postings = {}
+        self.trigram_postings = {}
+        for index, (name, words) in enumerate(zip(self.names, self.words)):
+            for word in words:
+                postings.setdefault(word, set()).add(index)
+            for gram in trigrams(name):
+                self.trigram_postings.setdefault(gram, set()).add(index)
+        self.tokens = sorted(postings)
+        self.token_postings = postings
+
+    def age(self):
+        return time.monotonic() - self.built_at
+
+    def _prefix_matches(self, prefix):
+        """Projects with a word starting with prefix."""
+        matches = set()
+        start = bisect.bisect_left(self.tokens, prefix)
+        for token in self.tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self.token_postings[token]
+        return matches
+
+    def _substring_matches(self, query):
+        """Projects whose name contains the query."""
+        if len(query) < 3:
+            # Too short for trigrams: scan the (small) name list
+            return {index for index, name in enumerate(self.names) if query in name}
+        candidates = None
+        for gram in trigrams(query):
+            postings = self.trigram_postings.get(gram, set())
+            candidates = postings if candidates is None else candidates & postings
+            if not candidates:
+                return set()
+        return {index for index in candidates if query in self.names[index]}
+
+    def _rank(self, index, query, query_words):
+        """Sort key of a precise match (lower is better)."""
+        name = self.names[index]
+        if name == query:
+            return (0, 0, name)
+        if name.startswith(query):
+            return (1, 0, name)
+
+        words = self.words[index]
+        positions = [next((i for i, word in enumerate(words) if word.startswith(query_word)), None)
+                     for query_word in query_words]
+        if None not in positions:
+            return (2, sum(positions), name)
+        return (3, name.find(query), name)
+
+    def _fuzzy_rank(self, index, query_words):
+        """Sort key of a near miss: every query word close to a word of the name, or None."""
+        words = self.words[index]
+        total = 0.0
+        for query_word in query_words:
+            if len(query_word) < 3:
+                similarity = 1.0 if any(word.startswith(query_word) for word in words) else 0.0
+            else:
+                similarity = max(word_similarity(query_word, word) for word in words) if words else 0.0
+            if similarity < MIN_TRIGRAM_SIMILARITY:
+                return None
+            total += similarity
+        return (4, -total / len(query_words), self.names[index])
+
+    def search(self, query, limit=None, offset=0):
+        """
+        Find projects by name.
+
+        Near misses (typos) are only returned when nothing matches precisely.
+
+        Args:
+            query (str): Search text (accents, case and punctuation are ignored)
+            limit (int, optional): Page size (None for every match)
+            offset (int): Matches to skip
+
+        Returns:
+            tuple: (list of Project, total number of matches)
+        """
+        query = fold(query)
+        if not query:
+            matches = sorted(range(len(self.projects)), key=lambda index: self.names[index])
+        else:
+            query_words = query.split()
+
+            # Every query word as a word prefix, or the query as a substring
+            candidates = self._prefix_matches(query_words[0])
+            for query_word in query_words[1:]:
+                candidates &= self._prefix_matches(query_word)
+            candidates |= self._substring_matches(query)
+            ranked = [(self._rank(index, query, query_words), index) for index in candidates]
+
+            if not ranked:
+                fuzzy = set()
+                for query_word in query_words:
+                    for gram in trigrams(query_word):
+                        fuzzy |= self.trigram_postings.get(gram, set())
+                ranked = [(rank, index) for rank, index in
+                          ((self._fuzzy_rank(index, query_words), index) for index in fuzzy) if rank is not None]
+
+            ranked.sort()
+            matches = [index for rank, index in ranked]
+
+        total = len(matches)
+        end = None if limit is None else offset + limit
+        return [self.projects[index] for index in matches[offset:end]], total
+
+
+def _build():
+    from .service import ReviztoService
+
+    start = time.monotonic()
+    projects = ReviztoService.get_projects()
+    if not projects:
+        raise ValueError("No projects returned")
+    catalog = ProjectCatalog(projects)
+    print(f"[PROJECT-CATALOG] Indexed {len(catalog.projects)} projects ({len(catalog.tokens)} words, "
+          f"{len(catalog.trigram_postings)} trigrams) in {time.monotonic() - start:.2f}s")
+    return catalog
+
+
+def _refresh_in_background():
+    global _refreshing
+
+    with _lock:
+        if _refreshing:
+            return
+        _refreshing = True
+
+    def refresh():
+        global _catalog, _refreshing
+        try:
+            catalog = _build()
+            with _lock:
+                _catalog = catalog
+            _count('background_refreshes')
+        except Exception as e:
+            _count('refresh_failures')
+            logger.warning(f"Project catalog refresh failed, keeping the current one: {e}")
+        finally:
+            with _lock:
+                _refreshing = False
+            close_old_connections()
+
+    threading.Thread(target=refresh, name='project-catalog', daemon=True).start()
+
+
+def get_catalog():
+    """
+    Get the project catalog, building it on first use and refreshing it in the background when old.
+
+    Returns:
+        ProjectCatalog: The catalog, or None if there is none yet and it could not be built
+    """
+    global _catalog
+
+    catalog = _catalog
+    if catalog is None:
+        with _lock:
+            catalog = _catalog
+            if catalog is None:
+                try:
+                    catalog = _catalog = _build()
+                    _stats['builds'] += 1
+                except Exception as e:
+                    logger.warning(f"Could not build the project catalog: {e}")
+                    return None
+        return catalog
+
+    if catalog.age() > getattr(settings, 'PROJECT_CATALOG_REFRESH_SECONDS', 300):
+        _refresh_in_background()
+    return catalog
+
+
+def get_projects():
+    """Get every project of the catalog (empty if it could not be built)."""
+    catalog = get_catalog()
+    return catalog.projects if catalog else []
+
+
+def search(query, limit=None, offset=0):
+    """
+    Search the catalog, see ProjectCatalog.search.
+
+    Returns:
+        tuple: (list of Project, total number of matches)
+    """
+    _count('searches')
+    catalog = get_catalog()
+    if catalog is None:
+        return [], 0
+    return catalog.search(query, limit=limit, offset=offset)
+
+
+def get_status():
+    """Get catalog size, age and counters."""
+    catalog = _catalog
+    with _lock:
+        stats = dict(_stats)
+        stats['refreshing'] = _refreshing
+    stats['projects'] = len(catalog.projects) if catalog else None
+    stats['age_seconds'] = round(catalog.age(), 1) if catalog else None
+    stats['refresh_seconds'] = getattr(settings, 'PROJECT_CATALOG_REFRESH_SECONDS', 300)
+    return stats
@@ -0,0 +1,266 @@
+# core/api/rate_limiter.py - Adaptive rate limiting for outbound Revizto calls
+
+"""
+Shared token-bucket rate limiter with AIMD concurrency control.
+
+Every Revizto API call made through core.api.transport takes a token from the
+bucket and a concurrency slot before it is sent. Successful responses grow the
+concurrency limit and rate additively; 429 responses cut both multiplicatively.
+Retry-After and X-RateLimit-* / RateLimit-* headers pause all callers until
+Revizto is ready again. The limiter is per worker process.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMIT = {
+    'rate': 10.0,               # requests per second refilled into the bucket
+    'burst': 20,                # bucket capacity
+    'initial_concurrency': 8,   # starting AIMD concurrency limit
+    'min_concurrency': 1,
+    'max_concurrency': 16,
+    'min_rate': 0.5,
+    'decrease_factor': 0.5,     # multiplicative decrease on 429
+    'max_wait': 60,             # longest a caller waits for a slot, in seconds
+    'default_retry_after': 2,   # pause after a 429 without Retry-After, in seconds
+}
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a caller waited longer than max_wait for a rate limiter slot."""
+    pass
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta seconds or HTTP date) into seconds.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - timezone.now()).total_seconds())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _header_number(headers, *names):
+    """Get the first numeric header value among several possible names."""
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(str(value).split(',')[0].strip())
+        except ValueError:
+            continue
+    return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket plus AIMD concurrency limit, shared by all threads of a worker.
+    """
+
+    def __init__(self, rate, burst, initial_concurrency, min_concurrency, max_concurrency,
+                 min_rate, decrease_factor, max_wait, default_retry_after):
+        self._cond = threading.Condition()
+
+        # Token bucket
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self._last_refill = time.monotonic()
+
+        # AIMD concurrency
+        self.min_concurrency = float(min_concurrency)
+        self.max_concurrency = float(max_concurrency)
+        self.concurrency_limit = float(initial_concurrency)
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+
+        # Server-requested pause (Retry-After or exhausted rate-limit window)
+        self.max_wait = max_wait
+        self.default_retry_after = default_retry_after
+        self.blocked_until = 0.0
+
+        # Monitoring
+        self.total_acquired = 0
+        self.total_waits = 0
+        self.total_wait_seconds = 0.0
+        self.timeouts = 0
+        self.throttle_events = 0
+        self.retry_after_events = 0
+        self.last_throttle_at = None
+        self.last_retry_after = None
+        self.server_limit = None
+        self.server_remaining = None
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """
+        Wait for a token and a concurrency slot.
+
+        Raises:
+            RateLimitTimeout: If no slot was available within max_wait seconds
+        """
+        start = time.monotonic()
+        deadline = start + self.max_wait
+        waited = False
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                if now < self.blocked_until:
+                    if self.blocked_until >= deadline:
+                        # A Retry-After longer than max_wait: waiting could only end in a timeout
+                        self.timeouts += 1
+                        raise RateLimitTimeout(f"Revizto asked to retry in {self.blocked_until - now:.1f}s, "
+                                               f"longer than the {self.max_wait}s wait limit")
+                    wait = self.blocked_until - now
+                elif self.in_flight >= max(1, int(self.concurrency_limit)):
+                    wait = None  # until a release notifies us
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.total_acquired += 1
+                    if waited:
+                        self.total_wait_seconds += now - start
+                    return
+
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise RateLimitTimeout(f"No Revizto rate limiter slot available after {self.max_wait}s")
+
+                if not waited:
+                    waited = True
+                    self.total_waits += 1
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+
+    def release(self, response=None):
+        """
+        Give back the concurrency slot and adapt to the response.
+
+        Args:
+            response (requests.Response, optional): The response, or None if the request failed
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if response is not None:
+                self._observe(response)
+            self._cond.notify_all()
+
+    def _observe(self, response):
+        """Adjust rate, concurrency and pauses from a response (caller holds the lock)."""
+        now = time.monotonic()
+        headers = response.headers or {}
+
+        # Server-advertised rate-limit window
+        self.server_limit = _header_number(headers, 'X-RateLimit-Limit', 'RateLimit-Limit')
+        self.server_remaining = _header_number(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        reset = _header_number(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+        if self.server_remaining is not None and self.server_remaining <= 0 and reset is not None:
+            # Reset is either an epoch timestamp or a number of seconds
+            reset_in = reset - time.time() if reset > 1e9 else reset
+            if reset_in > 0:
+                self.blocked_until = max(self.blocked_until, now + reset_in)
+
+        if response.status_code in (429, 503):
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            if retry_after is not None:
+                self.retry_after_events += 1
+                self.last_retry_after = retry_after
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+        if response.status_code == 429:
+            # Multiplicative decrease
+            self.throttle_events += 1
+            self.last_throttle_at = datetime.now()
+            self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * self.decrease_factor)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            if headers.get('Retry-After') is None:
+                self.blocked_until = max(self.blocked_until, now + self.default_retry_after)
+            logger.warning(
+                f"Revizto rate limit hit (429): concurrency limit -> {self.concurrency_limit:.1f}, "
+                f"rate -> {self.rate:.2f}/s"
+            )
+        elif response.status_code < 400:
+            # Additive increase: about +1 concurrency slot per window of successful calls
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1 / self.concurrency_limit)
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def retry_after_seconds(self):
+        """Seconds until the current server-requested pause ends (0 if none)."""
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def get_status(self):
+        """Get the current rate, concurrency and throttle statistics."""
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'rate_per_second': round(self.rate, 2),
+                'max_rate_per_second': self.max_rate,
+                'tokens_available': round(self.tokens, 2),
+                'burst': self.burst,
+                'concurrency_limit': round(self.concurrency_limit, 2),
+                'max_concurrency': self.max_concurrency,
+                'in_flight': self.in_flight,
+                'paused_for_seconds': round(self.retry_after_seconds(), 1),
+                'total_acquired': self.total_acquired,
+                'total_waits': self.total_waits,
+                'total_wait_seconds': round(self.total_wait_seconds, 2),
+                'timeouts': self.timeouts,
+                'throttle_events': self.throttle_events,
+                'retry_after_events': self.retry_after_events,
+                'last_throttle_at': self.last_throttle_at,
+                'last_retry_after': self.last_retry_after,
+                'server_limit': self.server_limit,
+                'server_remaining': self.server_remaining,
+            }
+
+
+# Global instance
+limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """Get the process-wide rate limiter, creating it from settings on first use."""
+    global limiter
+    if limiter is None:
+        with _limiter_lock:
+            if limiter is None:
+                config = dict(DEFAULT_RATE_LIMIT)
+                config.update(getattr(settings, 'REVIZTO_RATE_LIMIT', {}) or {})
+                limiter = AdaptiveRateLimiter(**config)
+    return limiter
+
+
+def get_status():
+    """Get the current status of the rate limiter."""
+    return get_limiter().get_status()
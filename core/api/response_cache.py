@@ -0,0 +1,187 @@
+# core/api/response_cache.py - Cache for Revizto GET responses
+
+"""
+Response cache under ReviztoAPI.get.
+
+Entries are keyed by endpoint and normalized query params and stored in a
+Django cache backend (settings.REVIZTO_CACHE_ALIAS). Each endpoint family has
+its own TTL. Past the TTL an entry is served stale while a background refresh
+runs (stale-while-revalidate); past that window the call is made synchronously
+and the stale entry is still returned if Revizto errors or the family's
+circuit breaker is open (stale-if-error).
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from . import transport
+from . import circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+# Fresh lifetime in seconds per endpoint family (0 disables caching)
+DEFAULT_CACHE_TTLS = {
+    'default': 0,
+    'license/projects': 600,
+    'project/issue-workflow': 3600,
+    'project/issue-filter': 120,
+    'issue/comments': 300,
+}
+
+KEY_PREFIX = 'revizto:v1'
+
+_executor = None
+_refreshing = set()
+_lock = threading.Lock()
+
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'stale_hits': 0,
+    'stale_on_error': 0,
+    'bypassed': 0,
+    'background_refreshes': 0,
+    'refresh_failures': 0,
+    'by_family': {},
+}
+
+
+def _count(name, family=None):
+    with _lock:
+        _stats[name] += 1
+        if family is not None:
+            family_stats = _stats['by_family'].setdefault(family, {'hits': 0, 'misses': 0, 'stale_hits': 0})
+            if name in family_stats:
+                family_stats[name] += 1
+
+
+def _get_cache():
+    return caches[getattr(settings, 'REVIZTO_CACHE_ALIAS', 'default')]
+
+
+def get_ttl(family):
+    """Get the fresh lifetime for an endpoint family from settings or defaults."""
+    ttls = dict(DEFAULT_CACHE_TTLS)
+    ttls.update(getattr(settings, 'REVIZTO_CACHE_TTLS', {}) or {})
+    return ttls.get(family, ttls['default'])
+
+
+def make_key(endpoint, params=None):
+    """Build a cache key from the endpoint and its params, independent of param order."""
+    normalized = json.dumps(params or {}, sort_keys=True, default=str, separators=(',', ':'))
+    digest = hashlib.sha1(f"{endpoint.strip('/')}?{normalized}".encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}:{transport.endpoint_family(endpoint)}:{digest}"
+
+
+def _store(key, data, ttl):
+    stale_if_error = getattr(settings, 'REVIZTO_CACHE_STALE_IF_ERROR', 86400)
+    entry = {'data': data, 'stored_at': time.time(), 'fresh_until': time.time() + ttl}
+    try:
+        _get_cache().set(key, entry, timeout=ttl + stale_if_error)
+    except Exception as e:
+        logger.warning(f"Could not store Revizto response in cache: {e}")
+
+
+def _load(key):
+    try:
+        return _get_cache().get(key)
+    except Exception as e:
+        logger.warning(f"Could not read Revizto response cache: {e}")
+        return None
+
+
+def _refresh_in_background(key, fetch, ttl):
+    """Refresh an entry on a background thread, at most once at a time per key."""
+    global _executor
+
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='revizto-cache')
+
+    def refresh():
+        try:
+            _store(key, fetch(), ttl)
+            _count('background_refreshes')
+        except Exception as e:
+            _count('refresh_failures')
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+            close_old_connections()
+
+    _executor.submit(refresh)
+
+
+def get_or_fetch(endpoint, params, fetch, use_cache=True):
+    """
+    Return a cached response for the endpoint, fetching it if needed.
+
+    Args:
+        endpoint (str): API endpoint
+        params (dict): Query parameters
+        fetch (callable): Performs the actual API call and returns the response data
+        use_cache (bool): False bypasses the cache entirely
+
+    Returns:
+        dict: Response data
+    """
+    family = transport.endpoint_family(endpoint)
+    ttl = get_ttl(family)
+    if not use_cache or not ttl:
+        _count('bypassed')
+        return fetch()
+
+    key = make_key(endpoint, params)
+    entry = _load(key)
+    now = time.time()
+
+    if entry is not None:
+        if now < entry['fresh_until']:
+            _count('hits', family)
+            return entry['data']
+
+        swr = getattr(settings, 'REVIZTO_CACHE_STALE_WHILE_REVALIDATE', 300)
+        breaker_open = circuit_breaker.get_breaker(family).state == circuit_breaker.OPEN
+        if breaker_open or now < entry['fresh_until'] + swr:
+            _count('stale_hits', family)
+            if not breaker_open:
+                _refresh_in_background(key, fetch, ttl)
+            return entry['data']
+
+    _count('misses', family)
+    try:
+        data = fetch()
+    except Exception as e:
+        if entry is None:
+            raise
+        _count('stale_on_error')
+        age = int(now - entry['stored_at'])
+        logger.warning(f"Serving stale {family} response ({age}s old) after error: {e}")
+        return entry['data']
+
+    _store(key, data, ttl)
+    return data
+
+
+def get_status():
+    """Get hit/miss counters and cache configuration."""
+    with _lock:
+        stats = dict(_stats)
+        stats['by_family'] = {family: dict(counts) for family, counts in _stats['by_family'].items()}
+        stats['refreshing'] = len(_refreshing)
+
+    lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+    stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else None
+    stats['cache_alias'] = getattr(settings, 'REVIZTO_CACHE_ALIAS', 'default')
+    stats['ttls'] = {**DEFAULT_CACHE_TTLS, **(getattr(settings, 'REVIZTO_CACHE_TTLS', {}) or {})}
+    return stats
@@ -2,6 +2,8 @@ import logging
 from .client import ReviztoAPI
 from .models import Project, Issue, User
 from . import token_store  # Import the token store
+from . import comment_store
+from . import mirror
 
 logger = logging.getLogger(__name__)
 
@@ -33,9 +35,43 @@ class ReviztoService:
         return ReviztoAPI.get(endpoint, params)
 
     @classmethod
-    def get_projects(cls):
-        """Get a list of all projects."""
+    def get_many(cls, requests, max_concurrency=None, use_cache=True):
+        """
+        Make several GET requests concurrently through the async client.
+
+        Args:
+            requests (list): Endpoints as strings or (endpoint, params) tuples
+            max_concurrency (int, optional): Limit of in-flight requests
+            use_cache (bool): False always calls Revizto, bypassing the response cache
+
+        Returns:
+            list: Response data, or the exception raised, for each request in order
+        """
+        if not token_store.has_tokens():
+            print(f"[DEBUG] Token store is missing tokens, aborting {len(requests)} requests")
+            raise Exception("API tokens not available")
+
+        from .async_client import AsyncReviztoAPI, run_sync
+
+        client = AsyncReviztoAPI(max_concurrency=max_concurrency)
+        return run_sync(client.get_many(requests, use_cache=use_cache))
+
+    @classmethod
+    def get_projects(cls, use_mirror=True, use_cache=True):
+        """
+        Get a list of all projects.
+
+        Args:
+            use_mirror (bool): Read the local mirror when it is fresh (see core/api/mirror.py)
+            use_cache (bool): False always calls Revizto, bypassing the response cache
+        """
         print("\n[DEBUG] ==== STARTING GET_PROJECTS ====")
+        if use_mirror:
+            payloads = mirror.projects()
+            if payloads is not None:
+                print(f"[DEBUG] Found {len(payloads)} projects in the local mirror")
+                return [Project(payload) for payload in payloads]
+
         try:
             # Get license UUID from token store
             licence_uuid = token_store.get_licence_uuid()
@@ -57,7 +93,7 @@ class ReviztoService:
             print(f"[DEBUG] Using endpoint: {endpoint}")
 
             try:
-                data = ReviztoAPI.get(endpoint)
+                data = ReviztoAPI.get(endpoint, use_cache=use_cache)
                 print("[DEBUG] API request successful")
             except Exception as e:
                 print(f"[DEBUG] API request failed with exception: {e}")
@@ -175,174 +211,254 @@ class ReviztoService:
             return None
 
     @classmethod
-    def search_projects(cls, query):
-        """Search for projects by title."""
-        print(f"[DEBUG] Starting search for projects with query: {query}")
-        try:
-            # Verify tokens are available before making request
-            if not token_store.has_tokens():
-                print(f"[DEBUG] Token store is missing tokens, aborting projects search")
-                return []
+    def search_projects(cls, query, limit=None, offset=0):
+        """
+        Search for projects by title in the indexed project catalog.
 
-            # Get all projects
-            projects = cls.get_projects()
-            print(f"[DEBUG] Found {len(projects)} projects to search through")
+        Matching ignores accents, case and punctuation, and takes word prefixes,
+        substrings and near misses; results are ranked (see core/api/project_catalog.py).
 
-            # Filter projects by title containing the query (case insensitive)
-            if query:
-                filtered_projects = []
-                for project in projects:
-                    project_title = project.name.lower()
-                    if query.lower() in project_title:
-                        print(f"[DEBUG] Match found: {project.name}")
-                        filtered_projects.append(project)
+        Args:
+            query (str): Search text
+            limit (int, optional): Maximum number of results
+            offset (int): Results to skip
 
-                print(f"[DEBUG] Search returned {len(filtered_projects)} results")
-                return filtered_projects
+        Returns:
+            list: Matching Project objects, best first
+        """
+        return cls.search_projects_page(query, limit, offset)[0]
 
-            return projects
+    @classmethod
+    def search_projects_page(cls, query, limit=None, offset=0):
+        """
+        Search for projects by title, with the total number of matches.
+
+        Returns:
+            tuple: (list of Project, total number of matches)
+        """
+        from . import project_catalog
+
+        print(f"[DEBUG] Starting search for projects with query: {query}")
+        try:
+            projects, total = project_catalog.search(query, limit=limit, offset=offset)
+            print(f"[DEBUG] Search returned {len(projects)} of {total} results")
+            return projects, total
         except Exception as e:
             import traceback
             print(f"[DEBUG] Failed to search projects: {e}")
             print(f"[DEBUG] Exception traceback: {traceback.format_exc()}")
-            return []
+            return [], 0
+
+    # Report sections and the stamp abbreviation that marks their issues
+    REPORT_STAMPS = {
+        'observations': 'A-OB',
+        'instructions': 'A-IN',
+        'deficiencies': 'A-DF',
+    }
+    # Position of each stamp in the stampAbbr filter values
+    STAMP_FILTER_INDEX = {'A-DF': 0, 'A-IN': 1, 'A-OB': 2}
 
     @classmethod
-    def get_observations(cls, project_id):
-        """Get all observations for a project (issues with stamp A-OB)."""
-        print(f"[DEBUG] Fetching observations for project ID: {project_id}")
-        try:
-            # Verify tokens are available before making request
-            if not token_store.has_tokens():
-                print(f"[DEBUG] Token store is missing tokens, aborting observations request")
-                return {"result": 1, "message": "API tokens not available", "data": {"data": []}}
+    def _stamp_filter_params(cls, stamps):
+        """Build issue-filter params selecting issues with any of the given stamps."""
+        params = {
+            "anyFiltersDTO[0][type]": "stampAbbr",
+            "anyFiltersDTO[0][expr]": "1",
+        }
+        for stamp in stamps:
+            params[f"anyFiltersDTO[0][value][{cls.STAMP_FILTER_INDEX[stamp]}]"] = stamp
+        params.update({
+            "sendFullIssueData": "true",
+            "reportSort[1][field]": "sheet",
+            "reportSort[1][direction]": "asc",
+            "reportSort[2][field]": "id",
+            "reportSort[2][direction]": "asc"
+        })
+        return params
+
+    @staticmethod
+    def _issue_stamps(issue):
+        """
+        Extract the stamp abbreviations of an issue from its full data.
 
-            endpoint = f"project/{project_id}/issue-filter/filter"
-            params = {
-                "anyFiltersDTO[0][type]": "stampAbbr",
-                "anyFiltersDTO[0][expr]": "1",
-                "anyFiltersDTO[0][value][2]": "A-OB",
-                "sendFullIssueData": "true",
-                "reportSort[1][field]": "sheet",
-                "reportSort[1][direction]": "asc",
-                "reportSort[2][field]": "id",
-                "reportSort[2][direction]": "asc"
-            }
+        Returns:
+            set: Stamp abbreviations, or None if the issue carries no stamp information
+        """
+        stamps = None
+        for key in ('stampAbbr', 'stamp', 'stamps'):
+            if key not in issue:
+                continue
+            value = issue[key]
+            if isinstance(value, dict) and 'value' in value:
+                value = value['value']
+            values = value if isinstance(value, list) else [value]
+
+            stamps = stamps or set()
+            for item in values:
+                if isinstance(item, dict):
+                    item = item.get('abbr') or item.get('stampAbbr') or item.get('value')
+                if isinstance(item, str) and item:
+                    stamps.add(item.strip())
+        return stamps
 
-            response = ReviztoAPI.get(endpoint, params=params)
-            print(f"[DEBUG] Observations API response received: {type(response)}")
+    @classmethod
+    def _get_stamp_issues(cls, project_id, stamps, use_cache=True):
+        """Run one issue-filter query for the given stamps and return the raw API response."""
+        endpoint = f"project/{project_id}/issue-filter/filter"
+        return ReviztoAPI.get(endpoint, params=cls._stamp_filter_params(stamps), use_cache=use_cache)
+
+    @staticmethod
+    def _with_issues(response, issues):
+        """Copy a raw issue-filter response, replacing its issue list."""
+        section = dict(response)
+        section['data'] = dict(response.get('data') or {})
+        section['data']['data'] = issues
+        return section
 
-            # Pass through the raw API response
-            return response
+    @classmethod
+    def get_report_issues(cls, project_id, use_mirror=True, use_cache=True):
+        """
+        Get observations, instructions and deficiencies with a single issue-filter query.
 
-        except Exception as e:
-            import traceback
-            print(f"[DEBUG] Failed to get observations: {e}")
-            print(f"[DEBUG] Exception traceback: {traceback.format_exc()}")
-            return {"result": 1, "message": str(e), "data": {"data": []}}
+        All three stamps are requested at once (sorted by sheet then id) and the
+        issues are split locally; an issue carrying several stamps appears in each
+        matching section. If the combined query fails or any of its issues carries no
+        readable report stamp, each section falls back to its own per-stamp query.
 
-    @classmethod
-    def get_instructions(cls, project_id):
-        """Get all instructions for a project (issues with stamp A-IN)."""
-        print(f"[DEBUG] Fetching instructions for project ID: {project_id}")
-        try:
-            # Verify tokens are available before making request
-            if not token_store.has_tokens():
-                print(f"[DEBUG] Token store is missing tokens, aborting instructions request")
-                return {"result": 1, "message": "API tokens not available", "data": {"data": []}}
+        Args:
+            project_id (int): Project ID
+            use_mirror (bool): Read the local mirror when it is fresh (see core/api/mirror.py)
+            use_cache (bool): False always calls Revizto, bypassing the response cache
 
-            endpoint = f"project/{project_id}/issue-filter/filter"
-            params = {
-                "anyFiltersDTO[0][type]": "stampAbbr",
-                "anyFiltersDTO[0][expr]": "1",
-                "anyFiltersDTO[0][value][1]": "A-IN",
-                "sendFullIssueData": "true",
-                "reportSort[1][field]": "sheet",
-                "reportSort[1][direction]": "asc",
-                "reportSort[2][field]": "id",
-                "reportSort[2][direction]": "asc"
-            }
+        Returns:
+            dict: Section name -> raw-style API response ({"result", "data": {"data": [...]}})
+        """
+        if use_mirror:
+            sections = mirror.report_issues(project_id)
+            if sections is not None:
+                print(f"[DEBUG] Report issues of project {project_id} read from the local mirror")
+                return sections
 
-            response = ReviztoAPI.get(endpoint, params=params)
-            print(f"[DEBUG] Instructions API response received: {type(response)}")
+        print(f"[DEBUG] Fetching report issues (all stamps) for project ID: {project_id}")
 
-            # Pass through the raw API response
-            return response
+        # Verify tokens are available before making request
+        if not token_store.has_tokens():
+            print(f"[DEBUG] Token store is missing tokens, aborting report issues request")
+            return {section: {"result": 1, "message": "API tokens not available", "data": {"data": []}}
+                    for section in cls.REPORT_STAMPS}
+
+        try:
+            response = cls._get_stamp_issues(project_id, sorted(cls.REPORT_STAMPS.values()), use_cache=use_cache)
+            if response and response.get('result') == 0 and isinstance(response.get('data'), dict):
+                issues = response['data'].get('data') or []
+                issue_stamps = [cls._issue_stamps(issue) for issue in issues]
+
+                # An issue without a report stamp we can read could not be placed in any section
+                report_stamps = set(cls.REPORT_STAMPS.values())
+                if all(stamps and stamps & report_stamps for stamps in issue_stamps):
+                    sections = {}
+                    for section, stamp in cls.REPORT_STAMPS.items():
+                        section_issues = [issue for issue, stamps in zip(issues, issue_stamps)
+                                          if stamps and stamp in stamps]
+                        sections[section] = cls._with_issues(response, section_issues)
+                        print(f"[DEBUG] Found {len(section_issues)} {section}")
+                    return sections
+
+                missing = sum(1 for stamps in issue_stamps if not (stamps and stamps & report_stamps))
+                print(f"[DEBUG] {missing}/{len(issues)} issues carry no report stamp, "
+                      f"falling back to per-stamp queries")
+            else:
+                print(f"[DEBUG] Combined stamp query failed, falling back to per-stamp queries")
 
         except Exception as e:
-            import traceback
-            print(f"[DEBUG] Failed to get instructions: {e}")
-            print(f"[DEBUG] Exception traceback: {traceback.format_exc()}")
-            return {"result": 1, "message": str(e), "data": {"data": []}}
+            print(f"[DEBUG] Combined stamp query failed ({e}), falling back to per-stamp queries")
+
+        sections = {}
+        for section, stamp in cls.REPORT_STAMPS.items():
+            try:
+                sections[section] = cls._get_stamp_issues(project_id, [stamp], use_cache=use_cache)
+            except Exception as e:
+                import traceback
+                print(f"[DEBUG] Failed to get {section}: {e}")
+                print(f"[DEBUG] Exception traceback: {traceback.format_exc()}")
+                sections[section] = {"result": 1, "message": str(e), "data": {"data": []}}
+        return sections
+
+    @classmethod
+    def get_observations(cls, project_id):
+        """Get all observations for a project (issues with stamp A-OB)."""
+        return cls.get_report_issues(project_id)['observations']
+
+    @classmethod
+    def get_instructions(cls, project_id):
+        """Get all instructions for a project (issues with stamp A-IN)."""
+        return cls.get_report_issues(project_id)['instructions']
 
     @classmethod
     def get_deficiencies(cls, project_id):
         """Get all deficiencies for a project (issues with stamp A-DF)."""
-        print(f"\n[DEBUG-SERVICE] ===== FETCHING DEFICIENCIES =====")
-        print(f"[DEBUG-SERVICE] Fetching deficiencies for project ID: {project_id}")
-        try:
-            # Verify tokens are available before making request
-            if not token_store.has_tokens():
-                print(f"[DEBUG-SERVICE] Token store is missing tokens, aborting deficiencies request")
-                return {"result": 1, "message": "API tokens not available", "data": {"data": []}}
+        return cls.get_report_issues(project_id)['deficiencies']
 
-            endpoint = f"project/{project_id}/issue-filter/filter"
-            params = {
-                "anyFiltersDTO[0][type]": "stampAbbr",
-                "anyFiltersDTO[0][expr]": "1",
-                "anyFiltersDTO[0][value][0]": "A-DF",
-                "sendFullIssueData": "true",
-                "reportSort[2][field]": "sheet",
-                "reportSort[2][direction]": "asc",
-                "reportSort[3][field]": "id",
-                "reportSort[3][direction]": "asc",
-            }
+    @staticmethod
+    def _normalize_comments_response(comments_response):
+        """
+        Normalize an issue/{uuid}/comments/date response so that 'data' is a list of comments.
 
-            print(f"[DEBUG-SERVICE] Using endpoint: {endpoint}")
-            print(f"[DEBUG-SERVICE] Using params: {params}")
-            print(
-                f"[DEBUG-SERVICE] Token state: access={bool(token_store.get_access_token())}, refresh={bool(token_store.get_refresh_token())}")
+        Args:
+            comments_response: Raw response from the comments endpoint
 
-            # Make the API request
-            try:
-                response = ReviztoAPI.get(endpoint, params=params)
-                print(f"[DEBUG-SERVICE] API call successful")
-            except Exception as e:
-                print(f"[DEBUG-SERVICE] API call failed: {e}")
-                import traceback
-                print(f"[DEBUG-SERVICE] API error traceback: {traceback.format_exc()}")
-                return {"result": 1, "message": str(e), "data": {"data": []}}
-
-            # Debug the response
-            print(f"[DEBUG-SERVICE] Response type: {type(response)}")
-            if isinstance(response, dict):
-                print(f"[DEBUG-SERVICE] Response has keys: {list(response.keys())}")
-                if 'result' in response:
-                    print(f"[DEBUG-SERVICE] Result value: {response['result']}")
-
-                # Check for data
-                if 'data' in response:
-                    data_obj = response['data']
-                    if isinstance(data_obj, dict) and 'data' in data_obj:
-                        deficiencies = data_obj['data']
-                        print(f"[DEBUG-SERVICE] Found {len(deficiencies)} deficiencies")
-
-                        # Debug first deficiency
-                        if len(deficiencies) > 0:
-                            first = deficiencies[0]
-                            print(f"[DEBUG-SERVICE] First deficiency ID: {first.get('id')}")
-                            print(f"[DEBUG-SERVICE] First deficiency has keys: {list(first.keys())[:10]}...")
-
-            print(f"[DEBUG-SERVICE] ===== END FETCHING DEFICIENCIES =====\n")
-
-            # Return the original response
-            return response
+        Returns:
+            dict: Response with 'data' as a list (empty when nothing usable was found)
+        """
+        # Check response structure and format
+        if isinstance(comments_response, dict):
+            print(f"[DEBUG-SERVICE] Comments response has keys: {list(comments_response.keys())}")
+
+            # Make sure we extract the comments data correctly
+            if comments_response.get('result') == 0:
+                comments_data = comments_response.get('data')
+
+                # Handle different possible formats for the data
+                if comments_data is None:
+                    print(f"[DEBUG-SERVICE] Comments data is None")
+                    comments_response['data'] = []
+                elif isinstance(comments_data, list):
+                    print(f"[DEBUG-SERVICE] Found {len(comments_data)} comments in list format")
+                    # Leave as is - already in the correct format
+                elif isinstance(comments_data, dict):
+                    print(
+                        f"[DEBUG-SERVICE] Comments data is a dict with keys: {list(comments_data.keys())}")
+
+                    # Try to extract comments from different possible dict structures
+                    if 'items' in comments_data and isinstance(comments_data['items'], list):
+                        # Format 1: data = { items: [...comments] }
+                        print(f"[DEBUG-SERVICE] Found {len(comments_data['items'])} comments in data.items")
+                        comments_response['data'] = comments_data['items']
+                    elif 'data' in comments_data and isinstance(comments_data['data'], list):
+                        # Format 2: data = { data: [...comments] }
+                        print(f"[DEBUG-SERVICE] Found {len(comments_data['data'])} comments in data.data")
+                        comments_response['data'] = comments_data['data']
+                    else:
+                        # If we can't find a list of comments, try using the dict as a single comment
+                        # (rare, but possible for single comments)
+                        if 'type' in comments_data and 'created' in comments_data:
+                            print(f"[DEBUG-SERVICE] Treating dict as a single comment")
+                            comments_response['data'] = [comments_data]
+                        else:
+                            print(f"[DEBUG-SERVICE] Could not identify comments in dict structure")
+                            comments_response['data'] = []
+                else:
+                    print(f"[DEBUG-SERVICE] Comments data has unexpected type: {type(comments_data)}")
+                    comments_response['data'] = []
+            else:
+                print(
+                    f"[DEBUG-SERVICE] Comments response has non-zero result: {comments_response.get('result')}")
+                comments_response['data'] = []
+        else:
+            print(f"[DEBUG-SERVICE] Comments response is not a dict: {type(comments_response)}")
+            comments_response = {"result": 1, "message": "Invalid response format", "data": []}
 
-        except Exception as e:
-            print(f"[DEBUG-SERVICE] General error in get_deficiencies: {e}")
-            import traceback
-            print(f"[DEBUG-SERVICE] Exception traceback: {traceback.format_exc()}")
-            return {"result": 1, "message": str(e), "data": {"data": []}}
+        return comments_response
 
     @classmethod
     def get_issue_comments(cls, project_id, issue_id, date):
@@ -360,6 +476,11 @@ class ReviztoService:
         print(f"\n[DEBUG-SERVICE] ===== FETCHING ISSUE COMMENTS =====")
         print(f"[DEBUG-SERVICE] Fetching comments for issue ID: {issue_id} in project: {project_id}")
 
+        mirrored = mirror.comments(project_id, [str(issue_id)], date)
+        if mirrored is not None:
+            print(f"[DEBUG-SERVICE] Comments read from the local mirror")
+            return {"result": 0, "data": mirrored[str(issue_id)], "issueId": issue_id}
+
         try:
             # Verify tokens are available before making request
             if not token_store.has_tokens():
@@ -394,63 +515,21 @@ class ReviztoService:
                     # Step 2: Now use THIS issue's UUID to fetch comments
                     comments_endpoint = f"issue/{issue_uuid}/comments/date"
 
-                    # Include the required parameters
+                    # Only comments newer than the stored history, if there is one
+                    requested_date, stored = comment_store.plan(issue_uuid, date)
                     comments_params = {
-                        "date": date,
+                        "date": requested_date,
                         "projectId": project_id
                     }
 
                     # Make API request with the correct parameters
                     comments_response = ReviztoAPI.get(comments_endpoint, comments_params)
-                    print(f"[DEBUG-SERVICE] API call successful for comments endpoint")
-
-                    # Check response structure and format
-                    if isinstance(comments_response, dict):
-                        print(f"[DEBUG-SERVICE] Comments response has keys: {list(comments_response.keys())}")
-
-                        # Make sure we extract the comments data correctly
-                        if comments_response.get('result') == 0:
-                            comments_data = comments_response.get('data')
-
-                            # Handle different possible formats for the data
-                            if comments_data is None:
-                                print(f"[DEBUG-SERVICE] Comments data is None")
-                                comments_response['data'] = []
-                            elif isinstance(comments_data, list):
-                                print(f"[DEBUG-SERVICE] Found {len(comments_data)} comments in list format")
-                                # Leave as is - already in the correct format
-                            elif isinstance(comments_data, dict):
-                                print(
-                                    f"[DEBUG-SERVICE] Comments data is a dict with keys: {list(comments_data.keys())}")
-
-                                # Try to extract comments from different possible dict structures
-                                if 'items' in comments_data and isinstance(comments_data['items'], list):
-                                    # Format 1: data = { items: [...comments] }
-                                    print(f"[DEBUG-SERVICE] Found {len(comments_data['items'])} comments in data.items")
-                                    comments_response['data'] = comments_data['items']
-                                elif 'data' in comments_data and isinstance(comments_data['data'], list):
-                                    # Format 2: data = { data: [...comments] }
-                                    print(f"[DEBUG-SERVICE] Found {len(comments_data['data'])} comments in data.data")
-                                    comments_response['data'] = comments_data['data']
-                                else:
-                                    # If we can't find a list of comments, try using the dict as a single comment
-                                    # (rare, but possible for single comments)
-                                    if 'type' in comments_data and 'created' in comments_data:
-                                        print(f"[DEBUG-SERVICE] Treating dict as a single comment")
-                                        comments_response['data'] = [comments_data]
-                                    else:
-                                        print(f"[DEBUG-SERVICE] Could not identify comments in dict structure")
-                                        comments_response['data'] = []
-                            else:
-                                print(f"[DEBUG-SERVICE] Comments data has unexpected type: {type(comments_data)}")
-                                comments_response['data'] = []
-                        else:
-                            print(
-                                f"[DEBUG-SERVICE] Comments response has non-zero result: {comments_response.get('result')}")
-                            comments_response['data'] = []
-                    else:
-                        print(f"[DEBUG-SERVICE] Comments response is not a dict: {type(comments_response)}")
-                        comments_response = {"result": 1, "message": "Invalid response format", "data": []}
+                    print(f"[DEBUG-SERVICE] API call successful for comments endpoint (since {requested_date})")
+
+                    comments_response = cls._normalize_comments_response(comments_response)
+                    if comments_response.get('result') == 0:
+                        history = comment_store.merge(issue_uuid, requested_date, stored, comments_response['data'])
+                        comments_response['data'] = comment_store.since(history, date)
 
                     # Add the issue ID to the response for reference on the client side
                     comments_response['issueId'] = issue_id
@@ -470,6 +549,131 @@ class ReviztoService:
             print(f"[DEBUG-SERVICE] Traceback: {traceback.format_exc()}")
             return {"result": 1, "message": str(e), "data": [], "issueId": issue_id}
 
+    @classmethod
+    def get_issue_uuids(cls, project_id, issue_ids, batch_size=50):
+        """
+        Look up the UUIDs of several issues with batched id filters.
+
+        Args:
+            project_id (int): Project ID
+            issue_ids (list): Issue IDs
+            batch_size (int): Number of IDs per issue-filter request
+
+        Returns:
+            dict: Issue ID (str) -> UUID, for the issues that were found
+        """
+        endpoint = f"project/{project_id}/issue-filter/filter"
+        issue_ids = list(issue_ids)
+        requests = []
+        for start in range(0, len(issue_ids), batch_size):
+            params = {
+                "anyFiltersDTO[0][type]": "id",
+                "anyFiltersDTO[0][expr]": "1",
+            }
+            for index, issue_id in enumerate(issue_ids[start:start + batch_size]):
+                params[f"anyFiltersDTO[0][value][{index}]"] = issue_id
+            requests.append((endpoint, params))
+
+        uuids = {}
+        for response in cls.get_many(requests):
+            if isinstance(response, Exception):
+                print(f"[DEBUG-SERVICE] Error looking up issue UUIDs: {response}")
+                continue
+            if response and response.get('result') == 0 and response.get('data'):
+                for issue in response['data'].get('data') or []:
+                    if issue.get('id') and issue.get('uuid'):
+                        uuids[str(issue['id'])] = issue['uuid']
+        return uuids
+
+    @classmethod
+    def get_comments_for_issues(cls, project_id, issues, date='2018-05-30', max_concurrency=None, use_mirror=True):
+        """
+        Get comments for several issues at once.
+
+        Issues that already carry their UUID (e.g. from sendFullIssueData responses)
+        skip the issue-filter lookup, the rest are looked up in batches. Issues that
+        appear more than once (e.g. under several stamps) are fetched once, and the
+        comment requests run concurrently.
+
+        Args:
+            project_id (int): Project ID
+            issues (list): Issue dicts with 'id' (and ideally 'uuid'), or (id, uuid) pairs
+            date (str): Date in YYYY-MM-DD format to filter comments
+            max_concurrency (int, optional): Limit of in-flight comment requests
+            use_mirror (bool): Read the local mirror when it is fresh (see core/api/mirror.py)
+
+        Returns:
+            dict: Issue ID (str) -> list of comments (empty when none or on error)
+        """
+        print(f"\n[DEBUG-SERVICE] ===== FETCHING COMMENTS FOR {len(issues)} ISSUES =====")
+
+        # Deduplicate by issue ID, keeping any UUID we already know
+        issue_uuids = {}
+        raw_ids = {}
+        for issue in issues:
+            if isinstance(issue, dict):
+                issue_id, issue_uuid = issue.get('id'), issue.get('uuid')
+            else:
+                issue_id, issue_uuid = issue[0], (issue[1] if len(issue) > 1 else None)
+            if not issue_id:
+                continue
+            key = str(issue_id)
+            raw_ids.setdefault(key, issue_id)
+            if not issue_uuids.get(key):
+                issue_uuids[key] = issue_uuid
+
+        comments = {issue_id: [] for issue_id in issue_uuids}
+        if not issue_uuids:
+            return comments
+
+        if use_mirror:
+            mirrored = mirror.comments(project_id, list(issue_uuids), date)
+            if mirrored is not None:
+                print(f"[DEBUG-SERVICE] Comments for {len(mirrored)} issues read from the local mirror")
+                return mirrored
+
+        if not token_store.has_tokens():
+            print(f"[DEBUG-SERVICE] Token store is missing tokens, aborting comments request")
+            return comments
+
+        try:
+            missing = [raw_ids[issue_id] for issue_id, issue_uuid in issue_uuids.items() if not issue_uuid]
+            if missing:
+                print(f"[DEBUG-SERVICE] Looking up UUIDs for {len(missing)} issues")
+                issue_uuids.update(cls.get_issue_uuids(project_id, missing))
+
+            to_fetch = [(issue_id, issue_uuid) for issue_id, issue_uuid in issue_uuids.items() if issue_uuid]
+            print(f"[DEBUG-SERVICE] Fetching comments for {len(to_fetch)} unique issues "
+                  f"({len(issues) - len(issue_uuids)} duplicates skipped)")
+
+            # Issues with a stored history only ask for the comments since its high-water mark
+            plans = [comment_store.plan(issue_uuid, date) for issue_id, issue_uuid in to_fetch]
+            requests = [
+                (f"issue/{issue_uuid}/comments/date", {"date": requested_date, "projectId": project_id})
+                for (issue_id, issue_uuid), (requested_date, stored) in zip(to_fetch, plans)
+            ]
+            incremental = sum(1 for requested_date, stored in plans if stored is not None)
+            print(f"[DEBUG-SERVICE] {incremental}/{len(to_fetch)} comment histories fetched incrementally")
+            responses = cls.get_many(requests, max_concurrency=max_concurrency)
+
+            for (issue_id, issue_uuid), (requested_date, stored), response in zip(to_fetch, plans, responses):
+                if isinstance(response, Exception):
+                    print(f"[DEBUG-SERVICE] Error fetching comments for issue {issue_id}: {response}")
+                    if stored is not None:
+                        # Serve the stored history without the newest comments
+                        comments[issue_id] = comment_store.since(stored['comments'], date)
+                    continue
+                response = cls._normalize_comments_response(response)
+                if response.get('result') == 0:
+                    history = comment_store.merge(issue_uuid, requested_date, stored, response['data'])
+                    comments[issue_id] = comment_store.since(history, date)
+
+        except Exception as e:
+            print(f"[DEBUG-SERVICE] Error in get_comments_for_issues: {e}")
+
+        print(f"[DEBUG-SERVICE] ===== END FETCHING COMMENTS FOR ISSUES =====\n")
+        return comments
+
     @classmethod
     def get_project_workflow_settings(cls, project_id):
         """
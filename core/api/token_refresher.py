@@ -7,6 +7,7 @@ Designed to work reliably on Heroku with automatic recovery.
 
 import threading
 import time
+import random
 import logging
 import os
 from datetime import datetime, timedelta
@@ -21,22 +22,34 @@ class HerokuTokenRefresher:
     Handles dyno restarts and connection issues gracefully.
     """
 
-    def __init__(self, api_client, refresh_interval=1800):  # 30 minutes
+    def __init__(self, api_client, refresh_interval=1800, refresh_margin=None):
         """
         Initialize the token refresher.
 
         Args:
             api_client: The ReviztoAPI client class
-            refresh_interval: Refresh interval in seconds (default: 30 minutes)
+            refresh_interval: Maximum time in seconds between two checks (default: 30 minutes)
+            refresh_margin: Seconds before token_expiry at which to refresh
+                (default: settings.REVIZTO_TOKEN_REFRESH_MARGIN or 10 minutes)
         """
         self.api_client = api_client
         self.refresh_interval = refresh_interval
+        # Must stay above the 5-minute "expiring soon" threshold used by request paths,
+        # so requests never see an expired token or run the synchronous refresh
+        self.refresh_margin = refresh_margin or getattr(settings, 'REVIZTO_TOKEN_REFRESH_MARGIN', 600)
+        self.retry_base_delay = getattr(settings, 'REVIZTO_TOKEN_REFRESH_RETRY_BASE', 30)
+        self.retry_max_delay = getattr(settings, 'REVIZTO_TOKEN_REFRESH_RETRY_MAX', 900)
         self.refresh_thread = None
         self.stop_event = threading.Event()
         self.last_refresh_time = None
         self.consecutive_failures = 0
         self.max_failures = 5  # Maximum consecutive failures before backing off
 
+        # Planned schedule (exposed in get_status)
+        self.next_check_at = None
+        self.next_check_reason = None
+        self.planned_delay = None
+
         # Heroku-specific settings
         self.is_heroku = bool(os.environ.get('DYNO'))
         self.heroku_dyno_id = os.environ.get('DYNO', 'local')
@@ -67,83 +80,124 @@ class HerokuTokenRefresher:
             logger.info("Token refresh thread is not running")
             return False
 
-    def _calculate_next_refresh_delay(self):
-        """Calculate the next refresh delay with exponential backoff on failures."""
-        base_delay = self.refresh_interval
+    def _get_token_expiry(self):
+        """Get the stored token expiry from the token snapshot (no DB query in the common case)."""
+        from . import token_store
 
-        if self.consecutive_failures > 0:
-            # Exponential backoff: 2^failures minutes, max 2 hours
-            backoff_multiplier = min(2 ** self.consecutive_failures, 240)  # max 4 hours
-            delay = min(base_delay * backoff_multiplier, 7200)  # max 2 hours
-            logger.warning(f"Using backoff delay: {delay}s due to {self.consecutive_failures} consecutive failures")
-            return delay
+        if not token_store.has_tokens():
+            return None
+        return token_store.get_token_expiry()
 
-        return base_delay
+    def _calculate_backoff_delay(self, token_expiry):
+        """
+        Calculate a jittered exponential backoff after a failed refresh.
 
-    def _should_refresh_now(self):
-        """Check if we should refresh the token now."""
-        try:
-            from . import token_store
+        The delay is capped so that, while the current token is still valid, the
+        next attempt always happens before token_expiry.
+        """
+        backoff = min(self.retry_base_delay * (2 ** (self.consecutive_failures - 1)), self.retry_max_delay)
+        delay = random.uniform(backoff / 2, backoff)
 
-            # Check if tokens exist
-            if not token_store.has_tokens():
-                logger.warning("No tokens available, need to refresh")
-                return True
+        if token_expiry:
+            remaining = (token_expiry - timezone.now()).total_seconds()
+            if remaining > 0:
+                # Leave room for at least one more attempt before the token expires
+                delay = min(delay, max(remaining / 2, 5))
 
-            # Check if token is expired or will expire soon
-            if token_store.is_token_expired():
-                logger.info("Token is expired or expiring soon, need to refresh")
-                return True
+        logger.warning(f"Using backoff delay: {delay:.0f}s due to {self.consecutive_failures} consecutive failures")
+        return delay
 
-            return False
+    def _plan_next_check(self, refresh_failed=False):
+        """
+        Compute the next wake-up from the stored expiry minus the safety margin.
+
+        Returns:
+            tuple: (delay_seconds, reason)
+        """
+        try:
+            token_expiry = self._get_token_expiry()
         except Exception as e:
-            logger.error(f"Error checking if refresh needed: {e}")
-            return True  # When in doubt, try to refresh
+            logger.error(f"Error reading token expiry: {e}")
+            token_expiry = None
+
+        if refresh_failed:
+            return self._calculate_backoff_delay(token_expiry), "retry_after_failure"
+
+        if token_expiry is None:
+            return 0, "no_token"
+
+        refresh_at = token_expiry - timedelta(seconds=self.refresh_margin)
+        delay = (refresh_at - timezone.now()).total_seconds()
+        if delay <= 0:
+            return 0, "refresh_due"
+
+        if delay > self.refresh_interval:
+            # Re-plan periodically in case another worker rotated the token
+            return self.refresh_interval, "recheck"
+
+        return delay, "refresh_before_expiry"
 
     def _refresh_loop(self):
         """Main refresh loop that runs in a separate thread."""
         logger.info(f"Token refresh thread started on dyno {self.heroku_dyno_id}")
 
+        refresh_failed = False
         while not self.stop_event.is_set():
             try:
-                # Check if we need to refresh
-                if self._should_refresh_now():
-                    logger.info("Attempting token refresh...")
-                    success = self._attempt_refresh()
-
-                    if success:
-                        self.last_refresh_time = datetime.now()
-                        self.consecutive_failures = 0
-                        logger.info(f"Token refresh successful at {self.last_refresh_time}")
-
-                        # Record successful refresh
-                        try:
-                            from . import token_store
-                            token_store.record_refresh_attempt(success=True)
-                        except Exception as e:
-                            logger.error(f"Error recording successful refresh: {e}")
-                    else:
-                        self.consecutive_failures += 1
-                        logger.error(f"Token refresh failed (attempt {self.consecutive_failures})")
-
-                        # Record failed refresh
-                        try:
-                            from . import token_store
-                            token_store.record_refresh_attempt(success=False)
-                        except Exception as e:
-                            logger.error(f"Error recording failed refresh: {e}")
-
-                        # If we've failed too many times, try to re-initialize from settings
-                        if self.consecutive_failures >= self.max_failures:
-                            logger.warning(f"Too many consecutive failures ({self.consecutive_failures}), attempting re-initialization")
-                            self._attempt_reinitialize()
-
-                # Calculate next refresh delay
-                delay = self._calculate_next_refresh_delay()
-                logger.debug(f"Next token refresh in {delay} seconds")
+                delay, reason = self._plan_next_check(refresh_failed)
+                self.planned_delay = round(delay, 1)
+                self.next_check_reason = reason
+                self.next_check_at = timezone.now() + timedelta(seconds=delay)
+                logger.debug(f"Next token check in {delay:.0f} seconds ({reason})")
 
                 # Wait for the delay or until stop is called
-                self.stop_event.wait(delay)
+                if delay > 0 and self.stop_event.wait(delay):
+                    break
+
+                # Re-plan after a recheck wake-up without refreshing
+                if reason == "recheck":
+                    refresh_failed = False
+                    continue
+
+                if delay > 0 and reason != "retry_after_failure":
+                    # The token may have been rotated by another worker while we slept
+                    retry_delay, retry_reason = self._plan_next_check()
+                    if retry_delay > 0:
+                        refresh_failed = False
+                        continue
+
+                logger.info("Attempting token refresh...")
+                success = self._attempt_refresh()
+
+                if success:
+                    self.last_refresh_time = datetime.now()
+                    self.consecutive_failures = 0
+                    refresh_failed = False
+                    logger.info(f"Token refresh successful at {self.last_refresh_time}")
+
+                    # Record successful refresh
+                    try:
+                        from . import token_store
+                        token_store.record_refresh_attempt(success=True)
+                    except Exception as e:
+                        logger.error(f"Error recording successful refresh: {e}")
+                else:
+                    self.consecutive_failures += 1
+                    refresh_failed = True
+                    logger.error(f"Token refresh failed (attempt {self.consecutive_failures})")
+
+                    # Record failed refresh
+                    try:
+                        from . import token_store
+                        token_store.record_refresh_attempt(success=False)
+                    except Exception as e:
+                        logger.error(f"Error recording failed refresh: {e}")
+
+                    # If we've failed too many times, try to re-initialize from settings
+                    if self.consecutive_failures >= self.max_failures:
+                        logger.warning(f"Too many consecutive failures ({self.consecutive_failures}), attempting re-initialization")
+                        if self._attempt_reinitialize():
+                            refresh_failed = False
 
             except Exception as e:
                 logger.error(f"Unexpected error in refresh loop: {e}")
@@ -199,6 +253,14 @@ class HerokuTokenRefresher:
             "is_heroku": self.is_heroku,
             "dyno_id": self.heroku_dyno_id,
             "refresh_interval": self.refresh_interval,
+            "refresh_margin": self.refresh_margin,
+            "next_check_at": self.next_check_at,
+            "next_check_reason": self.next_check_reason,
+            "planned_delay_seconds": self.planned_delay,
+            "planned_refresh_at": (
+                token_status["token_expiry"] - timedelta(seconds=self.refresh_margin)
+                if token_status.get("token_expiry") else None
+            ),
             "token_status": token_status,
         }
 
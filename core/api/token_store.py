@@ -4,12 +4,30 @@
 A persistent token store using PostgreSQL database storage to survive dyno restarts.
 """
 
+import time
 import logging
-from django.db import transaction
+import threading
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import transaction, connections
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Process-local snapshot of the token row. Request paths read tokens from here
+# instead of querying PostgreSQL; the row is only re-read when the snapshot is
+# missing, close to token_expiry, invalidated, or when a cheap updated_at check
+# shows that another worker has rotated the token.
+# (storage, loaded_at, checked_at), always replaced as a whole under
+# _snapshot_lock so the lock-free fast path reads a consistent triple.
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+# Token refresh is single-flight: an in-process lock serializes threads of one
+# worker and a PostgreSQL advisory lock serializes workers and dynos.
+REFRESH_ADVISORY_LOCK_KEY = 726582781  # arbitrary constant shared by all workers
+_refresh_lock = threading.Lock()
+
 
 def get_token_storage():
     """Get the token storage instance from PostgreSQL database"""
@@ -21,6 +39,77 @@ def get_token_storage():
         return None
 
 
+def _replace_snapshot(storage):
+    """Replace the snapshot with a freshly read/saved storage row (caller holds _snapshot_lock)."""
+    global _snapshot
+
+    now = time.monotonic()
+    _snapshot = (storage, now, now)
+
+
+def _store_snapshot(storage):
+    """Replace the process-local snapshot with a freshly read/saved storage row."""
+    with _snapshot_lock:
+        _replace_snapshot(storage)
+
+
+def invalidate_snapshot():
+    """Drop the process-local snapshot so the next read goes to PostgreSQL."""
+    global _snapshot
+
+    with _snapshot_lock:
+        _snapshot = None
+    logger.debug("Token snapshot invalidated")
+
+
+def _stored_version():
+    """Read only the updated_at column of the token row (cheap rotation check)."""
+    from core.models import TokenStorage
+    return TokenStorage.objects.using('postgres').filter(id=1).values_list('updated_at', flat=True).first()
+
+
+def get_snapshot():
+    """
+    Get the process-local token snapshot, reloading it from PostgreSQL only when needed.
+
+    Returns:
+        TokenStorage: The cached token row, or None if storage is unavailable
+    """
+    global _snapshot
+
+    state = _snapshot
+    check_interval = getattr(settings, 'REVIZTO_TOKEN_SNAPSHOT_CHECK_INTERVAL', 60)
+
+    if state is not None:
+        snapshot, _, checked_at = state
+        if not snapshot.is_token_expired() and time.monotonic() - checked_at < check_interval:
+            return snapshot
+
+    with _snapshot_lock:
+        # Another thread may have reloaded while we waited for the lock
+        state = _snapshot
+        snapshot = state[0] if state is not None else None
+        if snapshot is not None and not snapshot.is_token_expired():
+            loaded_at, checked_at = state[1], state[2]
+            if time.monotonic() - checked_at < check_interval:
+                return snapshot
+
+            try:
+                if _stored_version() == snapshot.updated_at:
+                    _snapshot = (snapshot, loaded_at, time.monotonic())
+                    return snapshot
+                logger.info("Token row changed in PostgreSQL (rotated by another worker), reloading snapshot")
+            except Exception as e:
+                logger.warning(f"Token version check failed, keeping snapshot: {e}")
+                return snapshot
+
+        storage = get_token_storage()
+        if storage is None:
+            return snapshot
+        _replace_snapshot(storage)
+        return storage
+
+
 def set_tokens(access_token, refresh_token, licence_uuid, token_expiry=None, expires_in=3600):
     """Set all tokens at once in PostgreSQL database."""
     try:
@@ -41,6 +130,7 @@ def set_tokens(access_token, refresh_token, licence_uuid, token_expiry=None, exp
                     # Use expires_in seconds
                     storage.update_tokens(access_token, refresh_token, licence_uuid, expires_in)
 
+                _store_snapshot(storage)
                 logger.info("Tokens successfully stored in PostgreSQL database")
                 print(
                     f"[TOKEN-STORE] Tokens saved to PostgreSQL - Access: {len(access_token)} chars, Refresh: {len(refresh_token)} chars")
@@ -55,12 +145,62 @@ def set_tokens(access_token, refresh_token, licence_uuid, token_expiry=None, exp
     return False
 
 
+@contextmanager
+def refresh_lock(timeout=None):
+    """
+    Hold the cross-worker token refresh lock.
+
+    Waits at most `timeout` seconds (default: one refresh round trip, i.e. the
+    oauth2 connect + read timeout) so concurrent callers never queue behind
+    more than one refresh.
+
+    Yields:
+        bool: True if the lock was acquired, False if the wait timed out
+    """
+    if timeout is None:
+        from .transport import get_timeout
+        timeout = sum(get_timeout(family='oauth2')) + 5
+    deadline = time.monotonic() + timeout
+
+    if not _refresh_lock.acquire(timeout=timeout):
+        logger.warning("Timed out waiting for in-process token refresh lock")
+        yield False
+        return
+
+    advisory_locked = False
+    try:
+        try:
+            with connections['postgres'].cursor() as cursor:
+                while True:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s)", [REFRESH_ADVISORY_LOCK_KEY])
+                    advisory_locked = bool(cursor.fetchone()[0])
+                    if advisory_locked or time.monotonic() >= deadline:
+                        break
+                    time.sleep(0.2)
+        except Exception as e:
+            # PostgreSQL unavailable: fall back to the in-process lock only
+            logger.warning(f"Could not take PostgreSQL advisory lock for token refresh: {e}")
+            yield True
+            return
+
+        if not advisory_locked:
+            logger.warning("Timed out waiting for another worker's token refresh")
+        yield advisory_locked
+    finally:
+        if advisory_locked:
+            try:
+                with connections['postgres'].cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [REFRESH_ADVISORY_LOCK_KEY])
+            except Exception as e:
+                logger.error(f"Error releasing token refresh advisory lock: {e}")
+        _refresh_lock.release()
+
+
 def get_access_token():
-    """Get the current access token from PostgreSQL database."""
+    """Get the current access token (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if storage and storage.access_token:
-            print(f"[TOKEN-STORE] Retrieved access token from PostgreSQL ({len(storage.access_token)} chars)")
             return storage.access_token
         else:
             print(f"[TOKEN-STORE] No access token found in PostgreSQL")
@@ -72,11 +212,10 @@ def get_access_token():
 
 
 def get_refresh_token():
-    """Get the current refresh token from PostgreSQL database."""
+    """Get the current refresh token (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if storage and storage.refresh_token:
-            print(f"[TOKEN-STORE] Retrieved refresh token from PostgreSQL ({len(storage.refresh_token)} chars)")
             return storage.refresh_token
         else:
             print(f"[TOKEN-STORE] No refresh token found in PostgreSQL")
@@ -88,11 +227,10 @@ def get_refresh_token():
 
 
 def get_licence_uuid():
-    """Get the current license UUID from PostgreSQL database."""
+    """Get the current license UUID (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if storage and storage.licence_uuid:
-            print(f"[TOKEN-STORE] Retrieved licence UUID from PostgreSQL: {storage.licence_uuid}")
             return storage.licence_uuid
         else:
             print(f"[TOKEN-STORE] No licence UUID found in PostgreSQL")
@@ -104,11 +242,10 @@ def get_licence_uuid():
 
 
 def get_token_expiry():
-    """Get the current token expiry time from PostgreSQL database."""
+    """Get the current token expiry time (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if storage:
-            print(f"[TOKEN-STORE] Token expiry from PostgreSQL: {storage.token_expiry}")
             return storage.token_expiry
         else:
             print(f"[TOKEN-STORE] No token expiry found in PostgreSQL")
@@ -120,18 +257,19 @@ def get_token_expiry():
 
 
 def has_tokens():
-    """Check if all required tokens are available in PostgreSQL database."""
+    """Check if all required tokens are available (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if not storage:
             print(f"[TOKEN-STORE] No token storage instance available")
             return False
 
         has_all = bool(storage.access_token and storage.refresh_token and storage.licence_uuid)
-        print(f"[TOKEN-STORE] Token availability check: {has_all}")
-        print(f"[TOKEN-STORE] - Access token: {'✅' if storage.access_token else '❌'}")
-        print(f"[TOKEN-STORE] - Refresh token: {'✅' if storage.refresh_token else '❌'}")
-        print(f"[TOKEN-STORE] - Licence UUID: {'✅' if storage.licence_uuid else '❌'}")
+        if not has_all:
+            print(f"[TOKEN-STORE] Token availability check: {has_all}")
+            print(f"[TOKEN-STORE] - Access token: {'✅' if storage.access_token else '❌'}")
+            print(f"[TOKEN-STORE] - Refresh token: {'✅' if storage.refresh_token else '❌'}")
+            print(f"[TOKEN-STORE] - Licence UUID: {'✅' if storage.licence_uuid else '❌'}")
         return has_all
     except Exception as e:
         logger.error(f"Error checking token availability: {e}")
@@ -140,17 +278,16 @@ def has_tokens():
 
 
 def is_token_expired():
-    """Check if the current token is expired or will expire soon."""
+    """Check if the current token is expired or will expire soon (from the process-local snapshot)."""
     try:
-        storage = get_token_storage()
+        storage = get_snapshot()
         if not storage:
             print(f"[TOKEN-STORE] No token storage instance, considering expired")
             return True
 
         expired = storage.is_token_expired()
-        print(f"[TOKEN-STORE] Token expiry check: {'🔴 Expired' if expired else '🟢 Valid'}")
-        if storage.token_expiry:
-            print(f"[TOKEN-STORE] Expires at: {storage.token_expiry}")
+        if expired:
+            print(f"[TOKEN-STORE] Token expiry check: 🔴 Expired (expires at: {storage.token_expiry})")
         return expired
     except Exception as e:
         logger.error(f"Error checking token expiry: {e}")
@@ -169,6 +306,7 @@ def update_access_token(new_token, expires_in=3600):
                 storage.last_successful_refresh = timezone.now()
                 storage.refresh_failure_count = 0
                 storage.save(using='postgres')
+                _store_snapshot(storage)
                 print(f"[TOKEN-STORE] Access token updated in PostgreSQL")
                 return True
             else:
@@ -189,6 +327,7 @@ def update_refresh_token(new_token):
             if storage:
                 storage.refresh_token = new_token
                 storage.save(using='postgres')
+                _store_snapshot(storage)
                 print(f"[TOKEN-STORE] Refresh token updated in PostgreSQL")
                 return True
             else:
@@ -207,6 +346,7 @@ def record_refresh_attempt(success=False):
         storage = get_token_storage()
         if storage:
             storage.record_refresh_attempt(success)
+            _store_snapshot(storage)
             print(f"[TOKEN-STORE] Refresh attempt recorded: {'✅ Success' if success else '❌ Failed'}")
         else:
             print(f"[TOKEN-STORE] Could not record refresh attempt - no storage instance")
@@ -222,6 +362,7 @@ def get_token_status():
         if not storage:
             return {"error": "No token storage available"}
 
+        snapshot_state = _snapshot
         status = {
             "has_access_token": bool(storage.access_token),
             "access_token_length": len(storage.access_token) if storage.access_token else 0,
@@ -236,6 +377,8 @@ def get_token_status():
             "refresh_failure_count": storage.refresh_failure_count,
             "created_at": storage.created_at,
             "updated_at": storage.updated_at,
+            "snapshot_loaded": snapshot_state is not None,
+            "snapshot_age_seconds": round(time.monotonic() - snapshot_state[1], 1) if snapshot_state else None,
         }
 
         print(f"[TOKEN-STORE] Status check completed:")
@@ -262,6 +405,7 @@ def clear_all_tokens():
             storage.licence_uuid = None
             storage.token_expiry = None
             storage.save(using='postgres')
+            invalidate_snapshot()
             print(f"[TOKEN-STORE] All tokens cleared from PostgreSQL")
             return True
         return False
@@ -0,0 +1,274 @@
+# core/api/transport.py - Shared HTTP session layer for outbound Revizto calls
+
+"""
+Pooled, keep-alive HTTP transport shared by every outbound call to Revizto.
+
+A single requests.Session is created per process (and re-created after a fork
+so gunicorn workers never share sockets). Its connection pool size, keep-alive
+and per-endpoint timeouts come from Django settings, and pool usage is tracked
+so the pool can be sized against gunicorn worker and thread counts.
+"""
+
+import os
+import re
+import threading
+import logging
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from . import rate_limiter
+from . import circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+# Default (connect, read) timeouts in seconds, keyed by endpoint family
+DEFAULT_TIMEOUTS = {
+    'default': (5, 60),
+    'oauth2': (5, 30),
+    'licences': (5, 30),
+    'license/projects': (5, 30),
+    'project/issue-workflow': (5, 30),
+    'project/issue-filter': (5, 60),
+    'issue/comments': (5, 30),
+    'image': (5, 20),
+}
+
+_ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27,}|[0-9a-fA-F]{32,})$')
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'in_flight': 0,
+    'peak_in_flight': 0,
+    'total_requests': 0,
+    'total_errors': 0,
+    'by_family': {},
+}
+
+
+def endpoint_family(endpoint):
+    """
+    Reduce an endpoint path to a stable family name by dropping ids and UUIDs.
+
+    Examples:
+        project/123/issue-filter/filter  -> project/issue-filter
+        issue/<uuid>/comments/date        -> issue/comments
+        oauth2                            -> oauth2
+    """
+    if not endpoint:
+        return 'default'
+
+    path = endpoint
+    if '://' in path:
+        path = urlsplit(path).path
+    path = path.split('?', 1)[0]
+
+    segments = [s for s in path.strip('/').split('/')
+                if s and not _ID_SEGMENT.match(s) and not _VERSION_SEGMENT.match(s)]
+    if not segments:
+        return 'default'
+    return '/'.join(segments[:2])
+
+
+def get_timeout(endpoint=None, family=None):
+    """Get the (connect, read) timeout for an endpoint from settings or defaults."""
+    timeouts = dict(DEFAULT_TIMEOUTS)
+    timeouts.update(getattr(settings, 'REVIZTO_HTTP_TIMEOUTS', {}) or {})
+
+    family = family or endpoint_family(endpoint)
+    timeout = timeouts.get(family, timeouts['default'])
+    if isinstance(timeout, (int, float)):
+        return (timeouts['default'][0], timeout)
+    return tuple(timeout)
+
+
+def _build_session():
+    """Create a session with a sized connection pool and keep-alive enabled."""
+    pool_connections = getattr(settings, 'REVIZTO_HTTP_POOL_CONNECTIONS', 4)
+    pool_maxsize = getattr(settings, 'REVIZTO_HTTP_POOL_MAXSIZE', 10)
+    pool_block = getattr(settings, 'REVIZTO_HTTP_POOL_BLOCK', False)
+
+    session = requests.Session()
+    # Retries are handled by the API client, so the adapter never retries on its own
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=0,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+
+    logger.info(
+        f"HTTP session created (pid={os.getpid()}, pool_connections={pool_connections}, "
+        f"pool_maxsize={pool_maxsize}, pool_block={pool_block})"
+    )
+    return session
+
+
+def get_session():
+    """Get the process-wide session, re-creating it after a fork."""
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_pid != pid:
+            _session = _build_session()
+            _session_pid = pid
+        return _session
+
+
+def reset_session():
+    """Close the current session so the next call builds a fresh pool."""
+    global _session, _session_pid
+
+    with _session_lock:
+        if _session is not None and _session_pid == os.getpid():
+            try:
+                _session.close()
+            except Exception as e:
+                logger.warning(f"Error closing HTTP session: {e}")
+        _session = None
+        _session_pid = None
+
+
+def request(method, url, endpoint=None, family=None, timeout=None, **kwargs):
+    """
+    Send a request through the shared session.
+
+    Args:
+        method (str): HTTP method
+        url (str): Absolute URL
+        endpoint (str, optional): API endpoint used to pick the timeout
+        family (str, optional): Explicit endpoint family (overrides endpoint)
+        timeout (tuple|float, optional): Explicit timeout (overrides settings)
+        **kwargs: Passed through to requests.Session.request
+
+    Returns:
+        requests.Response: The response
+    """
+    family = family or endpoint_family(endpoint or url)
+    if timeout is None:
+        timeout = get_timeout(family=family)
+
+    with _stats_lock:
+        _stats['in_flight'] += 1
+        _stats['total_requests'] += 1
+        _stats['peak_in_flight'] = max(_stats['peak_in_flight'], _stats['in_flight'])
+        _stats['by_family'][family] = _stats['by_family'].get(family, 0) + 1
+
+    # Fail fast while this family's breaker is open (raises CircuitOpenError)
+    breaker = circuit_breaker.get_breaker(family)
+    # Revizto API calls share the adaptive rate limiter; image downloads from storage do not
+    limiter = rate_limiter.get_limiter() if family != 'image' else None
+    response = None
+    try:
+        breaker.before_request()
+        try:
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = get_session().request(method, url, timeout=timeout, **kwargs)
+            finally:
+                if limiter is not None:
+                    limiter.release(response)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            breaker.record_failure(e)
+            raise
+        except BaseException:
+            breaker.record_ignored()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+    except requests.exceptions.RequestException:
+        with _stats_lock:
+            _stats['total_errors'] += 1
+        raise
+    finally:
+        with _stats_lock:
+            _stats['in_flight'] -= 1
+
+
+def get(url, **kwargs):
+    """Send a GET request through the shared session."""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Send a POST request through the shared session."""
+    return request('POST', url, **kwargs)
+
+
+def download(url, family='image', **kwargs):
+    """
+    Download a resource (e.g. an issue preview image) through the shared session.
+
+    Returns:
+        bytes: The response body
+
+    Raises:
+        requests.exceptions.RequestException: If the download fails
+    """
+    response = get(url, family=family, **kwargs)
+    response.raise_for_status()
+    return response.content
+
+
+def get_pool_status():
+    """
+    Report connection pool usage for sizing against gunicorn workers and threads.
+
+    Returns:
+        dict: Configuration, request counters and per-host pool usage
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+        stats['by_family'] = dict(_stats['by_family'])
+
+    pools = []
+    session = _session if _session_pid == os.getpid() else None
+    if session is not None:
+        adapter = session.get_adapter('https://')
+        pool_manager = getattr(adapter, 'poolmanager', None)
+        if pool_manager is not None:
+            for key in list(pool_manager.pools.keys()):
+                pool = pool_manager.pools.get(key)
+                if pool is None:
+                    continue
+                idle = pool.pool.qsize() if pool.pool is not None else 0
+                pools.append({
+                    'host': f"{pool.scheme}://{pool.host}:{pool.port}",
+                    'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+                    'connections_created': pool.num_connections,
+                    'requests_sent': pool.num_requests,
+                    'idle_connections': idle,
+                })
+
+    return {
+        'pid': os.getpid(),
+        'session_active': session is not None,
+        'pool_connections': getattr(settings, 'REVIZTO_HTTP_POOL_CONNECTIONS', 4),
+        'pool_maxsize': getattr(settings, 'REVIZTO_HTTP_POOL_MAXSIZE', 10),
+        'pool_block': getattr(settings, 'REVIZTO_HTTP_POOL_BLOCK', False),
+        'web_concurrency': os.environ.get('WEB_CONCURRENCY'),
+        'gunicorn_threads': os.environ.get('GUNICORN_THREADS'),
+        'in_flight': stats['in_flight'],
+        'peak_in_flight': stats['peak_in_flight'],
+        'total_requests': stats['total_requests'],
+        'total_errors': stats['total_errors'],
+        'requests_by_family': stats['by_family'],
+        'pools': pools,
+    }
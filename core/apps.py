@@ -17,6 +17,9 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         """Initialize the Revizto API when the app starts."""
+        # Registers the DB query counter used by request timings
+        from . import timing  # noqa: F401
+
         # Avoid running during migrations or when collecting static files
         if any(cmd in sys.argv for cmd in ['migrate', 'collectstatic', 'makemigrations']):
             logger.info("Skipping API initialization during Django management command")
@@ -44,6 +47,10 @@ class CoreConfig(AppConfig):
         # Initialize in a separate thread to avoid blocking Django startup
         threading.Thread(target=self._initialize_api, daemon=True).start()
 
+        # Parse report fonts and decode the logo before the first PDF is requested
+        from . import pdf_assets
+        threading.Thread(target=pdf_assets.warm, daemon=True).start()
+
     def _initialize_api(self):
         """Initialize the API in a separate thread."""
         try:
@@ -156,6 +163,10 @@ class CoreConfig(AppConfig):
             else:
                 print("❌ INITIALIZATION WARNING - API connection issues detected")
 
+            # Index the project list before the first search
+            from .api import project_catalog
+            project_catalog.get_catalog()
+
             print("=" * 60)
             print("🎉 REVIZTO API INITIALIZATION FINISHED")
             print("=" * 60 + "\n")
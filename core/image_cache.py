@@ -0,0 +1,265 @@
+# core/image_cache.py - Disk cache for Revizto preview images
+
+"""
+Persistent, content-addressed cache for downloaded report images.
+
+Layout under settings.REVIZTO_IMAGE_CACHE_DIR:
+
+    index/<sha1 of stable URL[#variant]>  -> sha256 of the image bytes
+    blobs/<ab>/<sha256>                   -> image bytes
+
+Preview URLs are keyed by their stable part (signing and expiry query
+parameters are dropped), and identical images share one blob. Blob mtimes
+are bumped on every hit and the least recently used files are evicted once
+the cache exceeds REVIZTO_IMAGE_CACHE_MAX_BYTES. All writes go through a
+temp file and os.replace, so several workers can share the directory, and a
+missing or wiped directory (Heroku's ephemeral filesystem) just means misses.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that change between requests for the same image (signatures, expiry)
+VOLATILE_PARAMS = {
+    'expires', 'signature', 'key-pair-id', 'policy', 'token', 'sig', 'se', 'st', 'sp', 'sv', 'sr', 'skoid',
+}
+VOLATILE_PREFIXES = ('x-amz-', 'x-goog-')
+
+# Evict at most once per interval per process; evict down to this fraction of the cap
+EVICTION_INTERVAL = 60
+EVICTION_TARGET = 0.9
+
+_lock = threading.Lock()
+_last_eviction = 0.0
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'writes': 0,
+    'evicted_files': 0,
+    'evicted_bytes': 0,
+    'errors': 0,
+    'size_bytes': None,
+}
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def get_cache_dir():
+    return str(getattr(settings, 'REVIZTO_IMAGE_CACHE_DIR', '/tmp/revizto-image-cache'))
+
+
+def get_max_bytes():
+    return getattr(settings, 'REVIZTO_IMAGE_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+
+
+def stable_url_key(url):
+    """
+    Reduce a preview URL to the part that identifies the image.
+
+    Signing and expiry parameters are dropped; the remaining parameters are sorted.
+    """
+    parts = urlsplit(url)
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in VOLATILE_PARAMS and not name.lower().startswith(VOLATILE_PREFIXES)
+    )
+    key = f"{parts.netloc}{parts.path}"
+    if params:
+        key = f"{key}?{urlencode(params)}"
+    return key
+
+
+def _index_path(url, variant=None):
+    key = stable_url_key(url)
+    if variant:
+        key = f"{key}#{variant}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(get_cache_dir(), 'index', digest)
+
+
+def _blob_path(content_hash):
+    return os.path.join(get_cache_dir(), 'blobs', content_hash[:2], content_hash)
+
+
+def _atomic_write(path, data):
+    """Write a file through a unique temp file and os.replace."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get(url, variant=None):
+    """
+    Get cached image bytes for a URL.
+
+    Args:
+        url (str): Image URL
+        variant (str, optional): Derived version of the image (e.g. a normalized size)
+
+    Returns:
+        bytes: The image, or None on a miss
+    """
+    index_path = _index_path(url, variant)
+    try:
+        with open(index_path, 'r') as f:
+            content_hash = f.read().strip()
+
+        blob_path = _blob_path(content_hash)
+        with open(blob_path, 'rb') as f:
+            data = f.read()
+
+        if hashlib.sha256(data).hexdigest() != content_hash:
+            # Truncated or corrupted blob: drop it and treat as a miss
+            logger.warning(f"Image cache blob {content_hash} is corrupted, removing it")
+            _remove(blob_path)
+            _remove(index_path)
+            _count('misses')
+            return None
+
+        # Bump recency for LRU eviction
+        now = time.time()
+        os.utime(blob_path, (now, now))
+        os.utime(index_path, (now, now))
+        _count('hits')
+        return data
+
+    except FileNotFoundError:
+        _count('misses')
+        return None
+    except Exception as e:
+        logger.warning(f"Image cache read failed for {url}: {e}")
+        _count('errors')
+        _count('misses')
+        return None
+
+
+def put(url, data, variant=None):
+    """
+    Store image bytes for a URL (or for a derived variant of it).
+
+    Returns:
+        str: sha256 of the content, or None if the cache could not be written
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    try:
+        blob_path = _blob_path(content_hash)
+        if os.path.exists(blob_path):
+            now = time.time()
+            os.utime(blob_path, (now, now))
+        else:
+            _atomic_write(blob_path, data)
+        _atomic_write(_index_path(url, variant), content_hash.encode('ascii'))
+        _count('writes')
+    except Exception as e:
+        logger.warning(f"Image cache write failed for {url}: {e}")
+        _count('errors')
+        return None
+
+    maybe_evict()
+    return content_hash
+
+
+def _scan():
+    """List (mtime, size, path) of every cache file."""
+    files = []
+    for root, _, names in os.walk(get_cache_dir()):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def maybe_evict(force=False):
+    """Evict least recently used files if the cache is over its byte cap (at most once per interval)."""
+    global _last_eviction
+
+    with _lock:
+        if not force and time.time() - _last_eviction < EVICTION_INTERVAL:
+            return
+        _last_eviction = time.time()
+
+    cache_dir = get_cache_dir()
+    lock_file = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if fcntl is not None:
+            # Only one worker evicts at a time; the others skip this round
+            lock_file = open(os.path.join(cache_dir, '.evict.lock'), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+
+        # Temp files belong to writes in progress in other workers
+        files = [entry for entry in _scan() if not entry[2].endswith(('.evict.lock', '.tmp'))]
+        total = sum(size for _, size, _ in files)
+        max_bytes = get_max_bytes()
+
+        evicted_files = evicted_bytes = 0
+        if total > max_bytes:
+            target = max_bytes * EVICTION_TARGET
+            for mtime, size, path in sorted(files):
+                if total <= target:
+                    break
+                _remove(path)
+                total -= size
+                evicted_files += 1
+                evicted_bytes += size
+            print(f"[IMAGE-CACHE] Evicted {evicted_files} files ({evicted_bytes} bytes), "
+                  f"cache now {total} bytes")
+
+        with _lock:
+            _stats['evicted_files'] += evicted_files
+            _stats['evicted_bytes'] += evicted_bytes
+            _stats['size_bytes'] = total
+
+    except Exception as e:
+        logger.warning(f"Image cache eviction failed: {e}")
+        _count('errors')
+    finally:
+        if lock_file is not None:
+            lock_file.close()
+
+
+def get_status():
+    """Get hit/miss counters and the last measured cache size."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else None
+    stats['cache_dir'] = get_cache_dir()
+    stats['max_bytes'] = get_max_bytes()
+    return stats
@@ -0,0 +1,68 @@
+# core/management/commands/benchmark_pdf.py - PDF generator benchmark
+
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core import pdf_benchmark
+
+
+class Command(BaseCommand):
+    help = ("Benchmark the PDF report generator offline on synthetic projects and compare "
+            "wall time, peak RSS and output size against a stored baseline")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(pdf_benchmark.DEFAULT_SIZES),
+                            help='Issue counts to benchmark (default: 10 100 1000)')
+        parser.add_argument('--repeat', type=int, default=1,
+                            help='Runs per size; wall time is the median (default: 1)')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'pdf_baseline.json'),
+                            help='Baseline file (default: benchmarks/pdf_baseline.json)')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed relative increase over the baseline (default: 0.25)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store this run as the new baseline instead of comparing')
+        parser.add_argument('--verbose-generator', action='store_true',
+                            help="Keep the generator's debug output")
+
+    def handle(self, *args, **options):
+        def progress(size, result):
+            phases = "  ".join(
+                f"{phase} {values['wall_seconds']:.2f}s/{values['peak_rss_mb']:.0f}MB"
+                for phase, values in result['phases'].items()
+            )
+            self.stdout.write(
+                f"{size:>6} issues: {result['total_seconds']:.2f}s  [{phases}]  "
+                f"{result['pages']} pages, {result['output_bytes'] / 1024:.0f} KB, {result['images']} images"
+            )
+
+        self.stdout.write(f"Benchmarking sizes {options['sizes']} ({options['repeat']} run(s) each)")
+        run = pdf_benchmark.run_benchmark(
+            sizes=options['sizes'],
+            repeat=options['repeat'],
+            quiet=not options['verbose_generator'],
+            progress=progress
+        )
+
+        baseline_path = options['baseline']
+        baseline = pdf_benchmark.load_baseline(baseline_path)
+
+        if options['save_baseline'] or baseline is None:
+            pdf_benchmark.save_baseline(baseline_path, run)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+
+        regressions, notes = pdf_benchmark.compare_to_baseline(run, baseline, options['threshold'])
+        for note in notes:
+            self.stdout.write(self.style.WARNING(note))
+
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(
+                f"{len(regressions)} metric(s) regressed more than {options['threshold'] * 100:.0f}% "
+                f"over the baseline from {baseline.get('created')}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"No regression over {options['threshold'] * 100:.0f}% against the baseline from {baseline.get('created')}"
+        ))
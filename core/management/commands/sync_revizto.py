@@ -0,0 +1,62 @@
+# core/management/commands/sync_revizto.py - Fill the local Revizto mirror
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from core.api import mirror
+
+
+class Command(BaseCommand):
+    help = ("Mirror Revizto projects, report issues and comments into the local PostgreSQL database "
+            "(incremental; run it on a schedule shorter than REVIZTO_MIRROR_MAX_AGE)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', type=int, nargs='*',
+                            help='Projects to sync (default: every project of the licence)')
+        parser.add_argument('--full', action='store_true',
+                            help='Rewrite every issue and refetch every comment')
+        parser.add_argument('--issues-only', action='store_true',
+                            help='Do not sync comments')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'REVIZTO_MIRROR_SYNC_WORKERS', 4),
+                            help='Projects synced at once (default: REVIZTO_MIRROR_SYNC_WORKERS)')
+
+    def handle(self, *args, **options):
+        try:
+            licence_projects = mirror.sync_projects()
+        except mirror.MirrorSyncError as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Project list: {len(licence_projects)} projects")
+
+        project_ids = options['project_ids'] or licence_projects
+
+        def sync(project_id):
+            try:
+                return mirror.sync_project(project_id, full=options['full'], comments=not options['issues_only'])
+            finally:
+                # Each worker thread has its own database connections
+                connections.close_all()
+
+        failures = []
+        with ThreadPoolExecutor(max_workers=max(1, options['workers']), thread_name_prefix='mirror-sync') as executor:
+            futures = {project_id: executor.submit(sync, project_id) for project_id in project_ids}
+            for project_id, future in futures.items():
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failures.append(project_id)
+                    self.stdout.write(self.style.ERROR(f"Project {project_id}: {e}"))
+                    continue
+                line = (f"Project {project_id}: {result['issues']} issues ({result['issues_changed']} changed, "
+                        f"{result['issues_removed']} removed), {result['comments_new']} new comments"
+                        f"{' (full)' if result['full'] else ''}")
+                if result['comment_failures']:
+                    failures.append(project_id)
+                    self.stdout.write(self.style.WARNING(f"{line}, {result['comment_failures']} issues failed"))
+                else:
+                    self.stdout.write(line)
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(project_ids)} projects did not sync completely: "
+                               f"{', '.join(str(project_id) for project_id in failures)}")
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(project_ids)} projects"))
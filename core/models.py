@@ -146,4 +146,214 @@ class TokenStorage(models.Model):
         super().delete(*args, **kwargs)
 
     def __str__(self):
-        return f"TokenStorage(expires: {self.token_expiry}, failures: {self.refresh_failure_count})"
\ No newline at end of file
+        return f"TokenStorage(expires: {self.token_expiry}, failures: {self.refresh_failure_count})"
+
+
+class ReportJob(models.Model):
+    """
+    Background PDF report job
+    stored in the PostgreSQL database (table created on first use)
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.CharField(max_length=32, primary_key=True)
+    project_id = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, default=STATUS_QUEUED)
+    stage = models.CharField(max_length=50, blank=True, null=True)
+    progress = models.IntegerField(default=0)
+    error = models.TextField(blank=True, null=True)
+
+    # Stored artifact (the PDF itself, so any dyno can serve it)
+    file_data = models.BinaryField(blank=True, null=True)
+    file_name = models.CharField(max_length=255, blank=True, null=True)
+    file_size = models.BigIntegerField(blank=True, null=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False  # Table created by ensure_table()
+        db_table = 'report_jobs'
+        app_label = 'core'
+
+    @classmethod
+    def ensure_table(cls):
+        """Create the report_jobs table in PostgreSQL if it does not exist yet"""
+        from django.db import connections
+        with connections['postgres'].cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS report_jobs (
+                    id VARCHAR(32) PRIMARY KEY,
+                    project_id VARCHAR(255) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    stage VARCHAR(50),
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    file_data BYTEA,
+                    file_name VARCHAR(255),
+                    file_size BIGINT,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    started_at TIMESTAMP WITH TIME ZONE,
+                    finished_at TIMESTAMP WITH TIME ZONE
+                );
+                CREATE INDEX IF NOT EXISTS report_jobs_project_created
+                    ON report_jobs (project_id, created_at);
+                ALTER TABLE report_jobs ADD COLUMN IF NOT EXISTS file_data BYTEA;
+            """)
+        print(f"[REPORT-JOBS] report_jobs table ready in PostgreSQL")
+
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def __str__(self):
+        return f"ReportJob({self.id}, project={self.project_id}, status={self.status}, {self.progress}%)"
+
+
+class MirrorProject(models.Model):
+    """
+    Revizto project in the local mirror (core/api/mirror.py)
+    stored in the PostgreSQL database (table created on first sync)
+    """
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.CharField(max_length=64, blank=True, null=True)
+    title = models.CharField(max_length=500, blank=True, null=True)
+    updated = models.DateTimeField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+
+    # When each part of the project was last mirrored
+    synced_at = models.DateTimeField(null=True, blank=True)
+    issues_synced_at = models.DateTimeField(null=True, blank=True)
+    comments_synced_at = models.DateTimeField(null=True, blank=True)
+    comments_full_synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False  # Table created by ensure_table()
+        db_table = 'revizto_mirror_projects'
+        app_label = 'core'
+
+    @classmethod
+    def ensure_table(cls):
+        """Create the revizto_mirror_projects table in PostgreSQL if it does not exist yet"""
+        from django.db import connections
+        with connections['postgres'].cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS revizto_mirror_projects (
+                    id BIGINT PRIMARY KEY,
+                    uuid VARCHAR(64),
+                    title VARCHAR(500),
+                    updated TIMESTAMP WITH TIME ZONE,
+                    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    synced_at TIMESTAMP WITH TIME ZONE,
+                    issues_synced_at TIMESTAMP WITH TIME ZONE,
+                    comments_synced_at TIMESTAMP WITH TIME ZONE,
+                    comments_full_synced_at TIMESTAMP WITH TIME ZONE
+                );
+            """)
+
+    def __str__(self):
+        return f"MirrorProject({self.id}, {self.title})"
+
+
+class MirrorIssue(models.Model):
+    """
+    Report issue (stamped A-OB, A-IN or A-DF) in the local mirror
+    stored in the PostgreSQL database (table created on first sync)
+    """
+    uuid = models.CharField(max_length=64, primary_key=True)
+    project_id = models.BigIntegerField()
+    issue_id = models.BigIntegerField()
+    # Position in Revizto's sheet/id order
+    position = models.IntegerField(default=0)
+
+    # Extracted from the payload for filtering
+    status = models.CharField(max_length=64, blank=True, null=True)
+    stamps = models.JSONField(default=list)
+    sheet = models.CharField(max_length=255, blank=True, null=True)
+    created = models.DateTimeField(null=True, blank=True)
+    updated = models.DateTimeField(null=True, blank=True)
+
+    payload = models.JSONField(default=dict)
+    synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        managed = False  # Table created by ensure_table()
+        db_table = 'revizto_mirror_issues'
+        app_label = 'core'
+
+    @classmethod
+    def ensure_table(cls):
+        """Create the revizto_mirror_issues table in PostgreSQL if it does not exist yet"""
+        from django.db import connections
+        with connections['postgres'].cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS revizto_mirror_issues (
+                    uuid VARCHAR(64) PRIMARY KEY,
+                    project_id BIGINT NOT NULL,
+                    issue_id BIGINT NOT NULL,
+                    position INTEGER NOT NULL DEFAULT 0,
+                    status VARCHAR(64),
+                    stamps JSONB NOT NULL DEFAULT '[]'::jsonb,
+                    sheet VARCHAR(255),
+                    created TIMESTAMP WITH TIME ZONE,
+                    updated TIMESTAMP WITH TIME ZONE,
+                    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    synced_at TIMESTAMP WITH TIME ZONE
+                );
+                CREATE INDEX IF NOT EXISTS revizto_mirror_issues_project
+                    ON revizto_mirror_issues (project_id, position);
+                CREATE INDEX IF NOT EXISTS revizto_mirror_issues_project_issue
+                    ON revizto_mirror_issues (project_id, issue_id);
+                CREATE INDEX IF NOT EXISTS revizto_mirror_issues_stamps
+                    ON revizto_mirror_issues USING GIN (stamps);
+            """)
+
+    def __str__(self):
+        return f"MirrorIssue({self.project_id}/{self.issue_id}, status={self.status})"
+
+
+class MirrorComment(models.Model):
+    """
+    Issue comment in the local mirror
+    stored in the PostgreSQL database (table created on first sync)
+    """
+    id = models.BigAutoField(primary_key=True)
+    issue_uuid = models.CharField(max_length=64)
+    # Identity of the comment within its issue (see comment_store.comment_key)
+    comment_key = models.CharField(max_length=128)
+    type = models.CharField(max_length=32, blank=True, null=True)
+    created = models.DateTimeField(null=True, blank=True)
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        managed = False  # Table created by ensure_table()
+        db_table = 'revizto_mirror_comments'
+        app_label = 'core'
+
+    @classmethod
+    def ensure_table(cls):
+        """Create the revizto_mirror_comments table in PostgreSQL if it does not exist yet"""
+        from django.db import connections
+        with connections['postgres'].cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS revizto_mirror_comments (
+                    id BIGSERIAL PRIMARY KEY,
+                    issue_uuid VARCHAR(64) NOT NULL,
+                    comment_key VARCHAR(128) NOT NULL,
+                    type VARCHAR(32),
+                    created TIMESTAMP WITH TIME ZONE,
+                    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                    UNIQUE (issue_uuid, comment_key)
+                );
+                CREATE INDEX IF NOT EXISTS revizto_mirror_comments_issue_created
+                    ON revizto_mirror_comments (issue_uuid, created);
+            """)
+
+    def __str__(self):
+        return f"MirrorComment({self.issue_uuid}, {self.type}, {self.created})"
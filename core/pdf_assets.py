@@ -0,0 +1,193 @@
+# core/pdf_assets.py - Process-wide fonts and logo for ReviztoPDF
+
+"""
+Loads the report fonts and header logo once per process.
+
+The NotoSans TTFs are parsed into fpdf font objects once. Each ReviztoPDF gets
+a copy that shares the parsed metrics and has its own glyph subset and
+fontTools handle (fpdf subsets the font in place when it writes the file). The
+header logo is resolved through STATIC_ROOT/STATICFILES_DIRS and decoded once;
+its decoded image info is seeded into each document's image cache, so fpdf
+neither re-reads nor re-decodes it.
+
+warm() is called from CoreConfig.ready() at worker boot. mark_first_pdf()
+records how long after startup the first report was produced.
+"""
+
+import io
+import os
+import copy
+import time
+import hashlib
+import logging
+import threading
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FONT_FAMILY = 'NotoSans'
+FONT_FILES = {
+    '': 'NotoSans-Regular.ttf',
+    'B': 'NotoSans-Bold.ttf',
+    'I': 'NotoSans-Italic.ttf',
+}
+LOGO_FILE = os.path.join('images', 'STGM_Logotype_RVB_Architecture_Noir.png')
+
+# Measured from the first import (CoreConfig.ready() at worker boot)
+_process_started = time.monotonic()
+
+_lock = threading.Lock()
+_fonts = None   # style -> (font file bytes, template TTFFont)
+_logo = None    # (logo bytes, fpdf image key, decoded image info) or False if missing
+_timings = {
+    'fonts_load_seconds': None,
+    'logo_load_seconds': None,
+    'warmed_after_seconds': None,
+    'first_pdf_after_seconds': None,
+}
+
+
+def _load_fonts():
+    """Parse the report fonts with a throwaway document."""
+    from fpdf import FPDF
+
+    fonts_dir = os.path.join(settings.BASE_DIR, 'static', 'fonts')
+    loader = FPDF()
+    fonts = {}
+    for style, file_name in FONT_FILES.items():
+        path = os.path.join(fonts_dir, file_name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        loader.add_font(FONT_FAMILY, style, path)
+        fonts[style] = (data, loader.fonts[f"{FONT_FAMILY.lower()}{style}"])
+    return fonts
+
+
+def get_fonts():
+    """Get the parsed report fonts, loading them on first use."""
+    global _fonts
+    if _fonts is None:
+        with _lock:
+            if _fonts is None:
+                start = time.monotonic()
+                _fonts = _load_fonts()
+                _timings['fonts_load_seconds'] = round(time.monotonic() - start, 3)
+                print(f"[PDF-ASSETS] Loaded {len(_fonts)} fonts in {_timings['fonts_load_seconds']}s")
+    return _fonts
+
+
+def install_fonts(pdf):
+    """Register the report fonts on a document, reusing the parsed fonts."""
+    from fontTools import ttLib
+    from fpdf.fonts import SubsetMap
+
+    for style, (data, template) in get_fonts().items():
+        font = copy.copy(template)
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, fontNumber=0, lazy=True)
+        font.hbfont = None
+        font.missing_glyphs = []
+        font.subset = SubsetMap(font)
+        pdf.fonts[font.fontkey] = font
+    return FONT_FAMILY
+
+
+def find_logo_path():
+    """Find the header logo in STATIC_ROOT, then STATICFILES_DIRS."""
+    candidates = [os.path.join(settings.STATIC_ROOT, LOGO_FILE)]
+    candidates += [os.path.join(static_dir, LOGO_FILE) for static_dir in getattr(settings, 'STATICFILES_DIRS', [])]
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _load_logo():
+    from fpdf.image_parsing import get_img_info
+
+    path = find_logo_path()
+    if not path:
+        logger.warning(f"Logo file not found ({LOGO_FILE})")
+        return False
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Same key fpdf computes for images passed as bytes
+    key = hashlib.md5(data.strip(), usedforsecurity=False).hexdigest()
+    info = get_img_info(key, io.BytesIO(data))
+    if info.get('iccp'):
+        # ICC profiles are numbered per document, leave those to fpdf
+        info = None
+    return data, key, info
+
+
+def get_logo():
+    """
+    Get the header logo, resolving and decoding it on first use.
+
+    Returns:
+        tuple: (logo bytes, fpdf image key, decoded image info or None), or None if there is no logo
+    """
+    global _logo
+    if _logo is None:
+        with _lock:
+            if _logo is None:
+                start = time.monotonic()
+                try:
+                    _logo = _load_logo()
+                except Exception as e:
+                    logger.error(f"Error loading logo: {e}")
+                    _logo = False
+                _timings['logo_load_seconds'] = round(time.monotonic() - start, 3)
+                print(f"[PDF-ASSETS] Loaded logo in {_timings['logo_load_seconds']}s")
+    return _logo or None
+
+
+def install_logo(pdf):
+    """
+    Seed a document's image cache with the decoded logo.
+
+    Returns:
+        bytes: The logo to pass to pdf.image(), or None if there is no logo
+    """
+    logo = get_logo()
+    if not logo:
+        return None
+
+    data, key, info = logo
+    if info is not None and key not in pdf.image_cache.images:
+        seeded = copy.copy(info)
+        seeded['i'] = len(pdf.image_cache.images) + 1
+        seeded['usages'] = 0
+        seeded['iccp_i'] = None
+        pdf.image_cache.images[key] = seeded
+    return data
+
+
+def warm():
+    """Load fonts and logo ahead of the first report (called at worker boot)."""
+    try:
+        get_fonts()
+        get_logo()
+        _timings['warmed_after_seconds'] = round(time.monotonic() - _process_started, 3)
+        print(f"[PDF-ASSETS] Warmed {_timings['warmed_after_seconds']}s after startup")
+    except Exception as e:
+        logger.error(f"Could not warm PDF assets: {e}")
+
+
+def mark_first_pdf():
+    """Record the startup-to-first-PDF time (only the first call counts)."""
+    if _timings['first_pdf_after_seconds'] is None:
+        with _lock:
+            if _timings['first_pdf_after_seconds'] is None:
+                _timings['first_pdf_after_seconds'] = round(time.monotonic() - _process_started, 3)
+                print(f"[PDF-ASSETS] First PDF produced {_timings['first_pdf_after_seconds']}s after startup")
+
+
+def get_status():
+    """Get what is loaded and the startup timings."""
+    return {
+        'fonts_loaded': _fonts is not None,
+        'logo_loaded': bool(_logo),
+        **_timings,
+    }
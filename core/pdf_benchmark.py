@@ -0,0 +1,446 @@
+# core/pdf_benchmark.py - Offline benchmark of the PDF report generator
+
+"""
+Measures how generate_report_pdf scales with project size.
+
+Each run builds a synthetic project (observations, instructions and
+deficiencies with text, markup, file and diff comment histories), generates
+local image fixtures and serves them from a loopback HTTP server, so the real
+prefetch/normalize pipeline runs without reaching Revizto. Per size it records
+wall time and peak RSS of each phase (data, prefetch, render), the page count
+and the output size.
+
+Results are compared against a stored baseline: any metric worse than the
+baseline by more than the threshold is a regression. Run it with
+`python manage.py benchmark_pdf`.
+"""
+
+import gc
+import os
+import re
+import sys
+import json
+import time
+import logging
+import random
+import shutil
+import platform
+import tempfile
+import threading
+import contextlib
+import statistics
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+DEFAULT_SIZES = (10, 100, 1000)
+PHASES = ('data', 'prefetch', 'render')
+
+# Changes smaller than these are noise, whatever the ratio (RSS depends on
+# allocator state and thread timing)
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 50
+
+FIXTURE_PHOTOS = 12
+FIXTURE_MARKUPS = 6
+
+CLOSED_STATUS = '135b58c6-1e14-4716-a134-bbba2bbc90a7'
+STATUS_MAP = {
+    'a0e6f2d4-0000-4000-8000-000000000001': {'name': 'Open', 'displayName': 'Ouvert',
+                                             'textColor': '#FFFFFF', 'backgroundColor': '#E0464E', 'category': 'open'},
+    'a0e6f2d4-0000-4000-8000-000000000002': {'name': 'In progress', 'displayName': 'En cours',
+                                             'textColor': '#FFFFFF', 'backgroundColor': '#F5A623', 'category': 'open'},
+    'a0e6f2d4-0000-4000-8000-000000000003': {'name': 'Solved', 'displayName': 'Résolu',
+                                             'textColor': '#FFFFFF', 'backgroundColor': '#3BB273', 'category': 'solved'},
+    CLOSED_STATUS: {'name': 'Closed', 'displayName': 'Fermé',
+                    'textColor': '#FFFFFF', 'backgroundColor': '#6F7E93', 'category': 'closed'},
+}
+
+WORDS = (
+    "mur béton coffrage armature dalle fenêtre cadre porte étanchéité toiture solin membrane "
+    "gypse plafond escalier garde-corps ventilation gaine plomberie drain électricité panneau "
+    "corriger vérifier remplacer ajuster compléter nettoyer sceller peinturer aligner fixer "
+    "selon plans devis niveau 2 axe B-4 côté nord façade est local 104 corridor"
+).split()
+AUTHORS = (
+    {'firstname': 'Marie', 'lastname': 'Tremblay'},
+    {'firstname': 'Jean', 'lastname': 'Gagnon'},
+    {'firstname': 'Sophie', 'lastname': 'Côté'},
+    {'email': 'chantier@example.com'},
+)
+
+
+# ===== Image fixtures =====
+
+def make_image_fixtures(directory, seed=0):
+    """
+    Write photo-like JPEGs and markup PNGs (with alpha) to a directory.
+
+    Returns:
+        dict: 'photos' and 'markups', lists of file names
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    fixtures = {'photos': [], 'markups': []}
+
+    for i in range(FIXTURE_PHOTOS):
+        # Noise over a gradient compresses like a site photo, not like a flat color
+        width, height = rng.choice(((2400, 1800), (1800, 2400), (1600, 1200)))
+        noise = Image.effect_noise((width, height), rng.randint(30, 60)).convert('RGB')
+        gradient = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+        tint = Image.new('RGB', (width, height), (rng.randint(60, 200), rng.randint(60, 200), rng.randint(60, 200)))
+        photo = Image.blend(Image.blend(gradient, tint, 0.5), noise, 0.3)
+        name = f"photo_{i}.jpg"
+        photo.save(os.path.join(directory, name), 'JPEG', quality=92)
+        fixtures['photos'].append(name)
+
+    for i in range(FIXTURE_MARKUPS):
+        markup = Image.new('RGBA', (1600, 1000), (255, 255, 255, 0))
+        draw = ImageDraw.Draw(markup)
+        for _ in range(20):
+            x, y = rng.randint(0, 1500), rng.randint(0, 900)
+            draw.rectangle((x, y, x + rng.randint(20, 300), y + rng.randint(20, 200)),
+                           outline=(220, 30, 30, 255), width=6)
+        name = f"markup_{i}.png"
+        markup.save(os.path.join(directory, name), 'PNG')
+        fixtures['markups'].append(name)
+
+    return fixtures
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_directory(directory):
+    """Serve a directory over HTTP on the loopback interface and yield its base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(_QuietHandler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# ===== Synthetic project =====
+
+def _sentence(rng, min_words=6, max_words=30):
+    text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+    return text[0].upper() + text[1:] + "."
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def make_synthetic_project(size, image_base_url, fixtures, seed=0):
+    """
+    Build report inputs for a project with `size` issues.
+
+    Issues are split 50/30/20 between observations, instructions and
+    deficiencies, about 10% are closed, and each has 0-15 comments mixing text,
+    markup, file and diff entries. Image URLs point at the fixtures with a
+    per-issue query string, so every issue has its own URLs (as with Revizto)
+    over a small set of files.
+
+    Returns:
+        dict: project_info, observations, instructions, deficiencies, issue_comments, status_map
+    """
+    rng = random.Random(seed * 100003 + size)
+    start = datetime(2024, 1, 8, 8, 0)
+    open_statuses = [uuid for uuid in STATUS_MAP if uuid != CLOSED_STATUS]
+
+    def image_url(kind, issue_id, n):
+        names = fixtures['photos'] if kind == 'photo' else fixtures['markups']
+        return f"{image_base_url}{rng.choice(names)}?issue={issue_id}&n={n}"
+
+    sections = {'observations': [], 'instructions': [], 'deficiencies': []}
+    issue_comments = {}
+
+    for i in range(size):
+        issue_id = 10000 + i
+        created = start + timedelta(hours=rng.randint(0, 24 * 300))
+        status = CLOSED_STATUS if rng.random() < 0.1 else rng.choice(open_statuses)
+        issue = {
+            'id': issue_id,
+            'title': _sentence(rng, 3, 10),
+            'customStatus': {'value': status},
+            'created': {'value': _iso(created)},
+            'updated': _iso(created + timedelta(days=rng.randint(0, 30))),
+            'assignee': {'value': rng.choice(('Entrepreneur général', 'Électricien', 'Plombier', ''))},
+            'sheet': {'value': {'number': f"A-{rng.randint(100, 599)}", 'name': f"Plan niveau {rng.randint(1, 6)}"}},
+            'openLinks': {'web': f"https://ws.revizto.com/issue/{issue_id}", 'desktop': f"revizto://issue/{issue_id}"},
+            'preview': {'small': image_url('photo', issue_id, 'preview')} if rng.random() < 0.7 else None,
+        }
+
+        roll = rng.random()
+        section = 'observations' if roll < 0.5 else 'instructions' if roll < 0.8 else 'deficiencies'
+        sections[section].append(issue)
+
+        comments = []
+        for n in range(rng.randint(0, 15)):
+            kind = rng.choices(('text', 'markup', 'file', 'diff'), weights=(60, 15, 20, 5))[0]
+            comment = {
+                'type': kind,
+                'author': rng.choice(AUTHORS),
+                'created': _iso(created + timedelta(hours=rng.randint(1, 24 * 60))),
+            }
+            if kind == 'text':
+                comment['text'] = " ".join(_sentence(rng) for _ in range(rng.randint(1, 4)))
+            elif kind == 'markup':
+                url = image_url('markup', issue_id, n)
+                comment['preview'] = {'small': url, 'middle': url}
+            elif kind == 'file':
+                url = image_url('photo', issue_id, n)
+                comment.update({'mimetype': 'image/jpeg', 'filename': f"IMG_{issue_id}_{n}.jpg",
+                                'preview': {'small': url, 'middle': url}})
+            else:
+                comment['diff'] = {'status': {'old': open_statuses[0], 'new': status}}
+            comments.append(comment)
+        issue_comments[str(issue_id)] = comments
+
+    project_info = {
+        'id': 1,
+        'architectFile': 'BENCH-001',
+        'projectName': f"Projet synthétique {size}",
+        'projectOwner': 'Maître d’ouvrage',
+        'contractor': 'Entrepreneur général',
+        'visitNumber': '12',
+        'visitBy': 'Architecte',
+        'visitDate': '2024-11-04',
+        'inPresenceOf': 'Surintendant, chargé de projet',
+        'reportDate': '2024-11-05',
+        'description': " ".join(_sentence(rng) for _ in range(5)),
+        'distribution': 'Client, entrepreneur',
+        'imageUrl': '',
+    }
+    return {'project_info': project_info, 'status_map': STATUS_MAP, 'issue_comments': issue_comments, **sections}
+
+
+# ===== Measurement =====
+
+def _current_rss():
+    """Resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        # Peak rather than current outside Linux (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    """Track the peak RSS while a phase runs by sampling it on a thread."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = _current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _current_rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _current_rss())
+
+
+# Loggers of the code under benchmark, raised to WARNING in quiet mode
+GENERATOR_LOGGERS = ('core.pdf_generator', 'core.report_images', 'core.image_cache', 'core.pdf_assets',
+                     'core.api.transport')
+
+
+@contextlib.contextmanager
+def _quiet(quiet):
+    """Silence the generator's debug prints (stdout) and info logging (stderr)."""
+    if not quiet:
+        yield
+        return
+
+    loggers = [logging.getLogger(name) for name in GENERATOR_LOGGERS]
+    levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(max(logger.getEffectiveLevel(), logging.WARNING))
+    try:
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+            yield
+    finally:
+        for logger, level in zip(loggers, levels):
+            logger.setLevel(level)
+
+
+@contextlib.contextmanager
+def _phase(results, name, quiet):
+    # Start each phase without the previous phase's garbage
+    gc.collect()
+    start = time.perf_counter()
+    with RssSampler() as rss, _quiet(quiet):
+        yield
+    results[name] = {
+        'wall_seconds': round(time.perf_counter() - start, 4),
+        'peak_rss_mb': round(rss.peak / (1024 * 1024), 1),
+    }
+
+
+def count_pages(pdf_bytes):
+    return len(re.findall(rb'/Type\s*/Page\b', pdf_bytes))
+
+
+def run_once(size, image_base_url, fixtures, image_cache_dir, quiet=True):
+    """Generate one synthetic report with a cold image cache and measure each phase."""
+    from django.test.utils import override_settings
+    from .pdf_generator import generate_report_pdf, is_closed_issue
+    from .report_images import collect_report_images, prefetch_images
+
+    shutil.rmtree(image_cache_dir, ignore_errors=True)
+    phases = {}
+    with override_settings(REVIZTO_IMAGE_CACHE_DIR=image_cache_dir):
+        with _phase(phases, 'data', quiet):
+            project = make_synthetic_project(size, image_base_url, fixtures)
+
+        with _phase(phases, 'prefetch', quiet):
+            report_issues = [issue for section in ('observations', 'instructions', 'deficiencies')
+                             for issue in project[section] if not is_closed_issue(issue)]
+            images = prefetch_images(collect_report_images(report_issues, project['issue_comments']))
+
+        with _phase(phases, 'render', quiet):
+            pdf_bytes = generate_report_pdf(
+                1,
+                project['project_info'],
+                project['observations'],
+                project['instructions'],
+                project['deficiencies'],
+                project['issue_comments'],
+                project['status_map'],
+                prefetched_images=images
+            ).getvalue()
+
+    return {
+        'phases': phases,
+        'pages': count_pages(pdf_bytes),
+        'output_bytes': len(pdf_bytes),
+        'images': len(images),
+    }
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, repeat=1, quiet=True, progress=None):
+    """
+    Run the benchmark for each size (median wall time and max RSS over `repeat` runs).
+
+    Returns:
+        dict: Results keyed by size (as str), plus environment info
+    """
+    from . import pdf_assets
+
+    work_dir = tempfile.mkdtemp(prefix='pdf-benchmark-')
+    results = {}
+    try:
+        fixture_dir = os.path.join(work_dir, 'fixtures')
+        os.makedirs(fixture_dir)
+        fixtures = make_image_fixtures(fixture_dir)
+
+        # Fonts and logo are loaded at worker boot in production
+        with _quiet(quiet):
+            pdf_assets.warm()
+
+        with serve_directory(fixture_dir) as base_url:
+            for size in sizes:
+                runs = [run_once(size, base_url, fixtures, os.path.join(work_dir, 'image-cache'), quiet)
+                        for _ in range(repeat)]
+                result = {
+                    'phases': {
+                        phase: {
+                            'wall_seconds': round(statistics.median(run['phases'][phase]['wall_seconds'] for run in runs), 4),
+                            'peak_rss_mb': max(run['phases'][phase]['peak_rss_mb'] for run in runs),
+                        }
+                        for phase in PHASES
+                    },
+                    'pages': runs[-1]['pages'],
+                    'output_bytes': runs[-1]['output_bytes'],
+                    'images': runs[-1]['images'],
+                }
+                result['total_seconds'] = round(sum(p['wall_seconds'] for p in result['phases'].values()), 4)
+                results[str(size)] = result
+                if progress:
+                    progress(size, result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+# ===== Baseline =====
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, run):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(run, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare_to_baseline(run, baseline, threshold):
+    """
+    Compare a run to the baseline.
+
+    Args:
+        threshold (float): Allowed relative increase (0.2 = 20%)
+
+    Returns:
+        tuple: (regressions, notes) - lists of human readable lines
+    """
+    regressions = []
+    notes = []
+
+    def check(label, current, previous, min_delta=0):
+        if not previous:
+            return
+        ratio = current / previous
+        if ratio > 1 + threshold and current - previous > min_delta:
+            regressions.append(f"{label}: {previous} -> {current} (+{(ratio - 1) * 100:.0f}%)")
+
+    for size, result in run['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            notes.append(f"size {size}: not in baseline")
+            continue
+        for phase in PHASES:
+            current_phase = result['phases'][phase]
+            previous_phase = previous['phases'].get(phase, {})
+            check(f"size {size} {phase} wall_seconds", current_phase['wall_seconds'],
+                  previous_phase.get('wall_seconds'), MIN_SECONDS_DELTA)
+            check(f"size {size} {phase} peak_rss_mb", current_phase['peak_rss_mb'],
+                  previous_phase.get('peak_rss_mb'), MIN_RSS_DELTA_MB)
+        check(f"size {size} output_bytes", result['output_bytes'], previous.get('output_bytes'))
+        if result['pages'] != previous.get('pages'):
+            notes.append(f"size {size}: pages {previous.get('pages')} -> {result['pages']}")
+
+    return regressions, notes
@@ -4,14 +4,12 @@ Using fpdf2 library to create PDF reports
 """
 
 from fpdf import FPDF
-import base64
-import re
 import os
 import logging
 from datetime import datetime
-import tempfile
 from io import BytesIO
 from static import fonts
+from . import timing
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -21,20 +19,10 @@ class ReviztoPDF(FPDF):
     def __init__(self, orientation='P', unit='mm', format='A4'):
         super().__init__(orientation, unit, format)
 
-        # Load Unicode font
+        # Load Unicode font (parsed once per process, see pdf_assets)
         try:
-            from django.conf import settings
-            import os
-
-            fonts_dir = os.path.join(settings.BASE_DIR, 'static', 'fonts')
-
-            # Add Noto Sans fonts
-            self.add_font('NotoSans', '', os.path.join(fonts_dir, 'NotoSans-Regular.ttf'))
-            self.add_font('NotoSans', 'B', os.path.join(fonts_dir, 'NotoSans-Bold.ttf'))
-            self.add_font('NotoSans', 'I', os.path.join(fonts_dir, 'NotoSans-Italic.ttf'))
-
-            self.default_font = 'NotoSans'
-            print("[DEBUG] Loaded Noto Sans font successfully")
+            from . import pdf_assets
+            self.default_font = pdf_assets.install_fonts(self)
 
         except Exception as e:
             print(f"[DEBUG] Could not load Noto Sans, using helvetica: {e}")
@@ -48,6 +36,40 @@ class ReviztoPDF(FPDF):
         self.project_name = ""
         self.report_date = ""
         self.visitNumber = ""
+        # Images normalized by the prefetch stage (URL -> ReportImage, None if it failed)
+        self.prefetched_images = {}
+        # Remote images drawn as "Image indisponible" placeholders
+        self.images_failed = 0
+
+    def get_report_image(self, image_url, slot_mm):
+        """Get a normalized remote image from the prefetch stage, fetching it now if it was not prefetched"""
+        if image_url in self.prefetched_images:
+            report_image = self.prefetched_images[image_url]
+        else:
+            from .report_images import fetch_image
+            report_image = fetch_image(image_url, slot_mm)
+        if report_image is None:
+            self.images_failed += 1
+        return report_image
+
+    def get_image_stats(self):
+        """
+        Count the images in the document.
+
+        Images are passed to fpdf as bytes, which fpdf registers under the md5 of
+        their content: an image used several times (best image also in the gallery,
+        markup preview shared by issues, the header logo) is embedded once and
+        referenced from every place it is drawn.
+
+        Returns:
+            dict: embedded (distinct XObjects), references (placements) and embedded_bytes
+        """
+        images = [info for info in self.image_cache.images.values() if info.get('usages')]
+        return {
+            'embedded': len(images),
+            'references': sum(info['usages'] for info in images),
+            'embedded_bytes': sum(len(info.get('data') or b'') for info in images),
+        }
 
     def set_unicode_font(self, style='', size=10):
         """Set font with Unicode support"""
@@ -67,26 +89,14 @@ class ReviztoPDF(FPDF):
         Custom header for each page
         """
         try:
-            # Check if using a custom logo from static folder
-            from django.conf import settings
-            import os
-
-            # Try to find logo in static files
-            logo_path = os.path.join(settings.STATIC_ROOT, 'images', 'STGM_Logotype_RVB_Architecture_Noir.png')
-
-            # If not in STATIC_ROOT, try STATICFILES_DIRS
-            if not os.path.exists(logo_path) and hasattr(settings, 'STATICFILES_DIRS'):
-                for static_dir in settings.STATICFILES_DIRS:
-                    test_path = os.path.join(static_dir, 'images', 'STGM_Logotype_RVB_Architecture_Noir.png')
-                    if os.path.exists(test_path):
-                        logo_path = test_path
-                        break
-
-            if os.path.exists(logo_path):
-                self.image(logo_path, 6, 8, 50)
+            # Logo resolved and decoded once per process (see pdf_assets)
+            from . import pdf_assets
+            logo = pdf_assets.install_logo(self)
+
+            if logo:
+                self.image(logo, 6, 8, 50)
             else:
                 # Default behavior if no logo found
-                logger.warning(f"Logo file not found at {logo_path}")
                 self.set_unicode_font( 'B', 15)
                 self.cell(0, 10, 'STGM Architecture', 0, 1, 'C')
         except Exception as e:
@@ -403,97 +413,60 @@ class ReviztoPDF(FPDF):
         # Add image if available
         if image_url:
             try:
-                temp_file = None
-                try:
-                    # Handle base64 data URLs
-                    if image_url.startswith('data:image'):
-                        # Extract the base64 data
-                        img_data = re.sub('^data:image/.+;base64,', '', image_url)
-                        # Create temporary file with unique name
-                        import uuid
-                        temp_file = os.path.join(tempfile.gettempdir(), f"revizto_img_{uuid.uuid4()}.png")
-                        with open(temp_file, 'wb') as f:
-                            f.write(base64.b64decode(img_data))
-                    # Handle HTTP URLs by downloading the image
-                    elif image_url.startswith(('http://', 'https://')):
-                        import urllib.request
-                        import uuid
-                        temp_file = os.path.join(tempfile.gettempdir(), f"revizto_img_{uuid.uuid4()}.png")
-                        urllib.request.urlretrieve(image_url, temp_file)
-                    else:
-                        # Assume it's a local file path
-                        temp_file = image_url
-
-                    # Fixed top padding
-                    top_padding = 2  # Space from the top edge of column
-                    side_padding = 2  # Space from the sides
-
-                    # Maximum available space for the image
-                    max_width = image_col_width - (side_padding * 2)
-                    max_height = top_section_height - (top_padding * 2)
-
-                    # Get original image dimensions to maintain aspect ratio
-                    try:
-                        from PIL import Image
-                        img = Image.open(temp_file)
-                        img_width, img_height = img.size
-                        aspect_ratio = img_width / img_height
-                        img.close()  # Important: Close the PIL Image after getting dimensions
-                    except Exception as img_err:
-                        logger.error(f"Error getting image dimensions: {img_err}")
-                        # If PIL not available or error, use a default aspect ratio
-                        aspect_ratio = 4 / 3  # Common default
-
-                    # Calculate dimensions while preserving aspect ratio
-                    if aspect_ratio > 1:  # Wider than tall
-                        # Width is the limiting factor
-                        image_width = max_width
-                        image_height = image_width / aspect_ratio
-                        # Check if height exceeds maximum
-                        if image_height > max_height:
-                            image_height = max_height
-                            image_width = image_height * aspect_ratio
-                    else:  # Taller than wide or square
-                        # Height is the limiting factor
+                from .report_images import CARD_IMAGE_SLOT_MM, load_inline_image
+                # HTTP URLs were downloaded and normalized by the prefetch stage,
+                # data URLs and local paths are decoded in memory
+                if image_url.startswith(('http://', 'https://')):
+                    report_image = self.get_report_image(image_url, CARD_IMAGE_SLOT_MM)
+                    if report_image is None:
+                        raise ValueError(f"Image unavailable: {image_url}")
+                else:
+                    report_image = load_inline_image(image_url)
+
+                # Fixed top padding
+                top_padding = 2  # Space from the top edge of column
+                side_padding = 2  # Space from the sides
+
+                # Maximum available space for the image
+                max_width = image_col_width - (side_padding * 2)
+                max_height = top_section_height - (top_padding * 2)
+
+                # Dimensions come from the image header, fpdf decodes the image once
+                img_width, img_height = report_image.size
+                aspect_ratio = img_width / img_height
+
+                # Calculate dimensions while preserving aspect ratio
+                if aspect_ratio > 1:  # Wider than tall
+                    # Width is the limiting factor
+                    image_width = max_width
+                    image_height = image_width / aspect_ratio
+                    # Check if height exceeds maximum
+                    if image_height > max_height:
                         image_height = max_height
                         image_width = image_height * aspect_ratio
-                        # Check if width exceeds maximum
-                        if image_width > max_width:
-                            image_width = max_width
-                            image_height = image_width / aspect_ratio
-
-                    # Calculate Y position - fixed at top with padding
-                    image_y = top_section_y + top_padding
-
-                    # Center the image horizontally
-                    image_x = image_col_x + ((image_col_width - image_width) / 2)
-
-                    # Add image to PDF (without specifying height will maintain aspect ratio)
-                    self.image(temp_file, x=image_x, y=image_y, w=image_width)
-
-                finally:
-                    # Clean up temp file in a finally block to ensure it happens even if there was an error
-                    if temp_file and temp_file != image_url and os.path.exists(temp_file):
-                        try:
-                            # Close any open file handles before deleting
-                            import gc
-                            gc.collect()  # Force garbage collection to release any file handles
-
-                            # Try to remove the temp file
-                            os.remove(temp_file)
-                            logger.info(f"Successfully removed temp file: {temp_file}")
-                        except Exception as cleanup_err:
-                            logger.warning(f"Could not remove temp file {temp_file}: {cleanup_err}")
-                            # If we can't remove it, try to use the Windows del command as a fallback
-                            if os.name == 'nt':  # Windows
-                                try:
-                                    import subprocess
-                                    subprocess.run(f'del /f /q "{temp_file}"', shell=True)
-                                    logger.info(f"Used del command to remove temp file: {temp_file}")
-                                except Exception as del_err:
-                                    logger.warning(f"Windows del command also failed: {del_err}")
+                else:  # Taller than wide or square
+                    # Height is the limiting factor
+                    image_height = max_height
+                    image_width = image_height * aspect_ratio
+                    # Check if width exceeds maximum
+                    if image_width > max_width:
+                        image_width = max_width
+                        image_height = image_width / aspect_ratio
+
+                # Calculate Y position - fixed at top with padding
+                image_y = top_section_y + top_padding
+
+                # Center the image horizontally
+                image_x = image_col_x + ((image_col_width - image_width) / 2)
+
+                # Add image to PDF (without specifying height will maintain aspect ratio)
+                self.image(report_image.data, x=image_x, y=image_y, w=image_width)
             except Exception as e:
                 logger.error(f"Error adding image: {e}")
+                # Display placeholder for an image that could not be loaded
+                self.set_xy(image_col_x + 5, top_section_y + 10)
+                self.set_unicode_font( 'I', 8)
+                self.cell(image_col_width - 10, 10, "Image indisponible", 0, 0, 'C')
 
         else:
             # Display placeholder if no image
@@ -722,10 +695,12 @@ class ReviztoPDF(FPDF):
 
             # If there are more text comments than shown
             if len(text_comments) > 5:
+                # Only the recent history was fetched (see core/report_comments.py): a minimum
+                at_least = " ou plus" if any(comment.get('history_cut') for comment in text_comments) else ""
                 self.set_unicode_font('I', 7)
                 self.set_xy(self.l_margin + 5, self.get_y())
                 self.cell(page_width - 10, 4,
-                          f"+ {len(text_comments) - 5} commentaires texte supplementaires dans Revizto", 0, 1,
+                          f"+ {len(text_comments) - 5}{at_least} commentaires texte supplementaires dans Revizto", 0, 1,
                           'R')
 
             # Calculate history section height and draw border
@@ -951,24 +926,17 @@ class ReviztoPDF(FPDF):
                 # Move to the right column position at the same starting Y
                 self.set_xy(self.l_margin + info_column_width + 10, starting_y + 10)
 
-                # Extract the base64 data if it's a data URL
+                # Data URLs are decoded in memory
                 image_url = project_data['imageUrl']
                 if image_url.startswith('data:image'):
-                    img_data = re.sub('^data:image/.+;base64,', '', image_url)
-
-                    # Create temporary file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp:
-                        temp_file = temp.name
-                        temp.write(base64.b64decode(img_data))
+                    from .report_images import load_inline_image
+                    project_image = load_inline_image(image_url)
 
                     # Calculate image dimensions to fit in the right column
                     image_width = image_column_width - 10  # Leave some margin
 
                     # Add to PDF
-                    self.image(temp_file, x=self.l_margin + info_column_width + 10, y=None, w=image_width)
-
-                    # Clean up
-                    os.unlink(temp_file)
+                    self.image(project_image.data, x=self.l_margin + info_column_width + 10, y=None, w=image_width)
             except Exception as e:
                 logger.error(f"Error adding project image: {e}")
 
@@ -1011,9 +979,14 @@ class ReviztoPDF(FPDF):
 
 
 def generate_report_pdf(project_id, project_data, observations, instructions, deficiencies, issue_comments=None,
-                        enhanced_status_map=None):
+                        enhanced_status_map=None, prefetched_images=None, outcome=None):
     """
     Generate a PDF report with enhanced status mapping support
+
+    Images are downloaded while the layout runs (report_images.ImagePipeline).
+    prefetched_images (URL -> ReportImage) skips the downloads when the caller
+    already ran them (see core/pdf_benchmark.py). When given, the outcome dict
+    receives 'images_failed', the images drawn as placeholders.
     """
     print(
         f"[DEBUG-PDF] Generating PDF with enhanced status mapping: {len(enhanced_status_map) if enhanced_status_map else 0} statuses")
@@ -1042,75 +1015,107 @@ def generate_report_pdf(project_id, project_data, observations, instructions, de
     if issue_comments is None:
         issue_comments = {}
 
-    # Add project information page
-    pdf.add_info_page(project_data)
-
-    # Add general notes
-    pdf.add_general_notes()
-
-    # Add observations section if any observations
-    if observations and len(observations) > 0:
-        pdf.add_page()
-        pdf.chapter_title("1 - OBSERVATIONS")
-
-        # Filter out closed issues
-        open_observations = [obs for obs in observations if not is_closed_issue(obs)]
+    # Open issues in the order their cards are drawn (closed issues are skipped below)
+    open_observations = [obs for obs in observations or [] if not is_closed_issue(obs)]
+    open_instructions = [ins for ins in instructions or [] if not is_closed_issue(ins)]
+    open_deficiencies = [df for df in deficiencies or [] if not is_closed_issue(df)]
+
+    # Images are downloaded in card order while the layout runs; each card waits
+    # only for its own images and releases them once drawn
+    pipeline = None
+    if prefetched_images is None:
+        from .report_images import ImagePipeline
+        pipeline = ImagePipeline(open_observations + open_instructions + open_deficiencies, issue_comments)
+        prefetched_images = {}
+    else:
+        timing.count('images_prefetched', len(prefetched_images))
+        timing.count('images_failed', sum(1 for image in prefetched_images.values() if image is None))
+    pdf.prefetched_images = prefetched_images
+
+    def draw_card(add_card, issue, is_first_in_chapter):
+        comments = issue_comments.get(str(issue.get('id')), [])
+        if pipeline is not None:
+            pdf.prefetched_images = pipeline.wait(issue)
+        add_card(issue, comments, enhanced_status_map, is_first_in_chapter=is_first_in_chapter)
+        if pipeline is not None:
+            pipeline.release(issue)
+            pdf.prefetched_images = {}
 
-        if len(open_observations) > 0:
-            for i, observation in enumerate(open_observations):
-                # Get comments for this observation if available
-                obs_comments = issue_comments.get(str(observation.get('id')), [])
-                # Pass is_first_in_chapter=True for the first observation only
-                pdf.add_observation(observation, obs_comments, enhanced_status_map, is_first_in_chapter=(i == 0))
-        else:
-            pdf.set_font('helvetica', 'I', 10)
-            pdf.cell(0, 6, "Aucune observation trouvée", 0, 1, 'L')
-
-    # Add instructions section if any instructions
-    if instructions and len(instructions) > 0:
-        pdf.add_page()
-        pdf.chapter_title("2 - INSTRUCTIONS")
-
-        # Filter out closed issues
-        open_instructions = [ins for ins in instructions if not is_closed_issue(ins)]
-
-        if len(open_instructions) > 0:
-            for i, instruction in enumerate(open_instructions):
-                # Get comments for this instruction if available
-                ins_comments = issue_comments.get(str(instruction.get('id')), [])
-                # Use the same method for instructions
-                pdf.add_instruction(instruction, ins_comments, enhanced_status_map, is_first_in_chapter=(i == 0))
-        else:
-            pdf.set_font('helvetica', 'I', 10)
-            pdf.cell(0, 6, "Aucune instruction trouvée", 0, 1, 'L')
-
-    # Add deficiencies section if any deficiencies
-    if deficiencies and len(deficiencies) > 0:
-        pdf.add_page()
-        pdf.chapter_title("3 - DÉFICIENCES")
-
-        # Filter out closed issues
-        open_deficiencies = [df for df in deficiencies if not is_closed_issue(df)]
-
-        if len(open_deficiencies) > 0:
-            for i, deficiency in enumerate(open_deficiencies):
-                # Get comments for this deficiency if available
-                def_comments = issue_comments.get(str(deficiency.get('id')), [])
-                # Use the same method for deficiencies
-                pdf.add_deficiency(deficiency, def_comments, enhanced_status_map, is_first_in_chapter=(i == 0))
-        else:
-            pdf.set_font('helvetica', 'I', 10)
-            pdf.cell(0, 6, "Aucune déficience trouvée", 0, 1, 'L')
+    try:
+        with timing.phase('layout'):
+            # Add project information page
+            pdf.add_info_page(project_data)
+
+            # Add general notes
+            pdf.add_general_notes()
+
+            # Add observations section if any observations
+            if observations and len(observations) > 0:
+                pdf.add_page()
+                pdf.chapter_title("1 - OBSERVATIONS")
+
+                if len(open_observations) > 0:
+                    for i, observation in enumerate(open_observations):
+                        # Pass is_first_in_chapter=True for the first observation only
+                        draw_card(pdf.add_observation, observation, i == 0)
+                else:
+                    pdf.set_font('helvetica', 'I', 10)
+                    pdf.cell(0, 6, "Aucune observation trouvée", 0, 1, 'L')
+
+            # Add instructions section if any instructions
+            if instructions and len(instructions) > 0:
+                pdf.add_page()
+                pdf.chapter_title("2 - INSTRUCTIONS")
+
+                if len(open_instructions) > 0:
+                    for i, instruction in enumerate(open_instructions):
+                        # Use the same method for instructions
+                        draw_card(pdf.add_instruction, instruction, i == 0)
+                else:
+                    pdf.set_font('helvetica', 'I', 10)
+                    pdf.cell(0, 6, "Aucune instruction trouvée", 0, 1, 'L')
+
+            # Add deficiencies section if any deficiencies
+            if deficiencies and len(deficiencies) > 0:
+                pdf.add_page()
+                pdf.chapter_title("3 - DÉFICIENCES")
+
+                if len(open_deficiencies) > 0:
+                    for i, deficiency in enumerate(open_deficiencies):
+                        # Use the same method for deficiencies
+                        draw_card(pdf.add_deficiency, deficiency, i == 0)
+                else:
+                    pdf.set_font('helvetica', 'I', 10)
+                    pdf.cell(0, 6, "Aucune déficience trouvée", 0, 1, 'L')
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+            timing.count('images_prefetched', pipeline.fetched + pipeline.failed)
+            timing.count('images_failed', pipeline.failed)
+            print(f"[DEBUG-PDF] Pipelined {pipeline.fetched + pipeline.failed} images ({pipeline.failed} failed)")
+        if outcome is not None:
+            outcome['images_failed'] = max(pdf.images_failed, pipeline.failed if pipeline is not None else 0)
 
     # Create a BytesIO object to store the PDF
     pdf_buffer = BytesIO()
 
+    image_stats = pdf.get_image_stats()
+    print(f"[DEBUG-PDF] Images: {image_stats['embedded']} embedded ({image_stats['embedded_bytes']} bytes), "
+          f"{image_stats['references']} references")
+    timing.count('images_embedded', image_stats['embedded'])
+
     # Save PDF to BytesIO object
-    pdf.output(pdf_buffer)
+    with timing.phase('output'):
+        pdf.output(pdf_buffer)
+    timing.count('pdf_pages', pdf.page)
+    timing.count('pdf_bytes', pdf_buffer.tell())
 
     # Reset buffer position to the beginning
     pdf_buffer.seek(0)
 
+    from . import pdf_assets
+    pdf_assets.mark_first_pdf()
+
     return pdf_buffer
 
 def is_closed_issue(issue):
@@ -1552,7 +1557,7 @@ def create_error_pdf(project_id, project_data, error_message):
 
 
 def generate_report_pdf_with_status_fix(project_id, project_data, observations, instructions, deficiencies,
-                                        issue_comments=None):
+                                        issue_comments=None, outcome=None):
     """
     Generate a PDF report with proper dynamic status mapping integration.
     This matches the working HTML version's status handling.
@@ -1564,6 +1569,8 @@ def generate_report_pdf_with_status_fix(project_id, project_data, observations,
         instructions (list): List of instructions
         deficiencies (list): List of deficiencies
         issue_comments (dict, optional): Dictionary mapping issue IDs to comments
+        outcome (dict, optional): Receives 'images_failed' (see generate_report_pdf) and
+            'degraded', True when the status map or the whole report fell back
 
     Returns:
         BytesIO: PDF file as a BytesIO object
@@ -1623,13 +1630,16 @@ def generate_report_pdf_with_status_fix(project_id, project_data, observations,
             instructions,
             deficiencies,
             issue_comments,
-            enhanced_status_map  # Pass the dynamic status map
+            enhanced_status_map,  # Pass the dynamic status map
+            outcome=outcome
         )
 
     except Exception as e:
         print(f"[DEBUG-PDF] Error in enhanced PDF generation: {e}")
         import traceback
         print(f"[DEBUG-PDF] Traceback: {traceback.format_exc()}")
+        if outcome is not None:
+            outcome['degraded'] = True
 
         # Fallback to standard generation
         try:
@@ -1639,7 +1649,8 @@ def generate_report_pdf_with_status_fix(project_id, project_data, observations,
                 observations,
                 instructions,
                 deficiencies,
-                issue_comments
+                issue_comments,
+                outcome=outcome
             )
         except Exception as fallback_error:
             print(f"[DEBUG-PDF] Fallback generation also failed: {fallback_error}")
@@ -1920,36 +1931,24 @@ def add_image_gallery(self, images, page_width):
             current_x = self.l_margin + 5
 
         try:
-            import tempfile
-            import os
-            import uuid
-            import base64
-            import re
-
-            # Download/prepare image
-            temp_file = os.path.join(tempfile.gettempdir(), f"gallery_img_{uuid.uuid4()}.png")
-
+            from .report_images import GALLERY_IMAGE_SLOT_MM, load_inline_image
             if image_url.startswith('data:image'):
-                # Base64 encoded image
-                img_data = re.sub('^data:image/.+;base64,', '', image_url)
-                with open(temp_file, 'wb') as f:
-                    f.write(base64.b64decode(img_data))
+                # Base64 encoded image, decoded in memory
+                report_image = load_inline_image(image_url)
             else:
-                # External URL
-                import urllib.request
-                urllib.request.urlretrieve(image_url, temp_file)
+                # External URL, downloaded and normalized by the prefetch stage
+                report_image = self.get_report_image(image_url, GALLERY_IMAGE_SLOT_MM)
+                if report_image is None:
+                    raise ValueError("Image unavailable")
 
             # Add clickable image to PDF
             # Create a clickable area over the image that opens the original URL
-            self.image(temp_file, x=current_x, y=current_y, w=image_width - 2, h=image_height)
+            self.image(report_image.data, x=current_x, y=current_y, w=image_width - 2, h=image_height)
 
             # ADDED: Make the image clickable by adding a link annotation
             # Create an invisible clickable rectangle over the image
             self.link(current_x, current_y, image_width - 2, image_height, image_url)
 
-            # Clean up temp file
-            os.remove(temp_file)
-
         except Exception as e:
             logger.warning(f"Failed to add gallery image {image_url}: {e}")
             # Draw placeholder rectangle
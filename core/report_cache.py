@@ -0,0 +1,160 @@
+# core/report_cache.py - Cache of finished report PDFs
+
+"""
+Finished report PDFs keyed by a fingerprint of their inputs.
+
+The fingerprint covers the ProjectData row, the id and modification time of
+every issue in the three sections, comment counts per issue and the status
+map, so any change to what the report shows produces a new key. PDFs are kept
+in the Django cache (settings.REPORT_CACHE_ALIAS) and the fingerprint doubles
+as the ETag of the download.
+
+Concurrent requests for the same fingerprint in a process share one
+generation (single-flight): the first caller renders, the others wait for its
+result.
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+from django.conf import settings
+from django.core.cache import caches
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so PDFs rendered by older code are not served
+REPORT_LAYOUT_VERSION = 1
+
+KEY_PREFIX = 'report-pdf:v1'
+
+_lock = threading.Lock()
+_inflight = {}
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'shared': 0,
+    'not_cached': 0,
+    'errors': 0,
+}
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _get_cache():
+    return caches[getattr(settings, 'REPORT_CACHE_ALIAS', getattr(settings, 'REVIZTO_CACHE_ALIAS', 'default'))]
+
+
+def _issue_version(issue):
+    return [issue.get('id'), issue.get('updated') or issue.get('modified') or issue.get('created')]
+
+
+def report_fingerprint(project_info, observations, instructions, deficiencies, issue_comments, status_map):
+    """
+    Fingerprint the inputs of a report.
+
+    Returns:
+        str: sha256 hex digest
+    """
+    inputs = {
+        'layout': REPORT_LAYOUT_VERSION,
+        'project': project_info,
+        'observations': [_issue_version(issue) for issue in observations],
+        'instructions': [_issue_version(issue) for issue in instructions],
+        'deficiencies': [_issue_version(issue) for issue in deficiencies],
+        'comments': {issue_id: len(comments or []) for issue_id, comments in issue_comments.items()},
+        'statuses': status_map,
+    }
+    normalized = json.dumps(inputs, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _key(fingerprint):
+    return f"{KEY_PREFIX}:{fingerprint}"
+
+
+def get(fingerprint):
+    """Get a cached PDF, or None."""
+    try:
+        pdf_bytes = _get_cache().get(_key(fingerprint))
+    except Exception as e:
+        logger.warning(f"Report cache read failed: {e}")
+        _count('errors')
+        return None
+    return pdf_bytes
+
+
+def put(fingerprint, pdf_bytes):
+    try:
+        _get_cache().set(_key(fingerprint), pdf_bytes, getattr(settings, 'REPORT_CACHE_TTL', 24 * 3600))
+    except Exception as e:
+        logger.warning(f"Report cache write failed: {e}")
+        _count('errors')
+
+
+def get_or_render(fingerprint, render):
+    """
+    Get the PDF for a fingerprint from the cache, or render it once.
+
+    Args:
+        fingerprint (str): See report_fingerprint
+        render (callable): Returns (pdf_bytes, cacheable); error and degraded PDFs are not cacheable
+
+    Returns:
+        tuple: (pdf_bytes, complete) - complete is False for a PDF that was not cacheable
+    """
+    pdf_bytes = get(fingerprint)
+    if pdf_bytes is not None:
+        _count('hits')
+        timing.count('report_cache_hits')
+        print(f"[REPORT-CACHE] Hit for {fingerprint[:12]}")
+        return pdf_bytes, True
+
+    with _lock:
+        future = _inflight.get(fingerprint)
+        leader = future is None
+        if leader:
+            future = _inflight[fingerprint] = Future()
+
+    if not leader:
+        _count('shared')
+        print(f"[REPORT-CACHE] Waiting for in-flight render of {fingerprint[:12]}")
+        return future.result()
+
+    try:
+        # Another render may have finished between the lookup and taking the lead
+        pdf_bytes = get(fingerprint)
+        if pdf_bytes is not None:
+            _count('hits')
+            future.set_result((pdf_bytes, True))
+            return pdf_bytes, True
+
+        _count('misses')
+        pdf_bytes, cacheable = render()
+        if cacheable:
+            put(fingerprint, pdf_bytes)
+        else:
+            _count('not_cached')
+        future.set_result((pdf_bytes, cacheable))
+        return pdf_bytes, cacheable
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(fingerprint, None)
+
+
+def get_status():
+    """Get hit/miss counters and the renders in flight in this process."""
+    with _lock:
+        stats = dict(_stats)
+        stats['in_flight'] = len(_inflight)
+    lookups = stats['hits'] + stats['misses'] + stats['shared']
+    stats['hit_ratio'] = round((stats['hits'] + stats['shared']) / lookups, 3) if lookups else None
+    return stats
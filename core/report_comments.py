@@ -0,0 +1,182 @@
+# core/report_comments.py - Bounded comment history for PDF reports
+
+"""
+Fetches only the part of each issue's comment history a report renders.
+
+An issue card shows its newest text comments (TEXT_COMMENT_LIMIT, plus a
+"+ N commentaires" line for the rest), the newest image comment as the card
+image (get_best_image_for_issue) and the newest GALLERY_IMAGE_LIMIT images as
+its gallery (get_last_uploaded_images). Diffs and other entries are never drawn.
+
+Revizto's issue/{uuid}/comments/date endpoint only takes a start date, no
+limit, so fetch_report_comments() asks for a recent window first
+(settings.REPORT_COMMENTS_WINDOW_DAYS) and fetches the full history only for
+the issues whose window lacks what their card needs. Every issue costs one
+request, two at most:
+
+- an issue created inside the window gets its whole history from it;
+- an issue not updated since the window started has nothing in it, so its
+  full history is fetched straight away;
+- any other issue is settled by the window when it holds enough for the card,
+  and otherwise fetched in full.
+
+bound_comments() then keeps the rendered entries and drops the rest; older text
+comments are kept as {'type', 'created'} stubs so the "+ N" count stays right.
+When a window settles an issue older than it, its stubs are flagged
+'history_cut' and the card shows the count as a minimum.
+"""
+
+from datetime import date, timedelta
+from django.conf import settings
+from . import timing
+from .report_images import GALLERY_IMAGE_LIMIT
+
+# Text comments drawn per card (see ReviztoPDF.add_observation)
+TEXT_COMMENT_LIMIT = 5
+
+
+def _preview_url(comment):
+    preview = comment.get('preview')
+    if isinstance(preview, dict):
+        return preview.get('middle') or preview.get('small')
+    return None
+
+
+def _is_file_image(comment):
+    mimetype = comment.get('mimetype')
+    return (comment.get('type') == 'file' and isinstance(mimetype, str) and mimetype.startswith('image/')
+            and _preview_url(comment))
+
+
+def _is_markup(comment):
+    return comment.get('type') == 'markup' and _preview_url(comment)
+
+
+def bound_comments(comments, history_cut=False):
+    """
+    Keep the comments an issue card renders.
+
+    Args:
+        comments (list): Comments of one issue, in any order
+        history_cut (bool): The comments are only the recent part of the history;
+            the text stubs are flagged so the card shows their count as a minimum
+
+    Returns:
+        tuple: (kept comments newest first, complete) - complete is True when the
+            comments already hold everything the card shows, so older history
+            would not change it
+    """
+    comments = sorted((comment for comment in comments or [] if isinstance(comment, dict)),
+                      key=lambda comment: comment.get('created', ''), reverse=True)
+
+    kept = []
+    texts = 0
+    gallery = set()
+    newest_file_image = newest_markup = False
+    for comment in comments:
+        if comment.get('type') == 'text':
+            texts += 1
+            if texts <= TEXT_COMMENT_LIMIT:
+                kept.append(comment)
+            else:
+                # Only counted by the card
+                stub = {'type': 'text', 'created': comment.get('created')}
+                if history_cut:
+                    stub['history_cut'] = True
+                kept.append(stub)
+            continue
+
+        is_file_image = _is_file_image(comment)
+        is_markup = not is_file_image and _is_markup(comment)
+        if not (is_file_image or is_markup):
+            continue
+
+        keep = False
+        url = _preview_url(comment)
+        if url not in gallery and len(gallery) < GALLERY_IMAGE_LIMIT:
+            gallery.add(url)
+            keep = True
+        # The card image is the newest image file, else the newest markup
+        if is_file_image and not newest_file_image:
+            newest_file_image = keep = True
+        if is_markup and not newest_markup:
+            newest_markup = keep = True
+        if keep:
+            kept.append(comment)
+
+    complete = texts > TEXT_COMMENT_LIMIT and len(gallery) >= GALLERY_IMAGE_LIMIT and newest_file_image
+    return kept, complete
+
+
+def _issue_day(issue, field):
+    """Day (YYYY-MM-DD) of an issue date field, or None."""
+    value = issue.get(field)
+    if isinstance(value, dict):
+        value = value.get('value')
+    return value[:10] if isinstance(value, str) and len(value) >= 10 else None
+
+
+def fetch_report_comments(project_id, issues, since_date):
+    """
+    Fetch the comments the report cards render, from a recent window when it is enough.
+
+    Args:
+        project_id (int): Project ID
+        issues (list): Issue dicts with 'id' (and ideally 'uuid', 'created' and 'updated')
+        since_date (str): Start of the full history (YYYY-MM-DD)
+
+    Returns:
+        dict: Issue ID (str) -> kept comments, see bound_comments
+    """
+    from .api.service import ReviztoService
+
+    if not getattr(settings, 'REPORT_COMMENTS_BOUNDED', True):
+        return ReviztoService.get_comments_for_issues(project_id, issues, since_date)
+
+    window = (date.today() - timedelta(days=getattr(settings, 'REPORT_COMMENTS_WINDOW_DAYS', 90))).isoformat()
+    window = max(window, since_date)
+
+    # One entry per issue ID (issues can be listed under several stamps)
+    unique = list({str(issue.get('id')): issue for issue in issues if issue.get('id')}.values())
+    windowed, full = [], []
+    for issue in unique:
+        updated = _issue_day(issue, 'updated')
+        # Nothing happened since the window started: only the full history can fill the card
+        (full if window > since_date and updated and updated < window else windowed).append(issue)
+
+    issue_comments = {}
+    received = 0
+    if windowed:
+        fetched = ReviztoService.get_comments_for_issues(project_id, windowed, window)
+        timing.count('comment_windows')
+        settled = 0
+        for issue in windowed:
+            issue_id = str(issue.get('id'))
+            comments = fetched.get(issue_id, [])
+            received += len(comments)
+            created = _issue_day(issue, 'created')
+            # An issue created inside the window has its whole history in it
+            history_cut = window > since_date and (created is None or created < window)
+            kept, complete = bound_comments(comments, history_cut=history_cut)
+            if complete or not history_cut:
+                issue_comments[issue_id] = kept
+                settled += 1
+            else:
+                full.append(issue)
+        print(f"[DEBUG-REPORT] Comments since {window}: {settled}/{len(unique)} issues settled")
+
+    if full:
+        fetched = ReviztoService.get_comments_for_issues(project_id, full, since_date)
+        timing.count('comment_windows')
+        for issue in full:
+            issue_id = str(issue.get('id'))
+            comments = fetched.get(issue_id, [])
+            received += len(comments)
+            issue_comments[issue_id], _ = bound_comments(comments)
+        print(f"[DEBUG-REPORT] Full comment history since {since_date} for {len(full)}/{len(unique)} issues")
+
+    kept = sum(len(comments) for comments in issue_comments.values())
+    timing.count('comments_received', received)
+    timing.count('comments_kept', kept)
+    print(f"[DEBUG-REPORT] Kept {kept} of {received} comments received for {len(issue_comments)} issues")
+    return issue_comments
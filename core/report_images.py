@@ -0,0 +1,322 @@
+# core/report_images.py - Image prefetch stage for PDF reports
+
+"""
+Downloads every image a report needs before layout starts.
+
+collect_report_images() walks the issues the layout will render and gathers
+the card image (get_best_image_for_issue) and gallery images
+(get_last_uploaded_images) of each, with the slot size they are drawn at.
+prefetch_images() then downloads them concurrently on a bounded pool with
+per-image timeouts, reading through the disk image cache (core/image_cache.py),
+and normalizes them: downscaled to the pixels the slot needs at
+REPORT_IMAGE_DPI, re-encoded as JPEG when there is no alpha channel, metadata
+stripped. Normalized images are cached as their own variant, and fpdf embeds
+the JPEG bytes as-is. Failed images map to None and are drawn as placeholders.
+
+Images are handed to fpdf as in-memory bytes: no temp files, one decode per
+image, sizes read from the header only.
+
+ImagePipeline runs the same downloads alongside the layout instead of before
+it: the card being drawn only waits for its own images.
+"""
+
+import re
+import time
+import base64
+import logging
+import contextvars
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .api import transport
+from . import image_cache
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+# Images per issue card gallery (see ReviztoPDF.add_observation)
+GALLERY_IMAGE_LIMIT = 6
+
+# Largest box (width, height in mm) each image slot is drawn in
+CARD_IMAGE_SLOT_MM = (56, 56)
+GALLERY_IMAGE_SLOT_MM = (56, 35)
+
+
+class ReportImage:
+    """An image ready to embed: encoded bytes, pixel size and format."""
+
+    __slots__ = ('data', 'size', 'format')
+
+    def __init__(self, data, size, format):
+        self.data = data
+        self.size = size
+        self.format = format
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Wrap encoded image bytes (only the header is parsed)."""
+        from PIL import Image
+        with Image.open(BytesIO(data)) as img:
+            return cls(data, img.size, img.format)
+
+
+def load_inline_image(image_url):
+    """
+    Load an image embedded in a data URL, or a local file, without temp files.
+
+    The image is not decoded here: its size is read from the header and fpdf
+    decodes it once when it is placed.
+
+    Returns:
+        ReportImage: The image bytes and size
+    """
+    if image_url.startswith('data:image'):
+        data = base64.b64decode(re.sub('^data:image/.+;base64,', '', image_url))
+    else:
+        with open(image_url, 'rb') as f:
+            data = f.read()
+    return ReportImage.from_bytes(data)
+
+
+def is_remote_url(url):
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+
+def collect_report_images(issues, issue_comments):
+    """
+    Collect the remote images the layout will need, in layout order and without duplicates.
+
+    Args:
+        issues (list): Issues that will be rendered
+        issue_comments (dict): Issue ID (str) -> comments
+
+    Returns:
+        dict: Image URL -> largest slot (width, height in mm) it is drawn in
+    """
+    from .pdf_generator import get_best_image_for_issue, get_last_uploaded_images
+
+    images = {}
+
+    def add(url, slot_mm):
+        if is_remote_url(url):
+            width, height = images.get(url, (0, 0))
+            images[url] = (max(width, slot_mm[0]), max(height, slot_mm[1]))
+
+    for issue in issues:
+        comments = issue_comments.get(str(issue.get('id')), [])
+        add(get_best_image_for_issue(issue, comments), CARD_IMAGE_SLOT_MM)
+        for url in get_last_uploaded_images(comments, limit=GALLERY_IMAGE_LIMIT):
+            add(url, GALLERY_IMAGE_SLOT_MM)
+    return images
+
+
+def slot_pixels(slot_mm, dpi=None):
+    """Get the pixel box a slot needs at the print DPI."""
+    dpi = dpi or getattr(settings, 'REPORT_IMAGE_DPI', 150)
+    return (max(1, round(slot_mm[0] / 25.4 * dpi)), max(1, round(slot_mm[1] / 25.4 * dpi)))
+
+
+def normalize_image(data, max_pixels, quality=None):
+    """
+    Downscale an image to fit max_pixels and re-encode it without metadata.
+
+    Images with an alpha channel are kept as PNG, everything else becomes JPEG.
+
+    Returns:
+        ReportImage: The normalized image
+    """
+    from PIL import Image, ImageOps
+
+    quality = quality or getattr(settings, 'REPORT_IMAGE_JPEG_QUALITY', 80)
+
+    with Image.open(BytesIO(data)) as original:
+        # Apply the EXIF orientation before EXIF is dropped
+        img = ImageOps.exif_transpose(original)
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+
+        # Only ever shrinks
+        img.thumbnail(max_pixels, Image.LANCZOS)
+
+        # No exif/icc_profile arguments: metadata is not carried over
+        out = BytesIO()
+        if has_alpha:
+            img = img.convert('RGBA')
+            img.save(out, 'PNG', optimize=True)
+            image_format = 'PNG'
+        else:
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(out, 'JPEG', quality=quality, optimize=True)
+            image_format = 'JPEG'
+
+        return ReportImage(out.getvalue(), img.size, image_format)
+
+
+def fetch_image(url, slot_mm=CARD_IMAGE_SLOT_MM, timeout=None):
+    """
+    Get an image normalized for a slot, from the disk image cache or by downloading it.
+
+    Returns:
+        ReportImage: The normalized image, or None if it could not be downloaded or decoded
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'REPORT_IMAGE_TIMEOUT', (5, 15))
+
+    max_pixels = slot_pixels(slot_mm)
+    quality = getattr(settings, 'REPORT_IMAGE_JPEG_QUALITY', 80)
+    variant = f"fit{max_pixels[0]}x{max_pixels[1]}q{quality}"
+    try:
+        normalized = image_cache.get(url, variant)
+        if normalized is not None:
+            timing.count('image_cache_hits')
+            return ReportImage.from_bytes(normalized)
+
+        data = image_cache.get(url)
+        if data is None:
+            data = transport.download(url, timeout=timeout)
+            timing.count('image_downloads')
+            timing.count('image_download_bytes', len(data))
+            image_cache.put(url, data)
+
+        image = normalize_image(data, max_pixels, quality)
+        image_cache.put(url, image.data, variant)
+        return image
+    except Exception as e:
+        logger.warning(f"Could not fetch report image {url}: {e}")
+        return None
+
+
+def prefetch_images(images, max_workers=None, timeout=None):
+    """
+    Download and normalize images concurrently.
+
+    Args:
+        images (dict): Image URL -> slot (width, height in mm), see collect_report_images
+        max_workers (int, optional): Concurrent downloads (default: settings.REPORT_IMAGE_PREFETCH_WORKERS)
+        timeout (tuple|float, optional): Per-image (connect, read) timeout
+
+    Returns:
+        dict: URL -> ReportImage, or None for images that failed
+    """
+    if not images:
+        return {}
+
+    max_workers = max_workers or getattr(settings, 'REPORT_IMAGE_PREFETCH_WORKERS', 8)
+    urls = list(images)
+    start = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix='report-images') as executor:
+        # Each download runs in a copy of the caller's context so it counts towards its timing
+        futures = [executor.submit(contextvars.copy_context().run, fetch_image, url, images[url], timeout)
+                   for url in urls]
+        results = {url: future.result() for url, future in zip(urls, futures)}
+
+    failed = sum(1 for image in results.values() if image is None)
+    total_bytes = sum(len(image.data) for image in results.values() if image is not None)
+    print(f"[DEBUG-PDF] Prefetched {len(urls) - failed}/{len(urls)} images ({total_bytes} bytes normalized) "
+          f"in {time.monotonic() - start:.2f}s ({failed} failed)")
+    return results
+
+
+class ImagePipeline:
+    """
+    Image downloads that run ahead of the layout, one issue at a time.
+
+    Every issue's images are queued in layout order as soon as the pipeline is
+    created, so the first cards' images are downloaded first. The layout waits
+    for an issue's images only right before drawing its card (wait()), then
+    releases them (release()): an image shared by later issues stays until the
+    last of them is drawn.
+    """
+
+    def __init__(self, issues, issue_comments, max_workers=None, timeout=None):
+        """
+        Args:
+            issues (list): Issues in the order their cards are drawn
+            issue_comments (dict): Issue ID (str) -> comments
+            max_workers (int, optional): Concurrent downloads (default: settings.REPORT_IMAGE_PREFETCH_WORKERS)
+            timeout (tuple|float, optional): Per-image (connect, read) timeout
+        """
+        self._issue_urls = {}   # issue ID -> URLs its card draws
+        self._cards = {}        # issue ID -> its cards still to draw
+        self._users = {}        # URL -> cards still to draw it
+        images = {}
+        for issue in issues:
+            issue_id = str(issue.get('id'))
+            issue_images = collect_report_images([issue], issue_comments)
+            self._issue_urls[issue_id] = list(issue_images)
+            self._cards[issue_id] = self._cards.get(issue_id, 0) + 1
+            for url, (width, height) in issue_images.items():
+                known_width, known_height = images.get(url, (0, 0))
+                images[url] = (max(width, known_width), max(height, known_height))
+                self._users[url] = self._users.get(url, 0) + 1
+
+        self._futures = {}
+        self._executor = None
+        self.fetched = 0
+        self.failed = 0
+        if images:
+            max_workers = max_workers or getattr(settings, 'REPORT_IMAGE_PREFETCH_WORKERS', 8)
+            self._executor = ThreadPoolExecutor(max_workers=min(max_workers, len(images)),
+                                                thread_name_prefix='report-images')
+            # Submitted in layout order; each download counts towards the caller's timing
+            for url, slot_mm in images.items():
+                self._futures[url] = self._executor.submit(contextvars.copy_context().run,
+                                                           fetch_image, url, slot_mm, timeout)
+        print(f"[DEBUG-PDF] Queued {len(images)} images for {len(self._issue_urls)} issues")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def wait(self, issue):
+        """
+        Wait for the images of an issue's card.
+
+        Returns:
+            dict: URL -> ReportImage, or None for images that failed
+        """
+        images = {}
+        for url in self._issue_urls.get(str(issue.get('id')), []):
+            future = self._futures.get(url)
+            if future is None:
+                continue
+            if future.done():
+                images[url] = future.result()
+            else:
+                with timing.phase('image_wait'):
+                    images[url] = future.result()
+        return images
+
+    def release(self, issue):
+        """Drop the images of a drawn card that no later card draws."""
+        issue_id = str(issue.get('id'))
+        if issue_id not in self._cards:
+            return []
+        self._cards[issue_id] -= 1
+        urls = self._issue_urls[issue_id]
+        if self._cards[issue_id] <= 0:
+            del self._cards[issue_id], self._issue_urls[issue_id]
+
+        released = []
+        for url in urls:
+            self._users[url] -= 1
+            if self._users[url] <= 0:
+                future = self._futures.pop(url, None)
+                if future is not None and future.done():
+                    if future.result() is None:
+                        self.failed += 1
+                    else:
+                        self.fetched += 1
+                released.append(url)
+        return released
+
+    def close(self):
+        """Cancel the downloads no card waited for and stop the workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._futures.clear()
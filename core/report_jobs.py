@@ -0,0 +1,207 @@
+# core/report_jobs.py - Background PDF report jobs
+
+"""
+Runs report generation outside the HTTP request.
+
+Jobs are recorded in the report_jobs table (PostgreSQL, so any worker can
+answer status polls) and executed on a process-local thread pool. Finished
+PDFs are stored on the job row as well, so the download works from any dyno
+and survives restarts, until REPORT_RETENTION_SECONDS.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+from .models import ReportJob
+from .reports import build_report_pdf, ProjectDataNotFound
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+_table_ready = False
+_last_cleanup = 0.0
+
+
+def _ensure_table():
+    global _table_ready
+    if not _table_ready:
+        with _lock:
+            if not _table_ready:
+                ReportJob.ensure_table()
+                _table_ready = True
+
+
+def _get_executor():
+    """Get the thread pool that runs report jobs in this process."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'REPORT_JOB_WORKERS', 2),
+                    thread_name_prefix='report-job'
+                )
+    return _executor
+
+
+def _update(job_id, **fields):
+    fields['updated_at'] = timezone.now()
+    ReportJob.objects.filter(id=job_id).update(**fields)
+
+
+def _run_job(job_id, project_id):
+    """Build the report for a job and record the outcome."""
+    print(f"[REPORT-JOBS] Starting job {job_id} for project {project_id}")
+    try:
+        _update(job_id, status=ReportJob.STATUS_RUNNING, stage='starting', progress=1, started_at=timezone.now())
+
+        def progress(stage, percent):
+            # 100% is only reported once the file is stored
+            _update(job_id, stage=stage, progress=min(percent, 95))
+
+        with timing.record(f"report_job {job_id}"):
+            pdf_bytes, filename = build_report_pdf(project_id, progress=progress)
+
+        # The PDF and the done status are written together
+        _update(
+            job_id,
+            status=ReportJob.STATUS_DONE,
+            stage='done',
+            progress=100,
+            file_data=pdf_bytes,
+            file_name=filename,
+            file_size=len(pdf_bytes),
+            finished_at=timezone.now()
+        )
+        print(f"[REPORT-JOBS] ✅ Job {job_id} finished ({len(pdf_bytes)} bytes)")
+
+    except ProjectDataNotFound as e:
+        _update(job_id, status=ReportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+        print(f"[REPORT-JOBS] ❌ Job {job_id} failed: {e}")
+
+    except Exception as e:
+        import traceback
+        print(f"[REPORT-JOBS] ❌ Job {job_id} failed: {e}")
+        print(f"[REPORT-JOBS] Traceback: {traceback.format_exc()}")
+        try:
+            _update(job_id, status=ReportJob.STATUS_FAILED, error=str(e), finished_at=timezone.now())
+        except Exception as update_error:
+            logger.error(f"Could not record failure of report job {job_id}: {update_error}")
+
+    finally:
+        close_old_connections()
+
+
+def _stale_cutoff():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_STALE_AFTER', 1800))
+
+
+def submit_report_job(project_id):
+    """
+    Queue a report job for a project, reusing a job already in progress.
+
+    Returns:
+        tuple: (ReportJob, created)
+    """
+    _ensure_table()
+    cleanup_expired_reports()
+
+    db_alias = ReportJob.objects.db
+    with transaction.atomic(using=db_alias):
+        # Serializes submissions for a project across dynos until the commit, so
+        # two concurrent requests cannot both find no active job and queue one
+        with connections[db_alias].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"report_jobs:{project_id}"])
+
+        active = ReportJob.objects.filter(
+            project_id=str(project_id),
+            status__in=ReportJob.ACTIVE_STATUSES,
+            updated_at__gte=_stale_cutoff()
+        ).defer('file_data').order_by('-created_at').first()
+        if active:
+            print(f"[REPORT-JOBS] Reusing active job {active.id} for project {project_id}")
+            return active, False
+
+        job = ReportJob.objects.create(
+            id=uuid.uuid4().hex,
+            project_id=str(project_id),
+            status=ReportJob.STATUS_QUEUED,
+            stage='queued'
+        )
+
+    # Started once the job row is committed and visible to the worker's connection
+    _get_executor().submit(_run_job, job.id, project_id)
+    print(f"[REPORT-JOBS] Queued job {job.id} for project {project_id}")
+    return job, True
+
+
+def get_job(job_id):
+    """
+    Get a job (without its PDF), marking it failed if its worker stopped updating it (e.g. dyno restart).
+
+    Returns:
+        ReportJob: The job, or None if it does not exist
+    """
+    _ensure_table()
+    job = ReportJob.objects.filter(id=job_id).defer('file_data').first()
+    if job and job.is_active() and job.updated_at < _stale_cutoff():
+        job.status = ReportJob.STATUS_FAILED
+        job.error = 'Job interrupted (worker restarted), please generate the report again'
+        _update(job.id, status=job.status, error=job.error, finished_at=timezone.now())
+    return job
+
+
+def get_job_pdf(job_id):
+    """
+    Get the PDF of a finished job.
+
+    Returns:
+        bytes: The PDF, or None if the job has none (not done, or done before PDFs were stored on the row)
+    """
+    file_data = ReportJob.objects.filter(id=job_id).values_list('file_data', flat=True).first()
+    return bytes(file_data) if file_data is not None else None
+
+
+def job_status(job):
+    """Serialize a job for the status endpoint."""
+    return {
+        'job_id': job.id,
+        'project_id': job.project_id,
+        'status': job.status,
+        'stage': job.stage,
+        'progress': job.progress,
+        'error': job.error,
+        'file_name': job.file_name,
+        'file_size': job.file_size,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+
+
+def cleanup_expired_reports():
+    """Delete job rows, and the PDFs stored on them, past REPORT_RETENTION_SECONDS (at most hourly)."""
+    global _last_cleanup
+
+    now = time.time()
+    if now - _last_cleanup < 3600:
+        return
+    _last_cleanup = now
+
+    retention = getattr(settings, 'REPORT_RETENTION_SECONDS', 7 * 24 * 3600)
+    try:
+        deleted, _ = ReportJob.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=retention)
+        ).delete()
+        if deleted:
+            print(f"[REPORT-JOBS] Cleaned up {deleted} job rows")
+    except Exception as e:
+        logger.warning(f"Report cleanup failed: {e}")
@@ -0,0 +1,327 @@
+# core/reports.py - Visit report (PDF) builder
+
+"""
+Builds the project visit report PDF.
+
+Used both by the synchronous generate-pdf view and by background report jobs
+(core/report_jobs.py). A progress callback receives (stage, percent) as the
+build moves through its phases.
+
+prepare_report() fetches the inputs and fingerprints them, render_report()
+lays them out through the report output cache (core/report_cache.py), so an
+unchanged project is not rendered again.
+
+Inputs are fetched as a dependency graph rather than in strict phases: the
+status map is fetched alongside the stamp lists and comments, and card images
+are downloaded while the layout runs, each card waiting only for its own
+(see generate_report_pdf).
+"""
+
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from .models import ProjectData
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+# Comments are fetched from this date on
+COMMENTS_SINCE_DATE = '2018-05-30'
+
+
+class ProjectDataNotFound(Exception):
+    """Raised when the project has no saved form data to build a report from."""
+    pass
+
+
+def get_project_info(project_id):
+    """
+    Get the saved project form data in the format used by the PDF generator.
+
+    Raises:
+        ProjectDataNotFound: If no ProjectData row exists for the project
+    """
+    with timing.phase('project_data'):
+        project_data = ProjectData.objects.filter(id=project_id).first()
+    print(f"[DEBUG-REPORT] ProjectData lookup result: {project_data is not None}")
+
+    if not project_data:
+        raise ProjectDataNotFound(f"No project data found for project ID: {project_id}")
+
+    report_date = ''
+    if project_data.rapportdate:
+        report_date = project_data.rapportdate.strftime('%Y-%m-%d')
+
+    visit_date = ''
+    if project_data.datevisite:
+        visit_date = project_data.datevisite.strftime('%Y-%m-%d')
+
+    return {
+        'id': project_id,
+        'architectFile': project_data.nodossier or '',
+        'projectName': project_data.noprojet or '',
+        'projectOwner': project_data.maitreouvragge or '',
+        'contractor': project_data.entrepreneur or '',
+        'visitNumber': project_data.novisite or '',
+        'visitBy': project_data.visitepar or '',
+        'visitDate': visit_date,
+        'inPresenceOf': project_data.presence or '',
+        'reportDate': report_date,
+        'description': project_data.description or '',
+        'distribution': project_data.distribution or '',
+        'imageUrl': project_data.image or '',
+    }
+
+
+def get_status_map(project_id):
+    """
+    Build the status UUID -> display info map from the project's workflow settings.
+
+    Returns an empty map on error (the PDF then uses its fallbacks).
+    """
+    from .api.service import ReviztoService
+
+    enhanced_status_map = {}
+    try:
+        with timing.phase('workflow'):
+            status_response = ReviztoService.get_project_workflow_settings(project_id)
+        print(f"[DEBUG-REPORT] Status response result: {status_response.get('result') if status_response else 'None'}")
+
+        if status_response and status_response.get('result') == 0 and status_response.get('data'):
+            statuses = status_response['data'].get('statuses', [])
+            print(f"[DEBUG-REPORT] Found {len(statuses)} statuses in workflow settings")
+
+            for status in statuses:
+                uuid = status.get('uuid')
+                name = status.get('name')
+                if uuid and name:
+                    # Map status names to French (same logic as HTML)
+                    display_name = name
+                    if name == "Open":
+                        display_name = "Ouvert"
+                    elif name == "In progress":
+                        display_name = "En cours"
+                    elif name == "Solved":
+                        display_name = "Résolu"
+                    elif name == "Closed":
+                        display_name = "Fermé"
+                    # French statuses stay as-is (En attente, Corrigé, etc.)
+
+                    enhanced_status_map[uuid] = {
+                        'name': name,
+                        'displayName': display_name,
+                        'textColor': status.get('textColor', '#FFFFFF'),
+                        'backgroundColor': status.get('backgroundColor', '#6F7E93'),
+                        'category': status.get('category', '')
+                    }
+
+        print(f"[DEBUG-REPORT] Enhanced status map created with {len(enhanced_status_map)} entries")
+
+    except Exception as status_error:
+        print(f"[DEBUG-REPORT] Error fetching status mappings: {status_error}")
+
+    return enhanced_status_map
+
+
+def get_report_data(project_id):
+    """
+    Fetch the report sections and their comments from Revizto.
+
+    Returns:
+        tuple: (observations, instructions, deficiencies, issue_comments)
+    """
+    from .api.service import ReviztoService
+    from .report_comments import fetch_report_comments
+
+    # One combined stamp query for the three sections
+    with timing.phase('issues'):
+        report_issues = ReviztoService.get_report_issues(project_id)
+    sections = {}
+    for section, section_response in report_issues.items():
+        sections[section] = []
+        if section_response and section_response.get('result') == 0 and section_response.get('data') and \
+                section_response['data'].get('data'):
+            sections[section] = section_response['data']['data']
+        print(f"[DEBUG-REPORT] Found {len(sections[section])} {section}")
+
+    observations = sections['observations']
+    instructions = sections['instructions']
+    deficiencies = sections['deficiencies']
+
+    # Comments for all issues at once (UUIDs come from the full issue data,
+    # issues listed under several stamps are fetched once), only as much
+    # history as the cards render
+    with timing.phase('comments'):
+        issue_comments = fetch_report_comments(
+            project_id,
+            observations + instructions + deficiencies,
+            COMMENTS_SINCE_DATE
+        )
+    timing.count('issue_count', len(observations) + len(instructions) + len(deficiencies))
+    return observations, instructions, deficiencies, issue_comments
+
+
+def render_report_pdf(project_id, project_info, observations, instructions, deficiencies,
+                      issue_comments, enhanced_status_map):
+    """
+    Lay out the PDF, falling back to the basic generator and finally an error PDF.
+
+    Returns:
+        tuple: (BytesIO PDF document, complete) - complete is False for the error PDF, a
+            fallback PDF or one with images drawn as placeholders, so it is not cached
+    """
+    from .pdf_generator import generate_report_pdf, generate_report_pdf_with_status_fix, create_error_pdf
+
+    try:
+        outcome = {}
+        pdf_buffer = generate_report_pdf_with_status_fix(
+            project_id,
+            project_info,
+            observations,
+            instructions,
+            deficiencies,
+            issue_comments,
+            outcome=outcome
+        )
+        complete = not outcome.get('degraded') and not outcome.get('images_failed')
+        if complete:
+            print(f"[DEBUG-REPORT] Enhanced PDF generation successful")
+        else:
+            print(f"[DEBUG-REPORT] Enhanced PDF generated degraded "
+                  f"({outcome.get('images_failed', 0)} images failed, fallback: {bool(outcome.get('degraded'))})")
+        return pdf_buffer, complete
+
+    except Exception as pdf_gen_error:
+        import traceback
+        print(f"[DEBUG-REPORT] Error in PDF generation function: {pdf_gen_error}")
+        print(f"[DEBUG-REPORT] Error traceback: {traceback.format_exc()}")
+
+        # Fallback - basic PDF generation with the status map
+        try:
+            pdf_buffer = generate_report_pdf(
+                project_id,
+                project_info,
+                observations,
+                instructions,
+                deficiencies,
+                issue_comments,
+                enhanced_status_map
+            )
+            print(f"[DEBUG-REPORT] Basic fallback PDF generation successful")
+            return pdf_buffer, False
+        except Exception as final_error:
+            print(f"[DEBUG-REPORT] All PDF generation attempts failed: {final_error}")
+            # Return error PDF as last resort
+            return create_error_pdf(project_id, project_info, str(pdf_gen_error)), False
+
+
+def report_filename(project_id, project_info):
+    """Get the download file name of a project's report."""
+    project_name = project_info.get('projectName') or f"Projet_{project_id}"
+    return f"Rapport_Visite_{project_name.replace(' ', '_')}.pdf"
+
+
+def _progress_reporter(project_id, progress):
+    def report(stage, percent):
+        print(f"[DEBUG-REPORT] Project {project_id}: {stage} ({percent}%)")
+        if progress:
+            progress(stage, percent)
+    return report
+
+
+def prepare_report(project_id, progress=None):
+    """
+    Fetch everything a report shows and fingerprint it.
+
+    Args:
+        project_id (int): Project ID
+        progress (callable, optional): Called with (stage, percent) between phases
+
+    Returns:
+        dict: The report inputs, with 'fingerprint' (also the ETag) and 'filename'
+
+    Raises:
+        ProjectDataNotFound: If the project has no saved form data
+    """
+    from .report_cache import report_fingerprint
+
+    report = _progress_reporter(project_id, progress)
+
+    report('project_data', 5)
+    project_info = get_project_info(project_id)
+
+    # The status map does not depend on the issues: fetch it alongside them
+    report('issues', 10)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-status') as executor:
+        status_future = executor.submit(contextvars.copy_context().run, get_status_map, project_id)
+        observations, instructions, deficiencies, issue_comments = get_report_data(project_id)
+        enhanced_status_map = status_future.result()
+
+    return {
+        'project_id': project_id,
+        'project_info': project_info,
+        'status_map': enhanced_status_map,
+        'observations': observations,
+        'instructions': instructions,
+        'deficiencies': deficiencies,
+        'issue_comments': issue_comments,
+        'fingerprint': report_fingerprint(project_info, observations, instructions, deficiencies,
+                                          issue_comments, enhanced_status_map),
+        'filename': report_filename(project_id, project_info),
+    }
+
+
+def render_report(inputs, progress=None):
+    """
+    Render prepared report inputs, reusing a cached or in-flight PDF with the same fingerprint.
+
+    Returns:
+        tuple: (pdf_bytes, complete) - complete is False for an error or degraded PDF
+            (see render_report_pdf), which must not be revalidated against the fingerprint
+    """
+    from . import report_cache
+
+    project_id = inputs['project_id']
+    report = _progress_reporter(project_id, progress)
+
+    report('rendering', 50)
+
+    def render():
+        print(f"[DEBUG-REPORT] Rendering {len(inputs['observations'])} observations, "
+              f"{len(inputs['instructions'])} instructions, {len(inputs['deficiencies'])} deficiencies, "
+              f"comments for {len(inputs['issue_comments'])} issues")
+        pdf_buffer, complete = render_report_pdf(
+            project_id,
+            inputs['project_info'],
+            inputs['observations'],
+            inputs['instructions'],
+            inputs['deficiencies'],
+            inputs['issue_comments'],
+            inputs['status_map']
+        )
+        return pdf_buffer.getvalue(), complete
+
+    with timing.phase('render'):
+        pdf_bytes, complete = report_cache.get_or_render(inputs['fingerprint'], render)
+
+    report('done', 100)
+    return pdf_bytes, complete
+
+
+def build_report_pdf(project_id, progress=None):
+    """
+    Build the visit report PDF for a project.
+
+    Args:
+        project_id (int): Project ID
+        progress (callable, optional): Called with (stage, percent) between phases
+
+    Returns:
+        tuple: (pdf_bytes, filename)
+
+    Raises:
+        ProjectDataNotFound: If the project has no saved form data
+    """
+    inputs = prepare_report(project_id, progress)
+    pdf_bytes, _ = render_report(inputs, progress)
+    return pdf_bytes, inputs['filename']
@@ -1,7 +1,7 @@
 class ProjectRouter:
     """
     Database router for core models
-    Routes ProjectData to PostgreSQL and TokenStorage to PostgreSQL as well
+    Routes ProjectData, TokenStorage, ReportJob and the Revizto mirror to PostgreSQL
     """
 
     def db_for_read(self, model, **hints):
@@ -9,7 +9,8 @@ class ProjectRouter:
         Point operations on core models to the appropriate database
         """
         if model._meta.app_label == 'core':
-            if model.__name__ in ['ProjectData', 'TokenStorage']:
+            if model.__name__ in ['ProjectData', 'TokenStorage', 'ReportJob',
+                                  'MirrorProject', 'MirrorIssue', 'MirrorComment']:
                 return 'postgres'
         return None
 
@@ -18,7 +19,8 @@ class ProjectRouter:
         Point operations on core models to the appropriate database
         """
         if model._meta.app_label == 'core':
-            if model.__name__ in ['ProjectData', 'TokenStorage']:
+            if model.__name__ in ['ProjectData', 'TokenStorage', 'ReportJob',
+                                  'MirrorProject', 'MirrorIssue', 'MirrorComment']:
                 return 'postgres'
         return None
 
@@ -35,6 +37,7 @@ class ProjectRouter:
         Ensure that core models migrations go to the right database
         """
         if app_label == 'core':
-            if model_name in ['projectdata', 'tokenstorage']:
+            if model_name in ['projectdata', 'tokenstorage', 'reportjob',
+                              'mirrorproject', 'mirrorissue', 'mirrorcomment']:
                 return db == 'postgres'
         return None
\ No newline at end of file
@@ -0,0 +1,168 @@
+# core/timing.py - Per-request phase timers and counters
+
+"""
+Lightweight instrumentation for report generation.
+
+record() opens a Timing for a request or job and makes it current (a
+contextvar, so it follows asyncio tasks and the executor calls that copy the
+context). Code on the report path wraps its phases in phase() and bumps
+counters with count(): Revizto calls and bytes, DB queries, images. When no
+Timing is current, or SERVER_TIMING_ENABLED is off, phase() returns a shared
+no-op and count() returns after one contextvar lookup.
+
+A finished Timing renders as a Server-Timing header and as one structured
+[TIMING] log line. Phase durations are summed per name, so phases run
+concurrently (Revizto calls, DB queries) can add up to more than the total.
+"""
+
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = contextvars.ContextVar('report_timing', default=None)
+
+
+class Timing:
+    """Phase durations and counters of one request or job."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished = None
+        self.phases = {}    # name -> [seconds, count]
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            entry = self.phases.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def total_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def server_timing(self):
+        """Render as a Server-Timing header value (counters as desc-only metrics)."""
+        with self._lock:
+            phases = dict(self.phases)
+            counters = dict(self.counters)
+        metrics = [f'total;dur={self.total_seconds() * 1000:.1f}']
+        metrics += [
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="x{calls}"' if calls > 1 else '')
+            for name, (seconds, calls) in phases.items()
+        ]
+        metrics += [f'{name};desc="{value}"' for name, value in counters.items()]
+        return ', '.join(metrics)
+
+    def summary(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'total_ms': round(self.total_seconds() * 1000, 1),
+                'phases_ms': {name: round(seconds * 1000, 1) for name, (seconds, _) in self.phases.items()},
+                'counters': dict(self.counters),
+            }
+
+
+class _Phase:
+    __slots__ = ('timing', 'name', 'started')
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.add_phase(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def enabled():
+    return getattr(settings, 'SERVER_TIMING_ENABLED', True)
+
+
+def current():
+    """Get the Timing of the running request or job, or None."""
+    return _current.get()
+
+
+def phase(name):
+    """Time a block as a named phase of the current Timing (no-op without one)."""
+    timing = _current.get()
+    if timing is None:
+        return _NULL_PHASE
+    return _Phase(timing, name)
+
+
+def count(name, amount=1):
+    """Add to a counter of the current Timing (no-op without one)."""
+    timing = _current.get()
+    if timing is not None:
+        timing.add(name, amount)
+
+
+@contextmanager
+def record(name):
+    """
+    Make a new Timing current for the block and log it when the block exits.
+
+    Yields:
+        Timing: The timing, or None when SERVER_TIMING_ENABLED is off
+    """
+    if not enabled():
+        yield None
+        return
+
+    timing = Timing(name)
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+        timing.finished = time.perf_counter()
+        print(f"[TIMING] {json.dumps(timing.summary(), sort_keys=True)}")
+
+
+def _count_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_phase('db', time.perf_counter() - started)
+        timing.add('db_queries')
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    # Wrappers are per connection object (one per thread and alias), installed once
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
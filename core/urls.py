@@ -19,10 +19,16 @@ urlpatterns = [
     path('api/projects/<int:project_id>/issues/<int:issue_id>/comments/', views.get_issue_comments, name='issue_comments'),
     path('api/debug/token-state/', views.debug_token_state, name='debug_token_state'),
     path('api/debug/token-state/', views.check_token_state, name='check_token_state'),
+    path('api/debug/api-client/', views.debug_api_client_state, name='debug_api_client_state'),
 
     # PDF generation endpoint
     path('api/projects/<int:project_id>/generate-pdf/', views.generate_pdf, name='generate_pdf'),
 
+    # Background PDF report jobs
+    path('api/projects/<int:project_id>/reports/', views.create_report_job, name='create_report_job'),
+    path('api/reports/<str:job_id>/', views.report_job_status, name='report_job_status'),
+    path('api/reports/<str:job_id>/download/', views.download_report, name='download_report'),
+
     # Debug endpoint for session information
     path('api/debug/session/', views.debug_session, name='debug_session'),
 ]
\ No newline at end of file
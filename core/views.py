@@ -17,8 +17,9 @@ def home_view(request):
     """
     View for the home page that renders the index.html template
     """
-    # Get projects from the API
-    projects = ReviztoService.get_projects()
+    # Get projects from the catalog (refreshed in the background)
+    from .api import project_catalog
+    projects = project_catalog.get_projects()
 
     # Pass data to the template
     context = {
@@ -37,29 +38,31 @@ def get_search_results(request):
     print(f"[DEBUG] Search request received with query: '{query}'")
     logger.info("Search request with query: %s", query)
 
-    # Get matching projects from the API
-    projects = ReviztoService.search_projects(query)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', settings.PROJECT_SEARCH_LIMIT)),
+                           settings.PROJECT_SEARCH_MAX_LIMIT))
+        offset = max(0, int(request.GET.get('offset', 0)))
+    except ValueError:
+        return JsonResponse({'results': [], 'error': 'limit and offset must be integers'}, status=400)
+
+    # Get ranked matches from the indexed project catalog
+    projects, total = ReviztoService.search_projects_page(query, limit=limit, offset=offset)
+
+    # One query for the saved-data flags of the page
+    saved_ids = set(ProjectData.objects.filter(id__in=[str(project.id) for project in projects])
+                    .values_list('id', flat=True))
 
     # Convert to serializable format for the dropdown
     results = []
     for project in projects:
-        project_id = project.id
-        project_name = project.name
-        print(f"[DEBUG] Adding result: ID={project_id}, Name={project_name}")
-
-        # Check if this project has saved data in the database
-        has_saved_data = ProjectData.objects.filter(id=project_id).exists()
-
-        print(f"[DEBUG] Project {project_id} has saved data: {has_saved_data}")
-
         results.append({
-            'id': project_id,
-            'text': project_name,
-            'hasSavedData': has_saved_data
+            'id': project.id,
+            'text': project.name,
+            'hasSavedData': str(project.id) in saved_ids
         })
 
-    print(f"[DEBUG] Returning {len(results)} search results")
-    return JsonResponse({'results': results})
+    print(f"[DEBUG] Returning {len(results)} of {total} search results")
+    return JsonResponse({'results': results, 'total': total, 'offset': offset, 'limit': limit})
 
 
 def get_project_issues(request, project_id):
@@ -466,273 +469,168 @@ Debug version of the generate_pdf function in views.py
 """
 
 
+def _not_modified(request, etag):
+    """Answer a revalidation request whose If-None-Match matches the ETag with 304, else None."""
+    from django.http import HttpResponseNotModified
+    from django.utils.http import parse_etags
+
+    if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    if etag in if_none_match or '*' in if_none_match:
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
 def generate_pdf(request, project_id):
     """
-    Generate a PDF report for the project with enhanced status mapping
-    This now matches the working HTML version's status handling
+    Generate a PDF report for the project synchronously and return it.
+    Large projects should use the background report jobs (create_report_job) instead.
+
+    The ETag is the fingerprint of the report inputs: unchanged projects answer
+    revalidation with 304 and are served from the report cache otherwise.
+    Phase timings and counters are returned in the Server-Timing header.
     """
     print(f"[DEBUG-VIEWS] =====================================================")
     print(f"[DEBUG-VIEWS] PDF generation requested for project: {project_id} (type: {type(project_id)})")
 
+    from . import timing
+
+    with timing.record(f"generate_pdf {project_id}") as request_timing:
+        response = _generate_pdf_response(request, project_id)
+        if request_timing is not None:
+            response['Server-Timing'] = request_timing.server_timing()
+    return response
+
+
+def _generate_pdf_response(request, project_id):
+    from django.utils.http import quote_etag
+    from .reports import prepare_report, render_report, ProjectDataNotFound
+
     try:
-        # Get project data from the database
-        project_data = ProjectData.objects.filter(id=project_id).first()
-
-        print(f"[DEBUG-VIEWS] ProjectData lookup result: {project_data is not None}")
-
-        if not project_data:
-            print(f"[DEBUG-VIEWS] No project data found for project ID: {project_id}")
-            return JsonResponse({'error': 'Project data not found'}, status=404)
-
-        # Convert ProjectData to a dictionary format
-        report_date = ''
-        if project_data.rapportdate:
-            report_date = project_data.rapportdate.strftime('%Y-%m-%d')
-
-        visit_date = ''
-        if project_data.datevisite:
-            visit_date = project_data.datevisite.strftime('%Y-%m-%d')
-
-        project_info = {
-            'id': project_id,
-            'architectFile': project_data.nodossier or '',
-            'projectName': project_data.noprojet or '',
-            'projectOwner': project_data.maitreouvragge or '',
-            'contractor': project_data.entrepreneur or '',
-            'visitNumber': project_data.novisite or '',
-            'visitBy': project_data.visitepar or '',
-            'visitDate': visit_date,
-            'inPresenceOf': project_data.presence or '',
-            'reportDate': report_date,
-            'description': project_data.description or '',
-            'distribution': project_data.distribution or '',
-            'imageUrl': project_data.image or '',
-        }
-
-        print(f"[DEBUG-VIEWS] Project info prepared with keys: {list(project_info.keys())}")
-
-        # STEP 1: Fetch dynamic status mappings (same as HTML version)
-        print(f"[DEBUG-VIEWS] Fetching dynamic status mappings for project {project_id}")
-        enhanced_status_map = {}
+        inputs = prepare_report(project_id)
+        etag = quote_etag(inputs['fingerprint'])
 
-        try:
-            # Import here to avoid circular imports
-            from .api.service import ReviztoService
-
-            status_response = ReviztoService.get_project_workflow_settings(project_id)
-            print(
-                f"[DEBUG-VIEWS] Status response result: {status_response.get('result') if status_response else 'None'}")
-
-            if status_response and status_response.get('result') == 0 and status_response.get('data'):
-                statuses = status_response['data'].get('statuses', [])
-                print(f"[DEBUG-VIEWS] Found {len(statuses)} statuses in workflow settings")
-
-                # Build enhanced status map (matching HTML logic)
-                for status in statuses:
-                    uuid = status.get('uuid')
-                    name = status.get('name')
-                    if uuid and name:
-                        # Map status names to French (same logic as HTML)
-                        display_name = name
-                        if name == "Open":
-                            display_name = "Ouvert"
-                        elif name == "In progress":
-                            display_name = "En cours"
-                        elif name == "Solved":
-                            display_name = "Résolu"
-                        elif name == "Closed":
-                            display_name = "Fermé"
-                        # French statuses stay as-is (En attente, Corrigé, etc.)
-
-                        enhanced_status_map[uuid] = {
-                            'name': name,
-                            'displayName': display_name,
-                            'textColor': status.get('textColor', '#FFFFFF'),
-                            'backgroundColor': status.get('backgroundColor', '#6F7E93'),
-                            'category': status.get('category', '')
-                        }
-
-                        print(f"[DEBUG-VIEWS] Mapped status: {name} -> {display_name} (UUID: {uuid})")
-
-                        # Special debug for "En attente"
-                        if name == "En attente":
-                            print(f"[DEBUG-VIEWS] 'En attente' status details: {enhanced_status_map[uuid]}")
-
-            print(f"[DEBUG-VIEWS] Enhanced status map created with {len(enhanced_status_map)} entries")
-
-        except Exception as status_error:
-            print(f"[DEBUG-VIEWS] Error fetching status mappings: {status_error}")
-            # Continue with empty status map - PDF will use fallbacks
-
-        # Get observations, instructions, and deficiencies from the API
-        observations = []
-        instructions = []
-        deficiencies = []
-        issue_comments = {}
-
-        # Get observations
-        print(f"[DEBUG-VIEWS] Fetching observations for project ID: {project_id}")
-        observations_response = ReviztoService.get_observations(project_id)
-        if observations_response and observations_response.get('result') == 0 and observations_response.get('data') and \
-                observations_response['data'].get('data'):
-            observations = observations_response['data']['data']
-            print(f"[DEBUG-VIEWS] Found {len(observations)} observations")
-
-            # Fetch comments for each observation
-            for obs in observations:
-                if obs.get('id'):
-                    comments_response = ReviztoService.get_issue_comments(project_id, obs['id'], '2018-05-30')
-                    if comments_response and comments_response.get('result') == 0:
-                        comments_data = comments_response.get('data', [])
-                        if isinstance(comments_data, list):
-                            issue_comments[str(obs['id'])] = comments_data
-                        elif isinstance(comments_data, dict):
-                            if 'items' in comments_data and isinstance(comments_data['items'], list):
-                                issue_comments[str(obs['id'])] = comments_data['items']
-                            else:
-                                issue_comments[str(obs['id'])] = []
-                        else:
-                            issue_comments[str(obs['id'])] = []
-                    else:
-                        issue_comments[str(obs['id'])] = []
-
-        # Get instructions
-        print(f"[DEBUG-VIEWS] Fetching instructions for project ID: {project_id}")
-        instructions_response = ReviztoService.get_instructions(project_id)
-        if instructions_response and instructions_response.get('result') == 0 and instructions_response.get('data') and \
-                instructions_response['data'].get('data'):
-            instructions = instructions_response['data']['data']
-            print(f"[DEBUG-VIEWS] Found {len(instructions)} instructions")
-
-            # Fetch comments for each instruction
-            for ins in instructions:
-                if ins.get('id'):
-                    comments_response = ReviztoService.get_issue_comments(project_id, ins['id'], '2018-05-30')
-                    if comments_response and comments_response.get('result') == 0:
-                        comments_data = comments_response.get('data', [])
-                        if isinstance(comments_data, list):
-                            issue_comments[str(ins['id'])] = comments_data
-                        elif isinstance(comments_data, dict):
-                            if 'items' in comments_data and isinstance(comments_data['items'], list):
-                                issue_comments[str(ins['id'])] = comments_data['items']
-                            else:
-                                issue_comments[str(ins['id'])] = []
-                        else:
-                            issue_comments[str(ins['id'])] = []
-                    else:
-                        issue_comments[str(ins['id'])] = []
-
-        # Get deficiencies
-        print(f"[DEBUG-VIEWS] Fetching deficiencies for project ID: {project_id}")
-        deficiencies_response = ReviztoService.get_deficiencies(project_id)
-        if deficiencies_response and deficiencies_response.get('result') == 0 and deficiencies_response.get('data') and \
-                deficiencies_response['data'].get('data'):
-            deficiencies = deficiencies_response['data']['data']
-            print(f"[DEBUG-VIEWS] Found {len(deficiencies)} deficiencies")
-
-            # Fetch comments for each deficiency
-            for def_item in deficiencies:
-                if def_item.get('id'):
-                    comments_response = ReviztoService.get_issue_comments(project_id, def_item['id'], '2018-05-30')
-                    if comments_response and comments_response.get('result') == 0:
-                        comments_data = comments_response.get('data', [])
-                        if isinstance(comments_data, list):
-                            issue_comments[str(def_item['id'])] = comments_data
-                        elif isinstance(comments_data, dict):
-                            if 'items' in comments_data and isinstance(comments_data['items'], list):
-                                issue_comments[str(def_item['id'])] = comments_data['items']
-                            else:
-                                issue_comments[str(def_item['id'])] = []
-                        else:
-                            issue_comments[str(def_item['id'])] = []
-                    else:
-                        issue_comments[str(def_item['id'])] = []
-
-        # STEP 2: Generate PDF with enhanced status mapping
-        print(f"[DEBUG-VIEWS] Generating PDF with enhanced error handling...")
-        print(f"[DEBUG-VIEWS] Arguments being passed to PDF generator:")
-        print(f"[DEBUG-VIEWS] - project_id: {project_id} (type: {type(project_id)})")
-        print(f"[DEBUG-VIEWS] - project_info: {list(project_info.keys())}")
-        print(f"[DEBUG-VIEWS] - observations: {len(observations)} items")
-        print(f"[DEBUG-VIEWS] - instructions: {len(instructions)} items")
-        print(f"[DEBUG-VIEWS] - deficiencies: {len(deficiencies)} items")
-        print(f"[DEBUG-VIEWS] - issue_comments: {len(issue_comments)} items")
-        print(f"[DEBUG-VIEWS] - enhanced_status_map: {len(enhanced_status_map)} items")
-
-        # Import the enhanced PDF generator
-        try:
-            from .pdf_generator import generate_report_pdf_with_status_fix
-            print(f"[DEBUG-VIEWS] Successfully imported generate_report_pdf_with_status_fix")
-
-            # Use the enhanced PDF generator with dynamic status mapping
-            pdf_buffer = generate_report_pdf_with_status_fix(
-                project_id,
-                project_info,
-                observations,
-                instructions,
-                deficiencies,
-                issue_comments,
-            )
-            print(f"[DEBUG-VIEWS] Enhanced PDF generation successful")
-
-        except ImportError as import_err:
-            print(f"[DEBUG-VIEWS] Could not import enhanced PDF generator: {import_err}")
-            # Fallback to regular PDF generation
-            from .pdf_generator import generate_report_pdf
-            pdf_buffer = generate_report_pdf(
-                project_id,
-                project_info,
-                observations,
-                instructions,
-                deficiencies,
-                issue_comments,
-                enhanced_status_map  # Still pass status map if function supports it
-            )
-            print(f"[DEBUG-VIEWS] Fallback PDF generation successful")
-
-        except Exception as pdf_gen_error:
-            import traceback
-            print(f"[DEBUG-VIEWS] Error in PDF generation function: {pdf_gen_error}")
-            print(f"[DEBUG-VIEWS] Error traceback: {traceback.format_exc()}")
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            print(f"[DEBUG-VIEWS] PDF for project {project_id} not modified")
+            return not_modified
 
-            # Final fallback - try basic PDF generation
-            try:
-                from .pdf_generator import generate_report_pdf
-                pdf_buffer = generate_report_pdf(
-                    project_id,
-                    project_info,
-                    observations,
-                    instructions,
-                    deficiencies,
-                    issue_comments
-                )
-                print(f"[DEBUG-VIEWS] Basic fallback PDF generation successful")
-            except Exception as final_error:
-                print(f"[DEBUG-VIEWS] All PDF generation attempts failed: {final_error}")
-                # Return error PDF as last resort
-                from .pdf_generator import create_error_pdf
-                pdf_buffer = create_error_pdf(project_id, project_info, str(pdf_gen_error))
+        pdf_bytes, complete = render_report(inputs)
 
         # Create HTTP response with PDF content
         from django.http import HttpResponse
-        response = HttpResponse(pdf_buffer.getvalue(), content_type='application/pdf')
-
-        # Set filename
-        project_name = project_info['projectName'] or f"Projet_{project_id}"
-        project_name = project_name.replace(' ', '_')
-
-        response['Content-Disposition'] = f'attachment; filename="Rapport_Visite_{project_name}.pdf"'
+        response = HttpResponse(pdf_bytes, content_type='application/pdf')
+        filename = inputs['filename']
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        # A degraded PDF gets no ETag so the next request renders it again
+        if complete:
+            response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
 
         print(f"[DEBUG-VIEWS] PDF successfully generated for project {project_id}")
         print(f"[DEBUG-VIEWS] =====================================================")
         return response
 
+    except ProjectDataNotFound:
+        print(f"[DEBUG-VIEWS] No project data found for project ID: {project_id}")
+        return JsonResponse({'error': 'Project data not found'}, status=404)
+
     except Exception as e:
         import traceback
         print(f"[DEBUG-VIEWS] Error generating PDF: {e}")
         print(f"[DEBUG-VIEWS] Traceback: {traceback.format_exc()}")
         print(f"[DEBUG-VIEWS] =====================================================")
         return JsonResponse({'error': str(e)}, status=500)
+
+
+def create_report_job(request, project_id):
+    """
+    API endpoint to start generating a PDF report in the background
+    Returns the job id and the URLs to poll its status and download the PDF
+    """
+    if request.method != 'POST':
+        logger.warning("Create report job called with non-POST method: %s", request.method)
+        return JsonResponse({'error': 'Only POST method allowed'}, status=405)
+
+    from django.urls import reverse
+    from . import report_jobs
+
+    if not ProjectData.objects.filter(id=project_id).exists():
+        print(f"[DEBUG-VIEWS] No project data found for project ID: {project_id}")
+        return JsonResponse({'error': 'Project data not found'}, status=404)
+
+    try:
+        job, created = report_jobs.submit_report_job(project_id)
+        data = report_jobs.job_status(job)
+        data.update({
+            'created': created,
+            'status_url': reverse('report_job_status', args=[job.id]),
+            'download_url': reverse('download_report', args=[job.id]),
+        })
+        return JsonResponse(data, status=202)
+
+    except Exception as e:
+        import traceback
+        print(f"[DEBUG-VIEWS] Error creating report job: {e}")
+        print(f"[DEBUG-VIEWS] Traceback: {traceback.format_exc()}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def report_job_status(request, job_id):
+    """
+    API endpoint to get the status and progress of a report job
+    """
+    from django.urls import reverse
+    from . import report_jobs
+
+    job = report_jobs.get_job(job_id)
+    if not job:
+        return JsonResponse({'error': 'Report job not found'}, status=404)
+
+    data = report_jobs.job_status(job)
+    if job.status == job.STATUS_DONE:
+        data['download_url'] = reverse('download_report', args=[job.id])
+    return JsonResponse(data)
+
+
+def download_report(request, job_id):
+    """
+    API endpoint to download the PDF of a finished report job
+    """
+    from io import BytesIO
+    from django.http import FileResponse
+    from django.utils.http import quote_etag
+    from . import report_jobs
+
+    job = report_jobs.get_job(job_id)
+    if not job:
+        return JsonResponse({'error': 'Report job not found'}, status=404)
+
+    if job.status != job.STATUS_DONE:
+        return JsonResponse({'error': f'Report is not ready (status: {job.status})'}, status=409)
+
+    # A job's file never changes once it is done
+    etag = quote_etag(job.id)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    pdf_bytes = report_jobs.get_job_pdf(job.id)
+    if pdf_bytes is None:
+        return JsonResponse({'error': 'Report file is no longer available, please generate it again'}, status=410)
+
+    response = FileResponse(
+        BytesIO(pdf_bytes),
+        as_attachment=True,
+        filename=job.file_name,
+        content_type='application/pdf'
+    )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 def debug_token_state(request):
     """
     Debug endpoint that shows the current token state (without revealing the tokens)
@@ -792,6 +690,31 @@ print(f"Refresh Token available: {'YES' if settings.REVIZTO_REFRESH_TOKEN else '
 print(f"License UUID available: {'YES' if settings.REVIZTO_LICENCE_UUID else 'NO'}")
 
 
+def debug_api_client_state(request):
+    """
+    Debug endpoint that shows the state of the outbound Revizto API client
+    (HTTP connection pool usage, rate limiter, circuit breakers, retry budget,
+    response, comment sync, mirror, project catalog, image and report cache counters,
+    PDF asset timings, per worker process)
+    """
+    from .api import transport, rate_limiter, circuit_breaker, response_cache, comment_store, mirror, project_catalog
+    from . import image_cache, pdf_assets, report_cache
+
+    return JsonResponse({
+        'http_pool': transport.get_pool_status(),
+        'rate_limiter': rate_limiter.get_status(),
+        'circuit_breakers': circuit_breaker.get_status(),
+        'response_cache': response_cache.get_status(),
+        'comment_store': comment_store.get_status(),
+        'mirror': mirror.get_status(),
+        'project_catalog': project_catalog.get_status(),
+        'image_cache': image_cache.get_status(),
+        'pdf_assets': pdf_assets.get_status(),
+        'report_cache': report_cache.get_status(),
+        'current_time': str(datetime.now())
+    })
+
+
 def check_token_state(request):
     """Check the current state of API tokens."""
     from .api import token_store
@@ -16,7 +16,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Make function available globally
     window.pdfGenerator = {
-        generateProjectPDF
+        generateProjectPDF,
+        startReportJob,
+        waitForReportJob
     };
 });
 
@@ -38,15 +40,12 @@ function generateProjectPDF() {
 
     // Save current project data before generating PDF to ensure all changes are included
     saveProjectDataBeforePdfGeneration()
-        .then(() => {
-            // Generate PDF by redirecting to the PDF endpoint
-            const pdfUrl = `/api/projects/${window.activeProjectId}/generate-pdf/`;
-            console.log('[DEBUG] Redirecting to PDF URL:', pdfUrl);
-
-            // Open PDF in a new tab/window
-            window.open(pdfUrl, '_blank');
-
-            // Hide loading state
+        .then(() => startReportJob(window.activeProjectId))
+        .then(job => waitForReportJob(job))
+        .then(job => {
+            // Download the stored PDF (attachment, so the page stays in place)
+            console.log('[DEBUG] Report ready, downloading from:', job.download_url);
+            window.location.href = job.download_url;
             showPdfGenerationLoading(false);
         })
         .catch(error => {
@@ -56,6 +55,65 @@ function generateProjectPDF() {
         });
 }
 
+/**
+ * Start a background report job for a project
+ * @param {number} projectId - Project ID
+ * @returns {Promise<Object>} Promise that resolves with the created job
+ */
+function startReportJob(projectId) {
+    console.log('[DEBUG] Starting report job for project ID:', projectId);
+
+    return fetch(`/api/projects/${projectId}/reports/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getPdfCsrfToken()
+        }
+    })
+        .then(response => response.json().then(data => {
+            if (!response.ok) {
+                throw new Error(data.error || `HTTP ${response.status}`);
+            }
+            console.log('[DEBUG] Report job started:', data.job_id, data.created ? '(new)' : '(already running)');
+            return data;
+        }));
+}
+
+/**
+ * Poll a report job until it is done or has failed
+ * @param {Object} job - Job returned by startReportJob
+ * @returns {Promise<Object>} Promise that resolves with the finished job
+ */
+function waitForReportJob(job) {
+    const pollInterval = 2000;
+
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(job.status_url)
+                .then(response => response.json().then(data => {
+                    if (!response.ok) {
+                        throw new Error(data.error || `HTTP ${response.status}`);
+                    }
+                    return data;
+                }))
+                .then(status => {
+                    console.log(`[DEBUG] Report job ${status.job_id}: ${status.status} (${status.stage}, ${status.progress}%)`);
+                    showPdfGenerationProgress(status.progress);
+
+                    if (status.status === 'done') {
+                        resolve(status);
+                    } else if (status.status === 'failed') {
+                        reject(new Error(status.error || 'La génération du rapport a échoué'));
+                    } else {
+                        setTimeout(poll, pollInterval);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
 /**
  * Save project data before generating PDF
  * @returns {Promise} Promise that resolves when data is saved
@@ -117,6 +175,30 @@ function showPdfGenerationLoading(isLoading) {
     }
 }
 
+/**
+ * Show report generation progress on the PDF button
+ * @param {number} progress - Progress in percent
+ */
+function showPdfGenerationProgress(progress) {
+    const generatePdfBtn = document.getElementById('generate-pdf');
+
+    if (generatePdfBtn && generatePdfBtn.disabled) {
+        generatePdfBtn.innerText = `Génération en cours... ${progress || 0}%`;
+    }
+}
+
+/**
+ * Get the CSRF token from the form or the csrftoken cookie
+ * @returns {string} CSRF token
+ */
+function getPdfCsrfToken() {
+    return document.querySelector('input[name="csrfmiddlewaretoken"]')?.value ||
+        document.cookie
+            .split('; ')
+            .find(row => row.startsWith('csrftoken='))
+            ?.split('=')[1] || '';
+}
+
 /**
  * Show message to user
  * @param {string} message - Message to display